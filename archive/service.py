@@ -0,0 +1,102 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import DateTime, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from database_models import SlotReservation, Ticket, TicketArchive
+from schemas import TicketStatus
+
+
+# -------------------------------------------------
+# Konfiguration
+# -------------------------------------------------
+
+# Ab diesem Alter sind Tickets kalt: CLOSED nach Erstellung,
+# BOOKED nach dem Termin (slot_start)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# Ticket-Spalten, die 1:1 ins Archiv kopiert werden
+_TICKET_COLUMNS = [column.name for column in Ticket.__table__.columns]
+
+
+def archive_cutoff(after_days: int = ARCHIVE_AFTER_DAYS, now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(days=after_days)
+
+
+# -------------------------------------------------
+# Auswahl & Verschieben (ein Batch = eine kurze Transaktion)
+# -------------------------------------------------
+
+def archive_candidates(db: Session, cutoff: datetime, limit: int = ARCHIVE_BATCH_SIZE) -> List[int]:
+    """
+    IDs kalter Tickets, je Praxis über die Composite-Indizes
+    (practice, status, created_at) bzw. (practice, slot_start).
+    Die Praxen kommen aus den Tickets selbst (DISTINCT), damit auch
+    Praxen ohne Enum-Eintrag bzw. mit gelöschtem Zeitplan archiviert werden.
+    Das Ticket mit der höchsten ID bleibt immer stehen: SQLite vergibt
+    neue IDs als max(id) + 1 und würde sonst archivierte IDs erneut vergeben.
+    """
+    max_id = db.query(func.max(Ticket.id)).scalar()
+    if max_id is None:
+        return []
+
+    practice_ids = [
+        practice_id for (practice_id,) in
+        db.query(Ticket.practice_id).distinct().order_by(Ticket.practice_id)
+    ]
+
+    ids: List[int] = []
+    for practice_id in practice_ids:
+        for condition in (
+            (Ticket.status == TicketStatus.CLOSED,),
+            (Ticket.status == TicketStatus.BOOKED, Ticket.slot_start < cutoff),
+        ):
+            remaining = limit - len(ids)
+            if remaining <= 0:
+                return ids
+            ids += [
+                ticket_id for (ticket_id,) in
+                db.query(Ticket.id)
+                .filter(
+                    Ticket.practice_id == practice_id,
+                    Ticket.created_at < cutoff,
+                    Ticket.id < max_id,
+                    *condition,
+                )
+                .order_by(Ticket.created_at)
+                .limit(remaining)
+                # Postgres: parallele Archivierer überspringen gesperrte Zeilen
+                .with_for_update(skip_locked=True)
+                .all()
+            ]
+    return ids
+
+
+def archive_tickets(db: Session, ticket_ids: List[int]) -> int:
+    """
+    Kopiert die Tickets ins Archiv und löscht sie (samt Reservierungen
+    vergangener Termine) aus `tickets` – in EINER Transaktion.
+    Gibt die Anzahl verschobener Tickets zurück.
+    """
+    if not ticket_ids:
+        return 0
+
+    tickets = Ticket.__table__
+    db.execute(
+        insert(TicketArchive).from_select(
+            _TICKET_COLUMNS + ["archived_at"],
+            select(
+                *(tickets.c[name] for name in _TICKET_COLUMNS),
+                literal(datetime.utcnow(), DateTime),
+            ).where(tickets.c.id.in_(ticket_ids)),
+        )
+    )
+    db.query(SlotReservation).filter(SlotReservation.ticket_id.in_(ticket_ids)).delete(
+        synchronize_session=False
+    )
+    moved = db.query(Ticket).filter(Ticket.id.in_(ticket_ids)).delete(synchronize_session=False)
+    db.commit()
+    return moved
@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from archive.service import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    archive_candidates,
+    archive_cutoff,
+    archive_tickets,
+)
+
+
+logger = logging.getLogger("twilio-agent")
+
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+# Pause zwischen zwei Batches – andere Schreiber kommen dazwischen
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.2"))
+
+
+# -------------------------------------------------
+# Archiv-Worker
+# -------------------------------------------------
+
+class ArchiveWorker:
+    """
+    Verschiebt kalte Tickets im Hintergrund ins Archiv: pro Lauf so viele
+    Batches (ARCHIVE_BATCH_SIZE, je eigene kurze Transaktion), bis nichts
+    mehr ansteht; danach Pause bis zum nächsten Intervall.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        after_days: int = ARCHIVE_AFTER_DAYS,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        interval_seconds: float = ARCHIVE_INTERVAL_SECONDS,
+        batch_pause_seconds: float = ARCHIVE_BATCH_PAUSE_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.batch_pause_seconds = batch_pause_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.archived = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ticket-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Archiv-Worker: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def run_once(self) -> int:
+        """
+        Archiviert alle aktuell kalten Tickets batchweise. Gibt die Anzahl
+        verschobener Tickets zurück.
+        """
+        cutoff = archive_cutoff(self.after_days)
+        total = 0
+        while not self._stop.is_set():
+            db = self.session_factory()
+            try:
+                moved = archive_tickets(db, archive_candidates(db, cutoff, self.batch_size))
+            finally:
+                db.close()
+            if not moved:
+                break
+            total += moved
+            self.archived += moved
+            self.batches += 1
+            self._stop.wait(self.batch_pause_seconds)
+
+        self.last_run_at = datetime.utcnow()
+        if total:
+            logger.info(f"Tickets archiviert: {total} (älter als {cutoff:%Y-%m-%d})")
+        return total
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self._thread is not None,
+            "archived": self.archived,
+            "batches": self.batches,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
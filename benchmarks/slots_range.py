@@ -0,0 +1,103 @@
+"""
+Benchmark für GET /slots: N Einzeltag-Aufrufe vs. ein Bereichs-Aufruf.
+
+Läuft in-process über den TestClient mit einer frischen SQLite-Datei.
+Vorab werden einige Termine im Zeitraum gebucht, damit beide Wege die
+Belegung einrechnen. Vor der Messung wird geprüft, dass der Bereich exakt
+die aneinandergehängten Einzeltage liefert. Ausgegeben wird der Median
+je Praxis über alle Wiederholungen.
+
+    python benchmarks/slots_range.py --days 60 --repeat 20
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRACTICES = ("physio_krebs_nottuln", "physio_default_20min", "physio_default_30min")
+
+
+def single_days(client, practice_id: str, start: date, days: int) -> list:
+    slots = []
+    for i in range(days):
+        day = (start + timedelta(days=i)).isoformat()
+        response = client.get("/slots", params={"practice_id": practice_id, "date_str": day})
+        assert response.status_code == 200, response.text[:200]
+        slots.extend(response.json())
+    return slots
+
+
+def one_range(client, practice_id: str, start: date, days: int) -> list:
+    end = start + timedelta(days=days - 1)
+    response = client.get("/slots", params={
+        "practice_id": practice_id, "from": start.isoformat(), "to": end.isoformat(),
+    })
+    assert response.status_code == 200, response.text[:200]
+    return response.json()
+
+
+def book_some(client, practice_id: str, start: date, days: int, bookings: int) -> None:
+    for i in range(bookings):
+        day = start + timedelta(days=i * days // max(bookings, 1))
+        response = client.post("/book", json={
+            "practice_id": practice_id,
+            "patient_name": f"Benchmark {i}",
+            "requested_date": day.isoformat(),
+            "requested_time": "15:00",
+        })
+        assert response.status_code == 200, response.text[:200]
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main(args) -> None:
+    db_dir = tempfile.mkdtemp(prefix="slots-range-")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'bench.db')}",
+        OUTBOX_WORKER_ENABLED="0",
+        ARCHIVE_WORKER_ENABLED="0",
+        MIGRATE_ON_STARTUP="1",
+    )
+    sys.path.insert(0, REPO_ROOT)
+    logging.disable(logging.INFO)
+
+    from fastapi.testclient import TestClient
+    import server
+
+    start = date.today() + timedelta(days=1)
+    try:
+        with TestClient(server.app) as client:
+            for practice_id in PRACTICES:
+                book_some(client, practice_id, start, args.days, args.bookings)
+                assert one_range(client, practice_id, start, args.days) == \
+                    single_days(client, practice_id, start, args.days)
+
+                singles = [timed(single_days, client, practice_id, start, args.days) for _ in range(args.repeat)]
+                ranges = [timed(one_range, client, practice_id, start, args.days) for _ in range(args.repeat)]
+                print(
+                    f"{practice_id:22s} {args.days} Einzeltage={statistics.median(singles):7.1f}ms "
+                    f"Bereich={statistics.median(ranges):6.1f}ms "
+                    f"Faktor={statistics.median(singles) / statistics.median(ranges):5.1f}x"
+                )
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=60, help="Tage im Zeitraum (max. 90)")
+    parser.add_argument("--repeat", type=int, default=20, help="Wiederholungen je Variante (Median)")
+    parser.add_argument("--bookings", type=int, default=20, help="vorab gebuchte Termine je Praxis")
+    main(parser.parse_args())
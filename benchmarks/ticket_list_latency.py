@@ -0,0 +1,144 @@
+"""
+Benchmark der Ticket-Listen bei 10k / 100k Tickets einer Praxis.
+
+Läuft in-process gegen eine frische SQLite-Datei; die Tickets werden per
+create_tickets_bulk angelegt (alle von heute, damit auch die Tages-
+Abfragen des Dashboards alle Zeilen lesen). Gemessen wird je Größe der
+Median über --repeat Läufe:
+
+  validate (vorher)      voller ORM-Ladevorgang + TicketModel.model_validate
+                         je Zeile (früherer Lesepfad, als Referenz)
+  list_tickets           TICKET_MODEL_COLUMNS + model_validate_json
+  list_ticket_rows       nur Kopfspalten als TicketRow, ohne Pydantic
+  GET dashboard/summary  Endpoint über den TestClient
+  GET inbox (50)         erste Seite der Inbox
+
+    python benchmarks/ticket_list_latency.py --rows 10000 100000 --repeat 5
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRACTICE_ID = "physio_default_20min"
+SEED_CHUNK = 5000
+
+
+def main(args) -> None:
+    db_dir = tempfile.mkdtemp(prefix="ticket-lists-")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'bench.db')}",
+        OUTBOX_WORKER_ENABLED="0",
+        ARCHIVE_WORKER_ENABLED="0",
+        MIGRATE_ON_STARTUP="1",
+    )
+    sys.path.insert(0, REPO_ROOT)
+    logging.disable(logging.INFO)
+
+    from fastapi.testclient import TestClient
+
+    import server
+    from database import SessionLocal
+    from database_models import Ticket
+    from schemas import BookingRequest, TicketModel, TicketStatus
+    from tickets.service import create_tickets_bulk, list_ticket_rows, list_tickets
+
+    def seed(start: int, count: int) -> None:
+        db = SessionLocal()
+        try:
+            for offset in range(start, start + count, SEED_CHUNK):
+                create_tickets_bulk(db, [
+                    TicketModel(
+                        practice_id=PRACTICE_ID,
+                        status=TicketStatus.CALLBACK,
+                        booking_request=BookingRequest(
+                            practice_id=PRACTICE_ID,
+                            patient_name=f"Patient {i}",
+                            patient_phone=f"+49{i:09d}",
+                            requested_date=date.today(),
+                        ),
+                    )
+                    for i in range(offset, min(offset + SEED_CHUNK, start + count))
+                ])
+        finally:
+            db.close()
+
+    def validate_before(db) -> list:
+        rows = (
+            db.query(Ticket)
+            .filter(Ticket.practice_id == PRACTICE_ID)
+            .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+            .all()
+        )
+        tickets = []
+        for row in rows:
+            ticket = TicketModel.model_validate(row.data or {})
+            ticket.ticket_id = str(row.id)
+            ticket.practice_id = row.practice_id
+            ticket.status = row.status
+            ticket.created_at = row.created_at
+            tickets.append(ticket)
+        return tickets
+
+    def with_session(fn):
+        def run():
+            db = SessionLocal()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+        return run
+
+    def get(client, path: str, limit=None):
+        params = {"practice_id": PRACTICE_ID}
+        if limit:
+            params["limit"] = limit
+
+        def run():
+            response = client.get(path, params=params)
+            assert response.status_code == 200, response.text[:200]
+        return run
+
+    def median_ms(fn) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    try:
+        with TestClient(server.app) as client:
+            measurements = {
+                "validate (vorher)": with_session(validate_before),
+                "list_tickets": with_session(lambda db: list_tickets(db, PRACTICE_ID)),
+                "list_ticket_rows": with_session(lambda db: list_ticket_rows(db, PRACTICE_ID)),
+                "GET dashboard/summary": get(client, "/api/dashboard/summary"),
+                "GET inbox (50)": get(client, "/api/inbox", limit=50),
+            }
+
+            seeded = 0
+            for rows in sorted(args.rows):
+                started = time.perf_counter()
+                seed(seeded, rows - seeded)
+                seeded = rows
+                print(f"{rows} Tickets (angelegt in {time.perf_counter() - started:.1f}s)")
+                for name, fn in measurements.items():
+                    print(f"  {name:22s} {median_ms(fn):9.1f}ms")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="Ticket-Anzahlen")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen je Messung (Median)")
+    main(parser.parse_args())
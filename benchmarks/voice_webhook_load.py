@@ -0,0 +1,215 @@
+"""
+Lasttest für /voice/twilio-webhook: N gleichzeitige Anrufe.
+
+Startet uvicorn mit einer frischen SQLite-Datei (oder nutzt --url) und
+misst zwei Phasen:
+  offer+confirm   je Anruf Slot-Angebot (turn=0) und "ja" (turn=1)
+  direct booking  Buchung ohne CallSid in einem Schritt
+
+Der Lastgenerator spricht HTTP/1.1 direkt über asyncio-Streams (eine
+Keep-Alive-Verbindung je Anruf). Ein schwerer HTTP-Client würde auf einer
+kleinen Maschine selbst die CPU belegen und die Server-Latenz verfälschen.
+Jeder Lauf startet einen eigenen Server mit leerer DB; am Ende steht der
+Median von p99 über alle Läufe.
+
+    python benchmarks/voice_webhook_load.py --calls 200 --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# -------------------------------------------------
+# Minimaler HTTP/1.1-Client
+# -------------------------------------------------
+
+class Connection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, form: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = urlencode(form).encode() if form else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+# -------------------------------------------------
+# Szenarien
+# -------------------------------------------------
+
+BOOKING_SPEECH = "Ich möchte einen Termin buchen"
+
+
+async def offer_and_confirm(conn: Connection, i: int, latencies: List[float]) -> None:
+    form = {
+        "From": f"+4915{i:08d}",
+        "CallSid": f"CA{os.getpid()}{time.monotonic_ns()}{i:06d}",
+        "CallStatus": "in-progress",
+        "SpeechResult": BOOKING_SPEECH,
+    }
+    for turn, speech in ((0, BOOKING_SPEECH), (1, "ja")):
+        form["SpeechResult"] = speech
+        started = time.perf_counter()
+        status, body = await conn.request("POST", f"/voice/twilio-webhook?turn={turn}", form)
+        latencies.append(time.perf_counter() - started)
+        assert status == 200, body[:200]
+
+
+async def direct_booking(conn: Connection, i: int, latencies: List[float]) -> None:
+    form = {"From": f"+4916{i:08d}", "SpeechResult": BOOKING_SPEECH}
+    started = time.perf_counter()
+    status, body = await conn.request("POST", "/voice/twilio-webhook", form)
+    latencies.append(time.perf_counter() - started)
+    assert status == 200, body[:200]
+
+
+SCENARIOS = (("offer+confirm", offer_and_confirm), ("direct booking", direct_booking))
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index] * 1000
+
+
+async def run_phase(host: str, port: int, calls: int, scenario) -> Tuple[List[float], float]:
+    connections = [Connection(host, port) for _ in range(calls)]
+    latencies: List[float] = []
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(scenario(conn, i, latencies) for i, conn in enumerate(connections)))
+    finally:
+        for conn in connections:
+            conn.close()
+    return latencies, time.perf_counter() - started
+
+
+# -------------------------------------------------
+# Server
+# -------------------------------------------------
+
+def process_cpu_seconds(pid: int) -> float:
+    fields = open(f"/proc/{pid}/stat").read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(port: int, db_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'load.db')}",
+        OUTBOX_WORKER_ENABLED="0",
+        ARCHIVE_WORKER_ENABLED="0",
+        MIGRATE_ON_STARTUP="1",
+        PYTHONPATH=REPO_ROOT,
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port),
+         "--log-level", "warning", "--timeout-keep-alive", "120"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = Connection(host, port)
+        try:
+            status, _ = await conn.request("GET", "/")
+            if status < 500:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+        finally:
+            conn.close()
+
+
+async def run_once(args, host: str, port: int, server: Optional[subprocess.Popen]) -> Dict[str, float]:
+    await wait_until_ready(host, port)
+    p99 = {}
+    for name, scenario in SCENARIOS:
+        cpu_before = process_cpu_seconds(server.pid) if server else None
+        latencies, wall = await run_phase(host, port, args.calls, scenario)
+        p99[name] = percentile(latencies, 99)
+        line = (
+            f"{name:15s} requests={len(latencies)} wall={wall:.2f}s "
+            f"p50={percentile(latencies, 50):.0f}ms p95={percentile(latencies, 95):.0f}ms "
+            f"p99={p99[name]:.0f}ms max={max(latencies) * 1000:.0f}ms"
+        )
+        if server:
+            line += f" server_cpu={process_cpu_seconds(server.pid) - cpu_before:.2f}s"
+        print(line)
+    return p99
+
+
+async def main(args) -> None:
+    results = []
+    for run in range(args.runs):
+        print(f"Lauf {run + 1}/{args.runs}: {args.calls} gleichzeitige Anrufe")
+        if args.url:
+            parts = urlsplit(args.url)
+            results.append(await run_once(args, parts.hostname, parts.port or 80, None))
+            continue
+        db_dir = tempfile.mkdtemp(prefix="voice-load-")
+        server = start_server(args.port, db_dir)
+        try:
+            results.append(await run_once(args, "127.0.0.1", args.port, server))
+        finally:
+            server.terminate()
+            server.wait()
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    if args.runs > 1:
+        for name, _ in SCENARIOS:
+            print(f"{name:15s} median p99={statistics.median(r[name] for r in results):.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="gleichzeitige Anrufe je Phase")
+    parser.add_argument("--port", type=int, default=8765, help="Port des gestarteten uvicorn")
+    parser.add_argument("--runs", type=int, default=1, help="Läufe (Median von p99)")
+    parser.add_argument("--url", help="laufenden Server nutzen statt uvicorn zu starten")
+    asyncio.run(main(parser.parse_args()))
@@ -1,5 +1,5 @@
-from datetime import datetime, date
-from typing import Union
+from datetime import datetime, date, timedelta
+from typing import List, Optional, Union
 from uuid import uuid4
 
 from schemas import (
@@ -7,15 +7,45 @@ from schemas import (
     TicketModel,
     CallbackTicket,
     TicketStatus,
+    SlotModel,
     SlotType,
 )
-from slots.dispatcher import get_slots_for_practice
+from slots.dispatcher import get_day_slots
+from slots.search import (
+    find_next_available,
+    nearest_free_slots,
+    parse_requested_time,
+    tolerance_window,
+    MAX_SEARCH_DAYS,
+)
 
 
 # -------------------------------------------------
 # Booking Flow – API / Formular / Dashboard
 # -------------------------------------------------
 
+# Hausbesuche werden immer persönlich abgestimmt (keine Warteliste)
+HOUSE_VISIT_REASON = "Hausbesuch – Rückruf erforderlich"
+
+
+def _booked_ticket(
+    booking_request: BookingRequest,
+    slot: SlotModel,
+    message: str,
+    alternatives: Optional[List[SlotModel]] = None,
+) -> TicketModel:
+    return TicketModel(
+        ticket_id=str(uuid4()),
+        practice_id=booking_request.practice_id,
+        booking_request=booking_request,   # 🔥 ENTSCHEIDEND
+        slot=slot,
+        alternatives=alternatives or [],
+        status=TicketStatus.BOOKED,
+        message=message,
+        created_at=datetime.utcnow(),
+    )
+
+
 def process_booking_request(
     booking_request: BookingRequest,
 ) -> Union[TicketModel, CallbackTicket]:
@@ -23,53 +53,78 @@ def process_booking_request(
     Zentrale Booking-Logik (reiner Decision-Flow):
     - Slots abrufen
     - Hausbesuch prüfen
+    - Wunschzeit → nächstgelegener freier Slot (+ Alternativen)
+    - Tag voll → nächster freier Slot an den Folgetagen
     - Ticket ODER Callback zurückgeben
     - KEINE Persistenz
     """
 
-    slots = get_slots_for_practice(
+    day_slots = get_day_slots(
         practice_id=booking_request.practice_id,
         for_date=booking_request.requested_date,
     )
 
-    # Kein Slot → Callback
-    if not slots:
+    # Hausbesuch → Callback
+    if day_slots.has_type(SlotType.HOUSE_VISIT):
         return CallbackTicket(
             practice_id=booking_request.practice_id,
             patient_name=booking_request.patient_name,
             patient_phone=booking_request.patient_phone,
-            reason="Keine verfügbaren Slots an diesem Tag",
+            reason=HOUSE_VISIT_REASON,
         )
 
-    # Hausbesuch → Callback
-    for slot in slots:
-        if slot.slot_type == SlotType.HOUSE_VISIT:
-            return CallbackTicket(
-                practice_id=booking_request.practice_id,
-                patient_name=booking_request.patient_name,
-                patient_phone=booking_request.patient_phone,
-                reason="Hausbesuch – Rückruf erforderlich",
+    # Wunschzeit → nächstgelegene freie Slots (Toleranzfenster)
+    requested = parse_requested_time(booking_request.requested_time)
+    if requested is not None:
+        ranked = nearest_free_slots(day_slots, requested)
+        if ranked:
+            slot = day_slots.to_model(ranked[0])
+            exact = slot.start_time.time() == requested
+            return _booked_ticket(
+                booking_request,
+                slot,
+                "Termin gebucht" if exact else "Termin gebucht (nächster Termin zur Wunschzeit)",
+                alternatives=[day_slots.to_model(i) for i in ranked[1:]],
             )
 
-    # Erster buchbarer Slot
-    for slot in slots:
-        if slot.is_bookable:
-            return TicketModel(
-                ticket_id=str(uuid4()),
-                practice_id=booking_request.practice_id,
-                booking_request=booking_request,   # 🔥 ENTSCHEIDEND
-                slot=slot,
-                status=TicketStatus.BOOKED,
-                message="Termin gebucht",
-                created_at=datetime.utcnow(),
+        # Am Wunschtag nichts im Fenster → gleiche Uhrzeit an Folgetagen
+        earliest, latest = tolerance_window(requested)
+        slot = find_next_available(
+            practice_id=booking_request.practice_id,
+            start_date=booking_request.requested_date + timedelta(days=1),
+            earliest=earliest,
+            latest=latest,
+        )
+        if slot is not None:
+            return _booked_ticket(
+                booking_request,
+                slot,
+                "Termin gebucht (Wunschzeit an einem Folgetag)",
             )
 
+    # Erster buchbarer Slot am Wunschtag
+    first = day_slots.first_bookable()
+    if first is not None:
+        return _booked_ticket(booking_request, day_slots.to_model(first), "Termin gebucht")
+
+    # Wunschtag voll / geschlossen → nächster freier Slot
+    slot = find_next_available(
+        practice_id=booking_request.practice_id,
+        start_date=booking_request.requested_date + timedelta(days=1),
+    )
+    if slot is not None:
+        return _booked_ticket(
+            booking_request,
+            slot,
+            "Termin gebucht (nächster freier Termin)",
+        )
+
     # Fallback
     return CallbackTicket(
         practice_id=booking_request.practice_id,
         patient_name=booking_request.patient_name,
         patient_phone=booking_request.patient_phone,
-        reason="Kein buchbarer Slot gefunden",
+        reason=f"Kein buchbarer Slot in den nächsten {MAX_SEARCH_DAYS} Tagen",
     )
 
 
@@ -82,19 +137,22 @@ def auto_book_from_voice(
     patient_name: str,
     patient_phone: str,
     for_date: date,
+    not_before: Optional[datetime] = None,
 ) -> Union[TicketModel, CallbackTicket]:
     """
     Vereinfachtes Booking für Voice:
-    - erster freier Slot
+    - nächster freier Slot ab for_date (laut Belegungs-Index),
+      bereits vergangene Slots (not_before) werden übersprungen
     - sonst Callback
     """
 
-    slots = get_slots_for_practice(
+    slot = find_next_available(
         practice_id=practice_id,
-        for_date=for_date,
+        start_date=for_date,
+        not_before=not_before,
     )
 
-    if not slots:
+    if slot is None:
         return CallbackTicket(
             practice_id=practice_id,
             patient_name=patient_name,
@@ -102,8 +160,6 @@ def auto_book_from_voice(
             reason="Kein Slot verfügbar – Rückruf notwendig",
         )
 
-    slot = slots[0]
-
     return TicketModel(
         ticket_id=str(uuid4()),
         practice_id=practice_id,
@@ -0,0 +1,245 @@
+import logging
+import os
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from booking.booking_flow import HOUSE_VISIT_REASON, process_booking_request
+from database import run_in_session
+from schemas import BookingRequest, CallbackTicket, TicketModel
+from slots.dispatcher import practice_capacity
+from slots.holds import slot_holds
+from slots.occupancy import occupancy_index
+from tickets.service import (
+    SlotUnavailableError,
+    create_ticket,
+    create_tickets_bulk,
+    sync_day_occupancy,
+)
+from waitlist.service import index_entries, stage_booking_requests
+
+
+logger = logging.getLogger("twilio-agent")
+
+# Wie oft nach einem parallel vergebenen Slot neu gesucht wird
+MAX_BOOKING_ATTEMPTS = int(os.getenv("MAX_BOOKING_ATTEMPTS", "10"))
+
+# Batch-Buchung: maximale Größe und Versuche für die Gesamt-Transaktion
+MAX_BATCH_SIZE = 1000
+MAX_BATCH_ATTEMPTS = 3
+
+
+# -------------------------------------------------
+# Buchen mit Wiederholung bei Konflikten
+# -------------------------------------------------
+
+def book_with_retry(
+    db: Session,
+    decide: Callable[[], Union[TicketModel, CallbackTicket]],
+    on_conflict: Callable[[], CallbackTicket],
+) -> Union[TicketModel, CallbackTicket]:
+    """
+    Führt die Slot-Auswahl (decide) aus und speichert das Ticket.
+    Hat ein anderer Worker den Slot inzwischen vergeben, ist der
+    Belegungs-Index bereits aus der DB nachgezogen – decide() findet beim
+    nächsten Versuch also den nächsten freien Slot.
+    Nach MAX_BOOKING_ATTEMPTS Konflikten → Rückruf (on_conflict).
+    """
+    for attempt in range(1, MAX_BOOKING_ATTEMPTS + 1):
+        result = decide()
+        if not isinstance(result, TicketModel) or not result.slot:
+            return result
+
+        try:
+            create_ticket(db=db, ticket_model=result)
+            return result
+        except SlotUnavailableError as e:
+            logger.info(f"Buchungskonflikt (Versuch {attempt}): {e}")
+
+    return on_conflict()
+
+
+async def book_with_retry_async(
+    decide: Callable[[], Union[TicketModel, CallbackTicket]],
+    on_conflict: Callable[[], CallbackTicket],
+) -> Union[TicketModel, CallbackTicket]:
+    """book_with_retry als eine Unit of Work, ohne die Event-Loop zu blockieren (Voice-Pfad)."""
+    return await run_in_session(book_with_retry, decide, on_conflict)
+
+
+def conflict_callback(booking_request: BookingRequest) -> CallbackTicket:
+    return CallbackTicket(
+        practice_id=booking_request.practice_id,
+        patient_name=booking_request.patient_name,
+        patient_phone=booking_request.patient_phone,
+        reason="Slots parallel vergeben – Rückruf notwendig",
+    )
+
+
+# -------------------------------------------------
+# Voice: Slot anbieten (Hold) → bestätigen
+# -------------------------------------------------
+
+def offer_held_slot(
+    call_sid: str,
+    decide: Callable[[], Union[TicketModel, CallbackTicket]],
+    on_conflict: Callable[[], CallbackTicket],
+) -> Union[TicketModel, CallbackTicket]:
+    """
+    Wählt einen Slot und hält ihn für den Anruf (SLOT_HOLD_TTL_SECONDS),
+    bis der Anrufer bestätigt. Gehaltene Slots sind für andere Anfragen
+    nicht verfügbar – decide() wählt bei einem Konflikt den nächsten.
+    """
+    for _ in range(MAX_BOOKING_ATTEMPTS):
+        result = decide()
+        if not _is_booked(result):
+            return result
+        if slot_holds.hold(
+            call_sid,
+            result.practice_id,
+            result.slot.start_time,
+            capacity=practice_capacity(result.practice_id),
+            payload=result,
+        ):
+            return result
+    return on_conflict()
+
+
+def confirm_held_slot(db: Session, call_sid: str) -> Optional[TicketModel]:
+    """
+    Wandelt den Hold des Anrufs in eine Buchung um.
+    None, wenn kein Hold (mehr) besteht oder der Slot in der DB bereits
+    vergeben ist – der Aufrufer bucht dann neu.
+    """
+    hold = slot_holds.take(call_sid)
+    if hold is None:
+        return None
+    try:
+        create_ticket(db=db, ticket_model=hold.payload, claimed=True)
+    except SlotUnavailableError as e:
+        logger.info(f"Gehaltener Slot nicht mehr frei ({call_sid}): {e}")
+        return None
+    return hold.payload
+
+
+async def confirm_held_slot_async(call_sid: str) -> Optional[TicketModel]:
+    """confirm_held_slot ohne die Event-Loop zu blockieren (Voice-Pfad)."""
+    return await run_in_session(confirm_held_slot, call_sid)
+
+
+# -------------------------------------------------
+# Batch-Buchung
+# -------------------------------------------------
+
+def _is_booked(result) -> bool:
+    return isinstance(result, TicketModel) and result.slot is not None
+
+
+def _plan_batch(
+    booking_requests: List[BookingRequest],
+) -> List[Union[TicketModel, CallbackTicket]]:
+    """
+    Ein Durchlauf über alle Anfragen. Jeder gewählte Slot wird sofort im
+    Belegungs-Index belegt, damit die folgenden Anfragen ihn nicht wählen.
+    """
+    results = []
+    for booking_request in booking_requests:
+        capacity = practice_capacity(booking_request.practice_id)
+        for _ in range(MAX_BOOKING_ATTEMPTS):
+            result = process_booking_request(booking_request)
+            if not _is_booked(result):
+                break
+            if occupancy_index.try_book(result.practice_id, result.slot.start_time, capacity):
+                break
+        else:
+            result = conflict_callback(booking_request)
+        results.append(result)
+    return results
+
+
+def _release_batch(db: Session, booked: List[TicketModel]) -> None:
+    for ticket in booked:
+        occupancy_index.release(ticket.practice_id, ticket.slot.start_time)
+    for practice_id, day in {(t.practice_id, t.slot.start_time.date()) for t in booked}:
+        sync_day_occupancy(db, practice_id, datetime.combine(day, datetime.min.time()))
+
+
+def _waitlisted(
+    booking_requests: List[BookingRequest],
+    results: List[Union[TicketModel, CallbackTicket]],
+) -> List[Tuple[BookingRequest, CallbackTicket]]:
+    """Callbacks, die wie bei /book auf die Warteliste kommen (nicht Hausbesuche)."""
+    return [
+        (booking_request, result)
+        for booking_request, result in zip(booking_requests, results)
+        if isinstance(result, CallbackTicket) and result.reason != HOUSE_VISIT_REASON
+    ]
+
+
+def _stage_waitlist(pending: List[Tuple[BookingRequest, CallbackTicket]]) -> Callable[[Session], None]:
+    def stage(db: Session) -> None:
+        rows = stage_booking_requests(db, [booking_request for booking_request, _ in pending])
+        for (_, result), row in zip(pending, rows):
+            result.waitlist_entry_id = row.id
+    return stage
+
+
+def book_batch(
+    db: Session,
+    booking_requests: List[BookingRequest],
+    waitlist: bool = False,
+) -> List[Union[TicketModel, CallbackTicket]]:
+    """
+    Bucht viele Anfragen auf einmal; Ergebnis je Anfrage in gleicher Reihenfolge.
+
+    Semantik bei Teilfehlern:
+    - Anfragen ohne freien Slot (oder Hausbesuch) → CallbackTicket, der Rest
+      wird trotzdem gebucht.
+    - Alle gebuchten Tickets werden gemeinsam in einer Transaktion
+      gespeichert – entweder alle oder keines.
+    - Kollidiert die Transaktion mit parallelen Buchungen, wird der Batch
+      mit aktualisierter Belegung neu geplant (MAX_BATCH_ATTEMPTS).
+    - Danach werden die Anfragen einzeln gebucht (book_with_retry); erst
+      dann kann ein Teil gespeichert sein und ein Teil Callbacks werden.
+
+    waitlist=True: Callbacks (außer Hausbesuch) kommen auf die Warteliste –
+    in derselben Transaktion wie die Tickets, im Einzel-Fallback gemeinsam
+    in einer eigenen. result.waitlist_entry_id ist danach gesetzt.
+    """
+    for attempt in range(1, MAX_BATCH_ATTEMPTS + 1):
+        results = _plan_batch(booking_requests)
+        booked = [r for r in results if _is_booked(r)]
+        pending = _waitlisted(booking_requests, results) if waitlist else []
+        try:
+            create_tickets_bulk(db, booked, stage=_stage_waitlist(pending) if pending else None)
+        except SlotUnavailableError as e:
+            logger.info(f"Batch-Konflikt (Versuch {attempt}): {e}")
+            _release_batch(db, booked)
+            continue
+        except Exception:
+            _release_batch(db, booked)
+            raise
+        index_entries(db, [result.waitlist_entry_id for _, result in pending])
+        return results
+
+    results = [
+        book_with_retry(
+            db,
+            decide=lambda r=booking_request: process_booking_request(r),
+            on_conflict=lambda r=booking_request: conflict_callback(r),
+        )
+        for booking_request in booking_requests
+    ]
+    pending = _waitlisted(booking_requests, results) if waitlist else []
+    if pending:
+        try:
+            _stage_waitlist(pending)(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            for _, result in pending:
+                result.waitlist_entry_id = None
+            raise
+        index_entries(db, [result.waitlist_entry_id for _, result in pending])
+    return results
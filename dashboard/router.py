@@ -1,48 +1,47 @@
-from fastapi import APIRouter
-from datetime import date
+from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, time, timedelta
+from sqlalchemy.orm import Session
 from typing import List, Dict
 
-from tickets.service import list_tickets
-from schemas import TicketStatus, TicketModel
+from database import get_db
+from tickets.service import count_tickets_by_status, list_tickets
+from schemas import PracticeKey, TicketStatus, TicketModel
 
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/stats")
-def dashboard_stats() -> Dict[str, int]:
-    tickets = list_tickets()
+def dashboard_stats(
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    db: Session = Depends(get_db),
+) -> Dict[str, int]:
+    # Zählen in der DB statt alle Tickets zu laden
+    counts = count_tickets_by_status(db, practice_id)
 
     stats = {
-        "total": len(tickets),
-        "open": 0,
-        "booked": 0,
-        "callback": 0,
-        "closed": 0,
+        "total": sum(counts.values()),
+        "open": counts.get(TicketStatus.OPEN.value, 0),
+        "booked": counts.get(TicketStatus.BOOKED.value, 0),
+        "callback": counts.get(TicketStatus.CALLBACK.value, 0),
+        "closed": counts.get(TicketStatus.CLOSED.value, 0),
     }
 
-    for ticket in tickets:
-        if ticket.status == TicketStatus.OPEN:
-            stats["open"] += 1
-        elif ticket.status == TicketStatus.BOOKED:
-            stats["booked"] += 1
-        elif ticket.status == TicketStatus.CALLBACK:
-            stats["callback"] += 1
-        elif ticket.status == TicketStatus.CLOSED:
-            stats["closed"] += 1
-
     return stats
 
 
 @router.get("/today", response_model=List[TicketModel])
-def dashboard_today():
-    today = date.today()
-    tickets = list_tickets()
-
-    today_tickets = [
-        ticket for ticket in tickets
-        if ticket.created_at.date() == today
-    ]
+def dashboard_today(
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    db: Session = Depends(get_db),
+):
+    day_start = datetime.combine(date.today(), time.min)
+
+    today_tickets = list_tickets(
+        db,
+        practice_id,
+        created_from=day_start,
+        created_to=day_start + timedelta(days=1),
+    )
 
     return today_tickets
-
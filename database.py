@@ -1,15 +1,247 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from threading import Lock
+from typing import Callable, Dict, Optional, TypeVar
+from weakref import WeakKeyDictionary
+import anyio
+import anyio.to_thread
+import asyncio
 import os
+import time
 
 # Der Name deiner DB, wie du ihn gerade gewählt hast
 # Nutzt Environment Variable falls vorhanden (für Render), sonst SQLite lokal
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./intelaigent.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# Pool (pro Worker-Prozess; Postgres und SQLite-Datei)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Verbindungen vor Idle-Timeouts von Render/Postgres erneuern
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Obergrenze je Statement (0 = aus) – hängende Queries blockieren sonst den Pool
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# SQLite: Wartezeit bei gesperrter DB und Memory-Map für Lesezugriffe
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Async-Pfad (run_in_session): "auto" = asyncpg auf Postgres, bei SQLite
+# eine Sync-Session im Threadpool; "native" erzwingt aiosqlite
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "auto")
+# Threads für DB-Arbeit aus async-Handlern (0 = automatisch: SQLite 1,
+# sonst Pool-Größe + Overflow)
+DB_THREADS = int(os.getenv("DB_THREADS", "0"))
+
+
+# -------------------------------------------------
+# Pool-Metriken
+# -------------------------------------------------
+# wait = Zeit bis eine Verbindung aus dem Pool kommt (Pool zu klein?),
+# hold = Zeit zwischen Checkout und Rückgabe (lange Transaktionen?).
+
+class PoolMetrics:
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.holds = 0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_hold(self, seconds: float) -> None:
+        with self._lock:
+            self.holds += 1
+            self.hold_total += seconds
+            self.hold_max = max(self.hold_max, seconds)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+                "hold_ms_avg": round(self.hold_total / self.holds * 1000, 3) if self.holds else 0.0,
+                "hold_ms_max": round(self.hold_max * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    """Misst die Wartezeit beim Checkout (Mixin für QueuePool-Varianten)."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics = pool_metrics
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def _instrument(engine: Engine, metrics: PoolMetrics) -> None:
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.record_hold(time.perf_counter() - started)
+
+
+# -------------------------------------------------
+# Engine-Factory (Postgres / SQLite)
+# -------------------------------------------------
+
+def _sqlite_pragmas(engine: Engine, in_memory: bool) -> None:
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: Leser blockieren Schreiber nicht (und umgekehrt)
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        # In WAL sicher; fsync nur noch beim Checkpoint
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.close()
+
+
+def _normalize_url(url: str) -> str:
+    # Render liefert teils "postgres://", SQLAlchemy erwartet "postgresql://"
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def make_engine(url: str) -> Engine:
+    url = _normalize_url(url)
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        database = make_url(url).database
+        in_memory = not database or database == ":memory:"
+        kwargs = {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+        }
+        if not in_memory:
+            kwargs.update(
+                poolclass=TimedQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+            )
+        engine = create_engine(url, **kwargs)
+        _sqlite_pragmas(engine, in_memory)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+        )
+
+    _instrument(engine, pool_metrics)
+    return engine
+
+
+def make_async_engine(url: str) -> AsyncEngine:
+    """
+    Async-Gegenstück zu make_engine für dieselbe Datenbank:
+    aiosqlite lokal, asyncpg auf Postgres. Eigener Pool, gleiche Limits.
+    """
+    sa_url = make_url(_normalize_url(url))
+    backend = sa_url.get_backend_name()
+
+    if backend == "sqlite":
+        in_memory = not sa_url.database or sa_url.database == ":memory:"
+        kwargs = {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not in_memory:
+            kwargs.update(
+                poolclass=TimedAsyncQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+            )
+        async_engine = create_async_engine(sa_url.set(drivername="sqlite+aiosqlite"), **kwargs)
+        _sqlite_pragmas(async_engine.sync_engine, in_memory)
+    else:
+        async_engine = create_async_engine(
+            sa_url.set(drivername="postgresql+asyncpg"),
+            poolclass=TimedAsyncQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}},
+        )
+
+    _instrument(async_engine.sync_engine, async_pool_metrics)
+    return async_engine
+
+
+def _pool_stats(pool, metrics: PoolMetrics) -> Dict[str, float]:
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    return {**stats, **metrics.stats()}
+
+
+def pool_stats() -> Dict[str, float]:
+    return _pool_stats(engine.pool, pool_metrics)
+
+
+def async_pool_stats() -> Optional[Dict[str, float]]:
+    """Pool-Zahlen des Async-Engines, None solange er nicht angelegt ist."""
+    if _async_engine is None:
+        return None
+    return _pool_stats(_async_engine.pool, async_pool_metrics)
+
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -25,4 +257,98 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# -------------------------------------------------
+# Unit of Work ohne Blockieren der Event-Loop
+# -------------------------------------------------
+# aiosqlite schickt jedes Statement einzeln über seinen Verbindungs-Thread
+# zurück in die Loop – bei einer lokalen SQLite-Datei kostet eine Buchung so
+# ~1,5 ms mehr CPU als ein einziger Sprung in den Threadpool. Auf Postgres
+# wartet asyncpg dagegen wirklich auf das Netz.
+# SQLite hat genau einen Schreiber: Mehr DB-Threads warten nur auf die
+# Sperre und konkurrieren um den GIL, deshalb dort ein einziger.
+
+T = TypeVar("T")
+
+USE_ASYNC_DRIVER = DB_ASYNC_DRIVER == "native" or (
+    DB_ASYNC_DRIVER == "auto" and engine.dialect.name != "sqlite"
+)
+
+# Async-Engine erst beim ersten run_in_session mit USE_ASYNC_DRIVER – im
+# Thread-Modus (SQLite) gibt es keinen zweiten Pool
+_async_engine: Optional[AsyncEngine] = None
+_async_sessions: Optional[async_sessionmaker] = None
+_async_engine_lock = Lock()
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """
+    Legt Async-Engine und -Sessionmaker beim ersten Aufruf an.
+    Objekte bleiben nach dem Commit lesbar, ein Nachladen außerhalb
+    von await wäre sonst ein Fehler.
+    """
+    global _async_engine, _async_sessions
+    with _async_engine_lock:
+        if _async_sessions is None:
+            _async_engine = make_async_engine(DATABASE_URL)
+            _async_sessions = async_sessionmaker(
+                bind=_async_engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        return _async_sessions
+
+
+async def close_async_engine() -> None:
+    """Gibt den Async-Pool frei (Shutdown); nächster Zugriff legt ihn neu an."""
+    global _async_engine, _async_sessions
+    with _async_engine_lock:
+        async_engine, _async_engine, _async_sessions = _async_engine, None, None
+    if async_engine is not None:
+        await async_engine.dispose()
+
+_db_threads = DB_THREADS or (
+    1 if engine.dialect.name == "sqlite" else DB_POOL_SIZE + DB_MAX_OVERFLOW
+)
+_db_limiters: "WeakKeyDictionary[asyncio.AbstractEventLoop, anyio.CapacityLimiter]" = WeakKeyDictionary()
+
+
+def _db_limiter() -> anyio.CapacityLimiter:
+    # Je Event-Loop ein Limiter (Tests starten mehrere Loops)
+    loop = asyncio.get_running_loop()
+    limiter = _db_limiters.get(loop)
+    if limiter is None:
+        limiter = _db_limiters[loop] = anyio.CapacityLimiter(_db_threads)
+    return limiter
+
+
+async def run_in_db_thread(fn: Callable[..., T], *args) -> T:
+    """
+    Führt eine blockierende DB-Funktion in einem der DB_THREADS aus.
+    Wartende Aufrufe stehen in der Event-Loop an, nicht vor der DB-Sperre.
+    """
+    return await anyio.to_thread.run_sync(fn, *args, limiter=_db_limiter())
+
+
+def _in_sync_session(fn: Callable[..., T], *args) -> T:
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def run_in_session(fn: Callable[..., T], *args) -> T:
+    """
+    Führt fn(session, *args) als eine Unit of Work aus, ohne die Event-Loop
+    auf die DB warten zu lassen: AsyncSession.run_sync (asyncpg / aiosqlite)
+    oder eine Sync-Session in run_in_db_thread (SQLite, siehe DB_ASYNC_DRIVER).
+    fn bekommt in beiden Fällen eine normale Session.
+    """
+    if USE_ASYNC_DRIVER:
+        async with get_async_sessionmaker()() as db:
+            return await db.run_sync(fn, *args)
+    return await run_in_db_thread(_in_sync_session, fn, *args)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, JSON, Enum, Index, LargeBinary, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any, Dict
 
 from database import Base
 
@@ -19,6 +20,14 @@ class Practice(Base):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Listen je Praxis (optional Status), zeitlich gefiltert/sortiert –
+        # bestehende DBs erhalten die Indizes über migrations.runner
+        Index("ix_tickets_practice_created", "practice_id", "created_at"),
+        Index("ix_tickets_practice_status_created", "practice_id", "status", "created_at"),
+        Index("ix_tickets_practice_phone_created", "practice_id", "patient_phone", "created_at"),
+        Index("ix_tickets_practice_slot_start", "practice_id", "slot_start"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     practice_id = Column(String, ForeignKey("practices.internal_id"), nullable=False)
@@ -30,6 +39,14 @@ class Ticket(Base):
     insurance_status = Column(Enum('privat', 'gesetzlich', name='insurance_status_enum'), nullable=False, default='gesetzlich')  # Krankenversicherungsstatus
     prescription_required = Column(Enum('yes', 'no', name='prescription_required_enum'), nullable=False, default='no')  # Rezept erforderlich
 
+    # Häufig gefilterte Felder aus `data` als eigene Spalten (SQL-Filter/Sortierung).
+    # `data` bleibt die vollständige Quelle; Bestandsdaten füllt migrations.runner nach.
+    patient_name = Column(String)
+    patient_phone = Column(String)
+    requested_date = Column(Date)
+    slot_start = Column(DateTime)
+    slot_end = Column(DateTime)
+
     practice = relationship("Practice", back_populates="tickets")
 
     def set_data(self, ticket_data):
@@ -38,3 +55,146 @@ class Ticket(Base):
         date, datetime und Enums werden korrekt serialisiert.
         """
         self.data = ticket_data.model_dump(mode="json")
+        for column, value in ticket_columns(self.data).items():
+            setattr(self, column, value)
+
+
+class TicketArchive(Base):
+    """
+    Kalte Tickets (CLOSED / lange vergangene Termine), vom Archiv-Worker
+    aus `tickets` verschoben. Gleiche Spalten und IDs wie Ticket, dazu
+    archived_at; gelesen nur auf Anfrage (include_archive).
+    """
+    __tablename__ = "tickets_archive"
+    __table_args__ = (
+        Index("ix_tickets_archive_practice_created", "practice_id", "created_at"),
+        Index("ix_tickets_archive_practice_status_created", "practice_id", "status", "created_at"),
+        Index("ix_tickets_archive_practice_phone_created", "practice_id", "patient_phone", "created_at"),
+        Index("ix_tickets_archive_practice_slot_start", "practice_id", "slot_start"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    practice_id = Column(String, nullable=False)
+    status = Column(String)
+    created_at = Column(DateTime)
+    data = Column(JSON, nullable=False)
+    insurance_status = Column(Enum('privat', 'gesetzlich', name='insurance_status_enum'), nullable=False, default='gesetzlich')
+    prescription_required = Column(Enum('yes', 'no', name='prescription_required_enum'), nullable=False, default='no')
+    patient_name = Column(String)
+    patient_phone = Column(String)
+    requested_date = Column(Date)
+    slot_start = Column(DateTime)
+    slot_end = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+def ticket_columns(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Werte der Ticket-Spalten patient_* / requested_date / slot_* aus dem
+    JSON-Dump eines TicketModel.
+    """
+    booking_request = (data or {}).get("booking_request") or {}
+    slot = (data or {}).get("slot") or {}
+    requested_date = booking_request.get("requested_date")
+    slot_start = slot.get("start_time")
+    slot_end = slot.get("end_time")
+    return {
+        "patient_name": booking_request.get("patient_name"),
+        "patient_phone": booking_request.get("patient_phone"),
+        "requested_date": date.fromisoformat(requested_date) if requested_date else None,
+        "slot_start": datetime.fromisoformat(slot_start) if slot_start else None,
+        "slot_end": datetime.fromisoformat(slot_end) if slot_end else None,
+    }
+
+
+class PracticeSchedule(Base):
+    __tablename__ = "practice_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    practice_id = Column(String, unique=True, nullable=False, index=True)  # = practices.internal_id
+    schedule = Column(JSON, nullable=False)  # schemas.PracticeSchedule als JSON
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SlotReservation(Base):
+    """
+    Belegt einen Platz (resource) in einem Slot. Die Unique-Constraint
+    verhindert Doppelbuchungen – auch zwischen mehreren Workern.
+    """
+    __tablename__ = "slot_reservations"
+    __table_args__ = (
+        UniqueConstraint("practice_id", "slot_start", "resource", name="uq_slot_reservation"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    practice_id = Column(String, nullable=False)
+    slot_start = Column(DateTime, nullable=False)
+    resource = Column(Integer, nullable=False, default=0)  # 0 .. Kapazität-1
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class OutboxEvent(Base):
+    """
+    Transaktionaler Outbox-Eintrag: wird in derselben Transaktion wie die
+    fachliche Änderung (z. B. Ticket) geschrieben und später vom
+    Outbox-Worker an das externe System (Kalender) ausgeliefert.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    idempotency_key = Column(String, unique=True, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+
+class IdempotencyRecord(Base):
+    """
+    Erste Antwort zu einem Idempotenz-Schlüssel (CallSid + Turn bzw.
+    Idempotency-Key-Header). status_code NULL = wird gerade verarbeitet.
+    """
+    __tablename__ = "idempotency_records"
+
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=True)  # Hash des Requests (Key-Wiederverwendung erkennen)
+    status_code = Column(Integer, nullable=True)
+    media_type = Column(String, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class WaitlistEntry(Base):
+    """
+    Patient auf der Warteliste einer Praxis mit Wunsch-Zeitfenster.
+    Wird ein passender Slot frei, wird automatisch gebucht (ticket_id).
+    """
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        Index("ix_waitlist_status_practice", "status", "practice_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    practice_id = Column(String, nullable=False)
+    patient_name = Column(String, nullable=False)
+    patient_phone = Column(String, nullable=True)
+    patient_email = Column(String, nullable=True)
+    earliest_date = Column(Date, nullable=False)
+    latest_date = Column(Date, nullable=False)
+    earliest_minute = Column(Integer, nullable=True)  # Minute seit Mitternacht (None = ganzer Tag)
+    latest_minute = Column(Integer, nullable=True)
+    status = Column(String, nullable=False, default="waiting")  # waiting | booked | cancelled
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
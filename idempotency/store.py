@@ -0,0 +1,386 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Event, Lock
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+import anyio.to_thread
+from fastapi.responses import Response
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, run_in_db_thread
+from database_models import IdempotencyRecord
+
+
+logger = logging.getLogger("twilio-agent")
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+# Wie lange ein Duplikat auf die laufende Erstverarbeitung wartet; danach
+# 409 mit Retry-After statt den Worker weiter zu belegen
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "2"))
+IDEMPOTENCY_RETRY_AFTER_SECONDS = int(os.getenv("IDEMPOTENCY_RETRY_AFTER_SECONDS", "1"))
+# Nachsehen in der DB (anderer Worker) mit wachsendem Abstand
+_WAIT_STEP_SECONDS = 0.05
+_WAIT_STEP_MAX_SECONDS = 0.5
+
+# Ergebnis von _begin_once: Erstverarbeitung läuft noch
+_IN_PROGRESS = object()
+
+
+class IdempotencyConflict(Exception):
+    """Schlüssel wurde bereits mit einem anderen Request verwendet."""
+
+
+class IdempotencyInProgress(Exception):
+    """Erstverarbeitung zum Schlüssel läuft noch (Wartezeit überschritten)."""
+
+    def __init__(self, message: str, retry_after: int = IDEMPOTENCY_RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    media_type: Optional[str]
+    body: bytes
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type=self.media_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+def transient(response: Response) -> Response:
+    """
+    Markiert eine Antwort als nicht speicherbar (z. B. Fehler-TwiML):
+    die Reservierung wird freigegeben, ein Retry verarbeitet neu.
+    """
+    response.idempotency_transient = True
+    return response
+
+
+def _storable(response: Response) -> bool:
+    return response.status_code < 500 and not getattr(response, "idempotency_transient", False)
+
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _check_fingerprint(key: str, stored: Optional[str], requested: Optional[str]) -> None:
+    if stored and requested and stored != requested:
+        raise IdempotencyConflict(f"Schlüssel {key} wurde mit anderem Inhalt verwendet")
+
+
+# -------------------------------------------------
+# Idempotenz-Store
+# -------------------------------------------------
+
+class IdempotencyStore:
+    """
+    Speichert die erste Antwort je Schlüssel: LRU im Speicher (Replay ohne
+    DB-Zugriff), dahinter die Tabelle idempotency_records (über Worker und
+    Neustarts hinweg). Einträge verfallen nach IDEMPOTENCY_TTL_SECONDS.
+
+    Ablauf: begin() → None = dieser Request verarbeitet (Schlüssel ist per
+    Unique-Key reserviert), danach complete() bzw. abort() bei Fehler.
+    Sonst liefert begin() die gespeicherte Antwort zum Abspielen. Ein
+    Duplikat wartet höchstens IDEMPOTENCY_WAIT_SECONDS auf die laufende
+    Erstverarbeitung (im selben Prozess per Event geweckt), dann
+    IdempotencyInProgress.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+        maxsize: int = IDEMPOTENCY_CACHE_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+        # Eigene laufende Erstverarbeitungen: wecken wartende Duplikate
+        self._inflight: Dict[str, Event] = {}
+        self.replays = 0
+        self.executions = 0
+        self.busy = 0
+
+    # --- Speicher-Cache ---
+
+    def _cache_get(self, key: str, request_fingerprint: Optional[str]) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires, stored_fingerprint, stored = entry
+            if expires < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+        _check_fingerprint(key, stored_fingerprint, request_fingerprint)
+        return stored
+
+    def _cache_put(
+        self,
+        key: str,
+        stored: StoredResponse,
+        expires_at: datetime,
+        request_fingerprint: Optional[str],
+    ) -> None:
+        remaining = (expires_at - datetime.utcnow()).total_seconds()
+        with self._lock:
+            self._cache[key] = (time.monotonic() + remaining, request_fingerprint, stored)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    # --- Ablauf ---
+
+    def begin(self, key: str, request_fingerprint: Optional[str] = None) -> Optional[StoredResponse]:
+        stored = self._cache_get(key, request_fingerprint)
+        if stored is not None:
+            self.replays += 1
+            return stored
+
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        step = _WAIT_STEP_SECONDS
+        claim = True
+        while True:
+            result = self._begin_once(key, request_fingerprint, claim)
+            if result is not _IN_PROGRESS:
+                return result
+            claim = False
+            step = self._next_step(key, deadline, step)
+            self._wait(key, step)
+
+    async def begin_async(self, key: str, request_fingerprint: Optional[str] = None) -> Optional[StoredResponse]:
+        """
+        Wie begin(); gewartet wird außerhalb des DB-Threads (sonst blockiert
+        ein Duplikat die Erstverarbeitung, auf die es wartet).
+        """
+        stored = self._cache_get(key, request_fingerprint)
+        if stored is not None:
+            self.replays += 1
+            return stored
+
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        step = _WAIT_STEP_SECONDS
+        claim = True
+        while True:
+            result = await run_in_db_thread(self._begin_once, key, request_fingerprint, claim)
+            if result is not _IN_PROGRESS:
+                return result
+            claim = False
+            step = self._next_step(key, deadline, step)
+            if key in self._inflight:
+                await anyio.to_thread.run_sync(self._wait, key, step)
+            else:
+                await asyncio.sleep(step)
+
+    def _next_step(self, key: str, deadline: float, step: float) -> float:
+        """Nächste Wartezeit bis zur Frist; danach IdempotencyInProgress (→ 409)."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.busy += 1
+            raise IdempotencyInProgress(f"Request zu {key} wird noch verarbeitet")
+        return min(step * 2, _WAIT_STEP_MAX_SECONDS, remaining)
+
+    def _wait(self, key: str, timeout: float) -> None:
+        event = self._inflight.get(key)
+        if event is not None:
+            event.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+    def _finished(self, key: str) -> None:
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _begin_once(self, key: str, request_fingerprint: Optional[str], claim: bool):
+        """
+        Ein Versuch: None = Schlüssel reserviert, StoredResponse = abspielen,
+        _IN_PROGRESS = Erstverarbeitung läuft noch (anderer Request / Worker).
+        """
+        db = self.session_factory()
+        try:
+            while True:
+                now = datetime.utcnow()
+                if claim:
+                    # Core-INSERT statt ORM-Flush: läuft bei jedem Webhook
+                    try:
+                        db.execute(insert(IdempotencyRecord).values(
+                            key=key,
+                            fingerprint=request_fingerprint,
+                            created_at=now,
+                            expires_at=now + timedelta(seconds=self.ttl_seconds),
+                        ))
+                        db.commit()
+                        self.executions += 1
+                        with self._lock:
+                            self._inflight[key] = Event()
+                        return None
+                    except IntegrityError:
+                        db.rollback()
+
+                record = db.get(IdempotencyRecord, key)
+                if record is None or record.expires_at < now:
+                    if record is not None:
+                        db.delete(record)
+                        db.commit()
+                    claim = True
+                    continue
+                _check_fingerprint(key, record.fingerprint, request_fingerprint)
+                if record.status_code is not None:
+                    stored = StoredResponse(record.status_code, record.media_type, record.body or b"")
+                    self._cache_put(key, stored, record.expires_at, record.fingerprint)
+                    self.replays += 1
+                    return stored
+                return _IN_PROGRESS
+        finally:
+            db.close()
+
+    def complete(self, key: str, response: Response) -> None:
+        stored = StoredResponse(response.status_code, response.media_type, bytes(response.body))
+        db = self.session_factory()
+        try:
+            # Ein UPDATE … RETURNING statt Laden + ORM-Flush
+            record = db.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key)
+                .values(
+                    status_code=stored.status_code,
+                    media_type=stored.media_type,
+                    body=stored.body,
+                )
+                .returning(IdempotencyRecord.expires_at, IdempotencyRecord.fingerprint)
+            ).first()
+            db.commit()
+            if record is None:
+                return
+            self._cache_put(key, stored, record.expires_at, record.fingerprint)
+        finally:
+            db.close()
+            self._finished(key)
+
+    def abort(self, key: str) -> None:
+        """
+        Reservierung freigeben, damit ein Retry neu verarbeitet wird.
+        """
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.status_code.is_(None),
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+            self._finished(key)
+
+    def finish(self, key: str, response: Response) -> None:
+        """complete() – oder abort(), wenn die Antwort nicht gespeichert werden darf."""
+        if _storable(response):
+            self.complete(key, response)
+        else:
+            self.abort(key)
+
+    def run(
+        self,
+        key: str,
+        produce: Callable[[], Response],
+        request_fingerprint: Optional[str] = None,
+    ) -> Response:
+        """
+        Gespeicherte Antwort abspielen oder produce() einmalig ausführen.
+        5xx- und transient() markierte Antworten werden nicht gespeichert.
+        """
+        stored = self.begin(key, request_fingerprint)
+        if stored is not None:
+            return stored.to_response()
+        try:
+            response = produce()
+        except BaseException:
+            self.abort(key)
+            raise
+        self.finish(key, response)
+        return response
+
+    async def run_async(
+        self,
+        key: str,
+        produce: Callable[[], Awaitable[Response]],
+        request_fingerprint: Optional[str] = None,
+    ) -> Response:
+        """
+        Wie run(), für async-Handler (DB-Zugriffe über run_in_db_thread).
+        """
+        stored = await self.begin_async(key, request_fingerprint)
+        if stored is not None:
+            return stored.to_response()
+        try:
+            response = await produce()
+        except BaseException:
+            await run_in_db_thread(self.abort, key)
+            raise
+        await run_in_db_thread(self.finish, key, response)
+        return response
+
+    def purge_expired(self, db: Session) -> int:
+        deleted = (
+            db.query(IdempotencyRecord)
+            .filter(IdempotencyRecord.expires_at < datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "replays": self.replays,
+            "executions": self.executions,
+            "in_flight": len(self._inflight),
+            "busy": self.busy,
+        }
+
+
+idempotency_store = IdempotencyStore(SessionLocal)
+
+
+# -------------------------------------------------
+# Schlüssel
+# -------------------------------------------------
+
+def twilio_webhook_key(form, turn: str = "0") -> Optional[str]:
+    """
+    CallSid + Turn (Zähler aus der Gather-URL) + erkannte Sprache
+    (leer = Begrüßung). Twilio-Retries schicken identische Parameter.
+    """
+    call_sid = form.get("CallSid")
+    if not call_sid:
+        return None
+    speech = fingerprint(form.get("SpeechResult", ""))
+    return f"twilio:webhook:{call_sid}:{turn}:{speech}"
+
+
+def twilio_status_key(form) -> Optional[str]:
+    call_sid = form.get("CallSid")
+    if not call_sid:
+        return None
+    sequence = form.get("SequenceNumber") or form.get("CallStatus", "")
+    return f"twilio:status:{call_sid}:{sequence}"
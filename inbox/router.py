@@ -1,19 +1,28 @@
 # app/inbox/router.py
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import get_db
 from inbox.service import build_inbox
 from inbox.models import InboxItem
-from schemas import PracticeId
+from schemas import PracticeKey
+from tickets.service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+)
 
 router = APIRouter(prefix="/api/inbox", tags=["Inbox"])
 
 
 @router.get("", response_model=List[InboxItem])
 def get_inbox(
-    practice_id: PracticeId = Query(..., description="Mandanten-ID"),
+    response: Response,
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor der vorherigen Seite"),
     db: Session = Depends(get_db),
 ):
     """
@@ -21,5 +30,12 @@ def get_inbox(
     - DB-basiert
     - mandantenfähig
     - frontend-sicher (immer Liste)
+    - seitenweise: Folgeseite über den Cursor aus dem Header X-Next-Cursor
     """
-    return build_inbox(db=db, practice_id=practice_id.value)
+    try:
+        items, next_cursor = build_inbox(db=db, practice_id=practice_id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
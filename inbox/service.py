@@ -1,34 +1,48 @@
-from typing import List
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from inbox.models import InboxItem
-from tickets.service import list_tickets
-from schemas import TicketModel
+from tickets.service import DEFAULT_PAGE_SIZE, list_ticket_rows_page
+from schemas import TicketStatus
 
-def build_inbox(db: Session, practice_id: str) -> List[InboxItem]:
+# Ticket-Status → Inbox-Status (offen = Praxis muss noch handeln)
+_INBOX_STATUS = {
+    TicketStatus.OPEN: "open",
+    TicketStatus.CALLBACK: "open",
+    TicketStatus.BOOKED: "done",
+    TicketStatus.CLOSED: "done",
+}
+
+
+def build_inbox(
+    db: Session,
+    practice_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[InboxItem], Optional[str]]:
     """
     Echtbetrieb:
-    - lädt Tickets aus der DB über den Ticket-Service
+    - lädt Tickets aus der DB über den Ticket-Service (seitenweise, neueste oben,
+      nur die benötigten Spalten)
     - strikt nach practice_id (Multi-Tenancy)
-    - gibt IMMER eine Liste zurück
+    - gibt IMMER eine Liste zurück, dazu den Cursor der nächsten Seite
     """
     inbox: List[InboxItem] = []
 
-    try:
-        # Hier nutzen wir den bereits existierenden Service
-        tickets: List[TicketModel] = list_tickets(db, practice_id)
+    # Ungültiger Cursor (InvalidCursorError) geht an den Router → 400
+    tickets, next_cursor = list_ticket_rows_page(db, practice_id, limit=limit, cursor=cursor)
 
+    try:
         for t in tickets:
-            # Wir mappen das TicketModel auf das InboxItem für das Frontend
+            # Wir mappen die Ticket-Zeile auf das InboxItem für das Frontend
             inbox.append(
                 InboxItem(
                     id=str(t.id),
-                    kind="booking",
+                    kind="callback" if t.status == TicketStatus.CALLBACK else "booking",
                     priority="normal",
-                    status=t.status,
-                    # Hier greifen wir korrekt auf das Pydantic-Untermodell zu:
-                    label=f"Buchung: {t.booking_request.patient_name}" if t.booking_request else "Neue Buchung",
+                    status=_INBOX_STATUS.get(t.status, "open"),
+                    label=f"Buchung: {t.patient_name}" if t.patient_name else "Neue Buchung",
                     time=t.created_at.strftime("%H:%M") if t.created_at else "--:--",
                     created_at=t.created_at or datetime.utcnow(),
                 )
@@ -36,8 +50,7 @@ def build_inbox(db: Session, practice_id: str) -> List[InboxItem]:
 
     except Exception as e:
         print(f"DEBUG inbox error: {e}")
-        return []
+        return [], None
 
-    # Sortierung: Neueste oben
-    inbox.sort(key=lambda x: x.created_at, reverse=True)
-    return inbox
\ No newline at end of file
+    # Sortierung (neueste oben) kommt bereits aus der DB
+    return inbox, next_cursor
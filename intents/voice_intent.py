@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional
 
 
 class VoiceIntent(str, Enum):
@@ -49,3 +50,41 @@ def detect_intent(text: str) -> VoiceIntent:
         return VoiceIntent.CALLBACK
 
     return VoiceIntent.UNKNOWN
+
+
+def detect_confirmation(text: str) -> Optional[bool]:
+    """
+    Antwort auf ein Terminangebot: True = ja, False = nein, None = unklar.
+    """
+    t = text.lower()
+
+    no_keywords = [
+        "nein",
+        "nee",
+        "passt nicht",
+        "geht nicht",
+        "anderen termin",
+        "später",
+        "früher",
+    ]
+
+    yes_keywords = [
+        "ja",
+        "gerne",
+        "passt",
+        "okay",
+        "ok",
+        "einverstanden",
+        "genau",
+        "bitte buchen",
+    ]
+
+    words = set(t.replace(",", " ").replace(".", " ").replace("!", " ").split())
+
+    if any((k in t) if " " in k else (k in words) for k in no_keywords):
+        return False
+
+    if any((k in t) if " " in k else (k in words) for k in yes_keywords):
+        return True
+
+    return None
@@ -0,0 +1,16 @@
+# Ausstehende Schema-Migrationen ausführen (vor dem App-Start):
+#   python -m migrations
+import logging
+
+from database import engine
+from migrations.runner import run_migrations
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger("twilio-agent")
+
+applied = run_migrations(engine)
+logger.info(f"Schema aktuell ({len(applied)} Migrationen angewendet)")
@@ -0,0 +1,333 @@
+import itertools
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import bindparam, insert, inspect, select, text, tuple_, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
+
+from database import Base
+from database_models import SlotReservation, Ticket, TicketArchive, ticket_columns
+from schemas import TicketStatus
+
+
+logger = logging.getLogger("twilio-agent")
+
+
+# -------------------------------------------------
+# Schema-Migrationen
+# -------------------------------------------------
+# Die Schema-Version steht in schema_migrations; jede Migration läuft
+# genau einmal. Ausgeführt wird vor dem Start (`python -m migrations`)
+# bzw. beim App-Start nur, wenn die Versionsprüfung (eine Abfrage)
+# ausstehende Migrationen findet – nie bei jedem Import.
+# Mehrere Worker/Instanzen: nur der Halter von schema_migration_lock
+# migriert, die anderen warten und finden danach nichts mehr zu tun.
+#
+# Regeln für neue Migrationen: nur ANHÄNGEN, idempotent schreiben
+# (Version 0 legt frische DBs direkt im aktuellen Stand an), große
+# Tabellen über run_in_batches ändern.
+
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+# Pause zwischen Batches – lässt Live-Traffic an die Tabelle
+MIGRATION_BATCH_PAUSE_SECONDS = float(os.getenv("MIGRATION_BATCH_PAUSE_SECONDS", "0"))
+# So lange wartet ein Worker höchstens auf einen anderen, der migriert
+MIGRATION_LOCK_WAIT_SECONDS = float(os.getenv("MIGRATION_LOCK_WAIT_SECONDS", "600"))
+
+# Lease des Locks; wird nach jedem Batch / jeder Migration verlängert.
+# Stirbt der Halter, übernimmt nach Ablauf ein anderer Worker.
+MIGRATION_LOCK_SECONDS = 120
+_LOCK_POLL_SECONDS = 0.5
+
+
+class MigrationLockTimeout(Exception):
+    """Anderer Worker hält den Migrations-Lock zu lange."""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+# -------------------------------------------------
+# Lock (Lease-Zeile, wie die Outbox)
+# -------------------------------------------------
+
+class MigrationLock:
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def _try_acquire(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            with self.engine.begin() as conn:
+                result = conn.execute(
+                    text(
+                        "UPDATE schema_migration_lock SET locked_by = :owner, locked_until = :until "
+                        "WHERE id = 1 AND (locked_until IS NULL OR locked_until < :now OR locked_by = :owner)"
+                    ),
+                    {"owner": self.owner, "until": now + timedelta(seconds=MIGRATION_LOCK_SECONDS), "now": now},
+                )
+                return result.rowcount == 1
+        except OperationalError:
+            return False  # SQLite: DB gerade vom migrierenden Worker gesperrt
+
+    def acquire(self, wait_seconds: float = MIGRATION_LOCK_WAIT_SECONDS) -> None:
+        deadline = time.monotonic() + wait_seconds
+        while not self._try_acquire():
+            if time.monotonic() > deadline:
+                raise MigrationLockTimeout("Migrations-Lock nicht erhalten")
+            time.sleep(_LOCK_POLL_SECONDS)
+
+    def renew(self) -> None:
+        self._try_acquire()
+
+    def release(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("UPDATE schema_migration_lock SET locked_by = NULL, locked_until = NULL WHERE locked_by = :owner"),
+                {"owner": self.owner},
+            )
+
+
+# Lock des laufenden run_migrations (für den Heartbeat in run_in_batches)
+_active_lock: Optional[MigrationLock] = None
+
+
+def run_in_batches(conn: Connection, query, key_column, apply_batch: Callable[[list], None]) -> int:
+    """
+    Arbeitet `query` in Batches nach `key_column` (aufsteigend, eindeutig)
+    ab: je Batch apply_batch(rows), Commit, Lock-Heartbeat und optionale
+    Pause. Hält nie eine lange Transaktion. Gibt die Zeilenanzahl zurück.
+    """
+    last_key = None
+    total = 0
+    while True:
+        batch_query = query if last_key is None else query.where(key_column > last_key)
+        rows = conn.execute(batch_query.order_by(key_column).limit(MIGRATION_BATCH_SIZE)).all()
+        if not rows:
+            return total
+        apply_batch(rows)
+        conn.commit()
+        last_key = rows[-1][0]
+        total += len(rows)
+        if _active_lock is not None:
+            _active_lock.renew()
+        if MIGRATION_BATCH_PAUSE_SECONDS:
+            time.sleep(MIGRATION_BATCH_PAUSE_SECONDS)
+
+
+# -------------------------------------------------
+# Migrationen
+# -------------------------------------------------
+
+def _base_schema(conn: Connection) -> None:
+    """
+    Fehlende Tabellen im aktuellen Modellstand anlegen (frische DB bzw.
+    Tabellen, die vor den Migrationen per create_all entstanden).
+    """
+    Base.metadata.create_all(bind=conn)
+
+
+def _ticket_indexes(conn: Connection) -> None:
+    """
+    Composite-Indizes für die Ticket-Listen (Praxis → Status → Zeit).
+    Entsprechen Ticket.__table_args__ (für frisch angelegte DBs).
+    """
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_practice_created "
+        "ON tickets (practice_id, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_practice_status_created "
+        "ON tickets (practice_id, status, created_at)"
+    ))
+
+
+def _ticket_hot_columns(conn: Connection) -> None:
+    """
+    Spalten patient_* / requested_date / slot_* anlegen und aus `data`
+    nachfüllen – in Batches nach ID (run_in_batches).
+    Bricht die Migration ab, setzt der nächste Lauf einfach neu auf:
+    Spalten werden nur angelegt, wenn sie fehlen, der Backfill schreibt
+    dieselben Werte erneut.
+    """
+    existing = {column["name"] for column in inspect(conn).get_columns("tickets")}
+    for column in ("patient_name", "patient_phone", "requested_date", "slot_start", "slot_end"):
+        if column not in existing:
+            column_type = Ticket.__table__.c[column].type.compile(conn.dialect)
+            conn.execute(text(f"ALTER TABLE tickets ADD COLUMN {column} {column_type}"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_practice_phone_created "
+        "ON tickets (practice_id, patient_phone, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_practice_slot_start "
+        "ON tickets (practice_id, slot_start)"
+    ))
+    conn.commit()
+
+    tickets = Ticket.__table__
+    statement = (
+        update(tickets)
+        .where(tickets.c.id == bindparam("ticket_id"))
+        .values({column: bindparam(column) for column in ticket_columns({})})
+    )
+
+    def fill(rows) -> None:
+        conn.execute(statement, [{"ticket_id": ticket_id, **ticket_columns(data)} for ticket_id, data in rows])
+
+    total = run_in_batches(conn, select(tickets.c.id, tickets.c.data), tickets.c.id, fill)
+    logger.info(f"Ticket-Spalten für {total} Tickets nachgefüllt")
+
+
+def _slot_reservation_backfill(conn: Connection) -> None:
+    """
+    Reservierungen für gebuchte Alt-Tickets (vor slot_reservations) –
+    lief bisher bei jedem Start; einmalig genügt, neue Buchungen
+    reservieren selbst. Bestehende Doppelbuchungen bekommen Plätze
+    oberhalb der Kapazität.
+    """
+    tickets = Ticket.__table__
+    reservations = SlotReservation.__table__
+    missing = (
+        select(tickets.c.id, tickets.c.practice_id, tickets.c.slot_start)
+        .select_from(tickets.outerjoin(reservations, reservations.c.ticket_id == tickets.c.id))
+        .where(
+            tickets.c.status == TicketStatus.BOOKED.value,
+            tickets.c.slot_start.is_not(None),
+            reservations.c.id.is_(None),
+        )
+    )
+
+    def reserve(rows) -> None:
+        taken: Dict[tuple, Set[int]] = defaultdict(set)
+        slots = {(row.practice_id, row.slot_start) for row in rows}
+        for practice_id, slot_start, resource in conn.execute(
+            select(reservations.c.practice_id, reservations.c.slot_start, reservations.c.resource)
+            .where(tuple_(reservations.c.practice_id, reservations.c.slot_start).in_(slots))
+        ):
+            taken[(practice_id, slot_start)].add(resource)
+
+        values = []
+        for row in rows:
+            used = taken[(row.practice_id, row.slot_start)]
+            resource = next(n for n in itertools.count() if n not in used)
+            used.add(resource)
+            values.append({
+                "practice_id": row.practice_id,
+                "slot_start": row.slot_start,
+                "resource": resource,
+                "ticket_id": row.id,
+                "created_at": datetime.utcnow(),
+            })
+        conn.execute(insert(reservations), values)
+
+    created = run_in_batches(conn, missing, tickets.c.id, reserve)
+    if created:
+        logger.info(f"Slot-Reservierungen nachgetragen ({created} Tickets)")
+
+
+def _ticket_archive(conn: Connection) -> None:
+    """
+    Archivtabelle für kalte Tickets (archive.service) samt Indizes.
+    Frische DBs haben sie bereits aus _base_schema.
+    """
+    TicketArchive.__table__.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(0, "base_schema", _base_schema),
+    Migration(1, "ticket_composite_indexes", _ticket_indexes),
+    Migration(2, "ticket_hot_columns", _ticket_hot_columns),
+    Migration(3, "slot_reservation_backfill", _slot_reservation_backfill),
+    Migration(4, "ticket_archive", _ticket_archive),
+]
+
+
+# -------------------------------------------------
+# Ausführen
+# -------------------------------------------------
+
+def _ensure_tables(engine: Engine) -> None:
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, "
+                "name VARCHAR NOT NULL, "
+                "applied_at TIMESTAMP NOT NULL)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migration_lock ("
+                "id INTEGER PRIMARY KEY, "
+                "locked_by VARCHAR, "
+                "locked_until TIMESTAMP)"
+            ))
+    except DBAPIError:
+        pass  # parallel von einem anderen Worker angelegt
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_migration_lock (id) VALUES (1)"))
+    except IntegrityError:
+        pass
+
+
+def applied_versions(conn: Connection) -> set:
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    """
+    Ausstehende Migrationen (billig: eine Tabellenprüfung + eine Abfrage).
+    """
+    with engine.connect() as conn:
+        done = applied_versions(conn) if inspect(conn).has_table("schema_migrations") else set()
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m.version) if m.version not in done]
+
+
+def run_migrations(engine: Engine, wait_seconds: float = MIGRATION_LOCK_WAIT_SECONDS) -> List[int]:
+    """
+    Führt alle ausstehenden Migrationen unter dem Migrations-Lock aus.
+    Der Versionseintrag wird mit dem letzten Schritt der Migration
+    committet. Gibt die neu angewendeten Versionen zurück.
+    """
+    global _active_lock
+
+    if not pending_migrations(engine):
+        return []
+
+    _ensure_tables(engine)
+    lock = MigrationLock(engine)
+    lock.acquire(wait_seconds)
+    _active_lock = lock
+    try:
+        applied = []
+        # erneut prüfen: ein anderer Worker kann inzwischen migriert haben
+        for migration in pending_migrations(engine):
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                migration.apply(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                    {"v": migration.version, "n": migration.name, "t": datetime.utcnow()},
+                )
+                conn.commit()
+            lock.renew()
+            applied.append(migration.version)
+            logger.info(
+                f"Migration {migration.version} ({migration.name}) angewendet "
+                f"({time.perf_counter() - started:.2f} s)"
+            )
+        return applied
+    finally:
+        _active_lock = None
+        lock.release()
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from database_models import OutboxEvent, Ticket
+from schemas import TicketModel
+
+
+# -------------------------------------------------
+# Konfiguration
+# -------------------------------------------------
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "2"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "600"))
+
+# So lange gehört ein abgeholter Eintrag einem Worker (danach erneut abholbar)
+OUTBOX_LEASE_SECONDS = 60
+# Maximale Dauer eines Handler-Aufrufs (Kalender: CALENDAR_TIMEOUT_SECONDS);
+# reicht die Rest-Lease dafür nicht mehr, wird das Event nicht mehr gesendet
+OUTBOX_HANDLER_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_HANDLER_TIMEOUT_SECONDS", "10"))
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+CALENDAR_CREATE_EVENT = "calendar.create_event"
+
+
+# -------------------------------------------------
+# Schreiben (innerhalb der fachlichen Transaktion)
+# -------------------------------------------------
+
+def enqueue(db: Session, event_type: str, payload: dict, idempotency_key: str) -> OutboxEvent:
+    """
+    Legt einen Outbox-Eintrag an – OHNE Commit. Der Aufrufer committet
+    zusammen mit seiner eigenen Änderung.
+    """
+    event = OutboxEvent(
+        event_type=event_type,
+        idempotency_key=idempotency_key,
+        payload=payload,
+        status=STATUS_PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(event)
+    return event
+
+
+def calendar_event_id(idempotency_key: str) -> str:
+    """
+    Stabile Kalender-Event-ID (Hex ⊂ erlaubte Zeichen a-v, 0-9).
+    """
+    return hashlib.sha1(idempotency_key.encode("utf-8")).hexdigest()
+
+
+def enqueue_calendar_event(
+    db: Session,
+    db_ticket: Ticket,
+    ticket_model: TicketModel,
+    booking: Optional[str] = None,
+) -> OutboxEvent:
+    """
+    Kalender-Termin zu einem gebuchten Ticket vormerken.
+    db_ticket muss bereits geflusht sein (ID vorhanden).
+    booking: Kennung einer erneuten Buchung desselben Tickets (z. B.
+    CLOSED → BOOKED) – eigener Schlüssel und damit eigener Kalender-Termin.
+    """
+    idempotency_key = f"calendar:ticket:{db_ticket.id}"
+    if booking:
+        idempotency_key += f":{booking}"
+    slot = ticket_model.slot
+    patient_name = (
+        ticket_model.booking_request.patient_name
+        if ticket_model.booking_request else "Unbekannt"
+    )
+    return enqueue(
+        db,
+        CALENDAR_CREATE_EVENT,
+        {
+            "ticket_id": db_ticket.id,
+            "title": f"Termin – {patient_name}",
+            "start": slot.start_time.isoformat(),
+            "end": slot.end_time.isoformat(),
+            "description": "Gebucht über IntelAiGent",
+        },
+        idempotency_key=idempotency_key,
+    )
+
+
+# -------------------------------------------------
+# Abholen & Quittieren (Worker)
+# -------------------------------------------------
+
+def claim_batch(db: Session, worker_id: str, limit: int) -> List[OutboxEvent]:
+    """
+    Reserviert bis zu `limit` fällige Einträge für diesen Worker (Lease).
+    Funktioniert mit mehreren Prozessen: nur wer das UPDATE gewinnt,
+    bekommt den Eintrag.
+    """
+    now = datetime.utcnow()
+    claimable = or_(OutboxEvent.locked_until.is_(None), OutboxEvent.locked_until < now)
+
+    ids = [
+        event_id for (event_id,) in
+        db.query(OutboxEvent.id)
+        .filter(
+            OutboxEvent.status == STATUS_PENDING,
+            OutboxEvent.next_attempt_at <= now,
+            claimable,
+        )
+        .order_by(OutboxEvent.next_attempt_at)
+        .limit(limit)
+        .all()
+    ]
+    if not ids:
+        return []
+
+    db.query(OutboxEvent).filter(OutboxEvent.id.in_(ids), claimable).update(
+        {
+            OutboxEvent.locked_by: worker_id,
+            OutboxEvent.locked_until: now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+    return (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.id.in_(ids), OutboxEvent.locked_by == worker_id)
+        .order_by(OutboxEvent.id)
+        .all()
+    )
+
+
+def lease_covers_send(event: OutboxEvent, worker_id: str, now: Optional[datetime] = None) -> bool:
+    """
+    True, wenn das Event noch diesem Worker gehört und die Lease mindestens
+    einen Handler-Aufruf lang hält – sonst könnte ein anderer Worker es
+    parallel erneut senden.
+    """
+    now = now or datetime.utcnow()
+    return (
+        event.locked_by == worker_id
+        and event.locked_until is not None
+        and event.locked_until - now >= timedelta(seconds=OUTBOX_HANDLER_TIMEOUT_SECONDS)
+    )
+
+
+def release_leases(db: Session, events: List[OutboxEvent], worker_id: str) -> None:
+    """
+    Gibt nicht bearbeitete Einträge sofort wieder frei (ohne Commit) –
+    nur solange sie noch diesem Worker gehören.
+    """
+    if not events:
+        return
+    db.query(OutboxEvent).filter(
+        OutboxEvent.id.in_([event.id for event in events]),
+        OutboxEvent.locked_by == worker_id,
+    ).update(
+        {OutboxEvent.locked_by: None, OutboxEvent.locked_until: None},
+        synchronize_session=False,
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    """
+    Exponentielles Backoff mit Jitter (verhindert Wellen nach Ausfällen).
+    """
+    delay = min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def mark_done(event: OutboxEvent) -> None:
+    event.status = STATUS_DONE
+    event.processed_at = datetime.utcnow()
+    event.locked_by = None
+    event.locked_until = None
+    event.last_error = None
+
+
+def mark_failed(event: OutboxEvent, error: str) -> None:
+    """
+    Fehlversuch verbuchen: später erneut (Backoff) oder endgültig 'failed'.
+    """
+    event.attempts += 1
+    event.last_error = error[:2000]
+    event.locked_by = None
+    event.locked_until = None
+    if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+        event.status = STATUS_FAILED
+    else:
+        event.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(event.attempts))
+
+
+# -------------------------------------------------
+# Monitoring
+# -------------------------------------------------
+
+def outbox_stats(db: Session) -> Dict[str, Optional[float]]:
+    """
+    pending / failed und Lag = Alter des ältesten offenen Eintrags (Sekunden).
+    """
+    counts = dict(
+        db.query(OutboxEvent.status, func.count(OutboxEvent.id))
+        .filter(OutboxEvent.status.in_([STATUS_PENDING, STATUS_FAILED]))
+        .group_by(OutboxEvent.status)
+        .all()
+    )
+    oldest = (
+        db.query(func.min(OutboxEvent.created_at))
+        .filter(OutboxEvent.status == STATUS_PENDING)
+        .scalar()
+    )
+    lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+    return {
+        "pending": counts.get(STATUS_PENDING, 0),
+        "failed": counts.get(STATUS_FAILED, 0),
+        "lag_seconds": round(lag, 3),
+    }
@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from outbox.service import (
+    CALENDAR_CREATE_EVENT,
+    calendar_event_id,
+    claim_batch,
+    lease_covers_send,
+    mark_done,
+    mark_failed,
+    release_leases,
+)
+from physio_services.calendar_service import CalendarService
+
+
+logger = logging.getLogger("twilio-agent")
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+
+# handler(payload, idempotency_key) – wirft bei Fehler
+Handler = Callable[[dict, str], None]
+
+
+# -------------------------------------------------
+# Handler
+# -------------------------------------------------
+
+def calendar_handler(calendar: CalendarService) -> Handler:
+    def handle(payload: dict, idempotency_key: str) -> None:
+        calendar.create_event(
+            title=payload["title"],
+            start=datetime.fromisoformat(payload["start"]),
+            end=datetime.fromisoformat(payload["end"]),
+            description=payload.get("description"),
+            event_id=calendar_event_id(idempotency_key),
+        )
+    return handle
+
+
+# -------------------------------------------------
+# Worker-Pool
+# -------------------------------------------------
+
+class OutboxWorker:
+    """
+    Arbeitet die Outbox im Hintergrund ab: Threads holen Einträge in
+    Batches (Lease), rufen den Handler je Event-Typ auf und quittieren
+    jedes Event sofort mit einem eigenen Commit. Fehlschläge → Backoff,
+    nach OUTBOX_MAX_ATTEMPTS endgültig 'failed'.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        handlers: Dict[str, Handler],
+        workers: int = OUTBOX_WORKERS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.handlers = handlers
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._worker_prefix = uuid.uuid4().hex[:8]
+        self.processed = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for n in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(f"{self._worker_prefix}-{n}",),
+                name=f"outbox-worker-{n}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                handled = self.run_once(worker_id)
+            except Exception as e:
+                logger.error(f"Outbox-Worker {worker_id}: {e}")
+                handled = 0
+            if not handled:
+                self._stop.wait(self.poll_seconds)
+
+    def run_once(self, worker_id: Optional[str] = None) -> int:
+        """
+        Holt einen Batch und arbeitet ihn ab. Gibt die Anzahl der
+        bearbeiteten Einträge zurück.
+        """
+        worker_id = worker_id or f"{self._worker_prefix}-once"
+        db = self.session_factory()
+        try:
+            events = claim_batch(db, worker_id, self.batch_size)
+            for position, event in enumerate(events):
+                # Langsame Handler dürfen die Lease nicht überholen:
+                # Rest des Batches freigeben statt doppelt zu senden
+                if not lease_covers_send(event, worker_id):
+                    release_leases(db, events[position:], worker_id)
+                    db.commit()
+                    return position
+                handler = self.handlers.get(event.event_type)
+                try:
+                    if handler is None:
+                        raise LookupError(f"Kein Handler für {event.event_type}")
+                    handler(event.payload, event.idempotency_key)
+                    mark_done(event)
+                    self.processed += 1
+                except Exception as e:
+                    mark_failed(event, str(e))
+                    self.errors += 1
+                    logger.warning(
+                        f"Outbox-Event {event.id} ({event.event_type}) fehlgeschlagen "
+                        f"(Versuch {event.attempts}): {e}"
+                    )
+                # Quittung je Event: ein Absturz verliert höchstens das laufende
+                db.commit()
+            return len(events)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._threads),
+            "processed": self.processed,
+            "errors": self.errors,
+        }
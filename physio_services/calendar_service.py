@@ -1,6 +1,9 @@
+import os
 from datetime import datetime
 from typing import Optional
 
+import requests
+
 
 # Google Libraries (werden später installiert)
 # from google.oauth2 import service_account
@@ -14,6 +17,15 @@ from typing import Optional
 GOOGLE_CALENDAR_ID = "primary"
 GOOGLE_SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
+# Optional: HTTP-Endpunkt im Format der Google Calendar REST-API
+# (z. B. lokaler Fake-Kalender für Tests). Ohne URL → Mock.
+CALENDAR_API_URL = os.getenv("CALENDAR_API_URL")
+CALENDAR_TIMEOUT_SECONDS = 10
+
+
+class CalendarError(Exception):
+    """Kalender-API nicht erreichbar oder Anfrage abgelehnt."""
+
 
 # -------------------------------------------------
 # Calendar Service
@@ -52,10 +64,13 @@ class CalendarService:
         start: datetime,
         end: datetime,
         description: Optional[str] = None,
+        event_id: Optional[str] = None,
     ) -> dict:
         """
         Erstellt ein Kalender-Event.
         Gibt Event-Daten zurück (oder später Event-ID).
+        event_id (Zeichen a-v, 0-9) macht das Anlegen idempotent: existiert
+        das Event bereits (HTTP 409), gilt es als angelegt.
         """
 
         service = self._get_service()
@@ -68,6 +83,11 @@ class CalendarService:
             "description": description,
             "calendar": GOOGLE_CALENDAR_ID,
         }
+        if event_id:
+            event["id"] = event_id
+
+        if CALENDAR_API_URL:
+            return self._post_event(event)
 
         # Später:
         # created_event = service.events().insert(
@@ -77,3 +97,16 @@ class CalendarService:
         # return created_event
 
         return event
+
+    def _post_event(self, event: dict) -> dict:
+        url = f"{CALENDAR_API_URL.rstrip('/')}/calendars/{GOOGLE_CALENDAR_ID}/events"
+        try:
+            response = requests.post(url, json=event, timeout=CALENDAR_TIMEOUT_SECONDS)
+        except requests.RequestException as e:
+            raise CalendarError(f"Kalender nicht erreichbar: {e}") from e
+
+        if response.status_code == 409:
+            return event
+        if response.status_code >= 400:
+            raise CalendarError(f"Kalender antwortet {response.status_code}: {response.text[:200]}")
+        return response.json()
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from database import get_db
+from schemas import PracticeSchedule
+from slots.registry import get_schedule, save_schedule
+
+router = APIRouter(prefix="/api/practices", tags=["Practices"])
+
+
+@router.get("/{practice_id}/schedule", response_model=PracticeSchedule)
+def api_get_schedule(practice_id: str, db: Session = Depends(get_db)):
+    schedule = get_schedule(db, practice_id)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Kein Zeitplan für diese Praxis")
+    return schedule
+
+
+@router.put("/{practice_id}/schedule")
+def api_put_schedule(
+    practice_id: str,
+    schedule: PracticeSchedule,
+    db: Session = Depends(get_db),
+):
+    """
+    Legt den Zeitplan einer Praxis an oder ersetzt ihn.
+    Wirkt ohne Deploy/Neustart (andere Worker laden periodisch nach).
+    """
+    version = save_schedule(db, practice_id, schedule)
+    return {"practice_id": practice_id, "version": version}
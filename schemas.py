@@ -1,17 +1,39 @@
 from enum import Enum
-from datetime import datetime, date
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from datetime import datetime, date, time
+from typing import Optional, List, Dict, Tuple, Annotated, Union
+from pydantic import AfterValidator, BaseModel, Field, ValidationInfo
 from uuid import uuid4
 
 # -------------------------------------------------
 # Praxis-IDs
 # -------------------------------------------------
+# Mitgelieferte Praxen (Standard-Zeitpläne, Voice-Default). Gültig ist
+# jede Praxis mit Zeitplan in der Schedule-Registry – siehe PracticeKey.
 class PracticeId(str, Enum):
     PHYSIO_KREBS_NOTTULN = "physio_krebs_nottuln"
     PHYSIO_DEFAULT_20 = "physio_default_20min"
     PHYSIO_DEFAULT_30 = "physio_default_30min"
 
+# Kontext für gespeicherte Daten (model_validate_json(..., context=STORED)):
+# Tickets gelöschter Praxen bleiben lesbar.
+STORED = {"stored": True}
+
+
+def _known_practice(practice_id: str, info: ValidationInfo) -> str:
+    if info.context and info.context.get("stored"):
+        return practice_id
+    # Import erst hier: slots.registry importiert schemas
+    from slots.registry import schedule_registry
+
+    if schedule_registry.get(practice_id) is None:
+        raise ValueError(f"Unbekannte Praxis '{practice_id}' (kein Zeitplan hinterlegt)")
+    return practice_id
+
+
+# Praxis-ID in Requests und Query-Parametern: beliebiger String, der in
+# der Schedule-Registry steht (neue Praxen per PUT /api/practices/{id}/schedule)
+PracticeKey = Annotated[str, AfterValidator(_known_practice)]
+
 # -------------------------------------------------
 # Slot-Typen
 # -------------------------------------------------
@@ -26,12 +48,34 @@ class SlotModel(BaseModel):
     duration_minutes: int
     slot_type: SlotType
     is_bookable: bool = True
+    # Freie Plätze im Slot (Therapeuten/Räume); 0 wenn nicht buchbar
+    remaining_capacity: int = 1
+
+# -------------------------------------------------
+# Praxis-Zeitplan (Schedule-Registry)
+# -------------------------------------------------
+class DaySchedule(BaseModel):
+    open: time
+    close: time
+    admin: List[Tuple[time, time]] = []
+    house_visit: List[Tuple[time, time]] = []
+
+class PracticeSchedule(BaseModel):
+    slot_duration_minutes: int = Field(gt=0)
+    # Wochentag (0 = Montag) → Öffnungszeiten & Blockzeiten
+    days: Dict[Annotated[int, Field(ge=0, le=6)], DaySchedule]
+    # Parallel buchbare Ressourcen (Therapeuten/Räume); leer = eine
+    resources: List[str] = []
+
+    @property
+    def capacity(self) -> int:
+        return max(1, len(self.resources))
 
 # -------------------------------------------------
 # Booking Request
 # -------------------------------------------------
 class BookingRequest(BaseModel):
-    practice_id: PracticeId
+    practice_id: PracticeKey
     patient_name: str
     patient_phone: Optional[str] = None
     patient_email: Optional[str] = None
@@ -52,25 +96,62 @@ class TicketModel(BaseModel):
     # Wir machen ticket_id optional oder geben einen Standard, 
     # falls die DB die ID erst später vergibt
     ticket_id: Optional[str] = None 
-    practice_id: PracticeId
+    practice_id: PracticeKey
     booking_request: BookingRequest
     slot: Optional[SlotModel] = None
+    # Weitere freie Slots nahe der Wunschzeit (nach Abstand sortiert)
+    alternatives: List[SlotModel] = []
     status: TicketStatus
     message: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class TicketBulkStatusUpdate(BaseModel):
+    """Body für PATCH /tickets/status: ticket_ids und/oder Filter (status, Zeitraum)."""
+    new_status: TicketStatus
+    ticket_ids: Optional[List[int]] = None
+    status: Optional[TicketStatus] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None  # exklusiv
+
 # -------------------------------------------------
 # Callback & Voice
 # -------------------------------------------------
 class CallbackTicket(BaseModel):
     ticket_id: str = Field(default_factory=lambda: str(uuid4()))
-    practice_id: PracticeId = PracticeId.PHYSIO_DEFAULT_20
+    practice_id: PracticeKey = PracticeId.PHYSIO_DEFAULT_20.value
     patient_name: str = "Unbekannt (Voice)"
     patient_phone: Optional[str] = None
     reason: str
     status: TicketStatus = TicketStatus.CALLBACK
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Gesetzt, wenn der Patient auf die Warteliste gesetzt wurde
+    waitlist_entry_id: Optional[int] = None
+
+class BatchBookingItem(BaseModel):
+    """Ergebnis einer Anfrage aus POST /book/batch (index = Position im Request)."""
+    index: int
+    booked: bool
+    result: Union[TicketModel, CallbackTicket]
 
 class VoicePayload(BaseModel):
     from_number: str
-    text: str
\ No newline at end of file
+    text: str
+
+# -------------------------------------------------
+# Warteliste
+# -------------------------------------------------
+class WaitlistRequest(BaseModel):
+    practice_id: PracticeKey
+    patient_name: str
+    patient_phone: Optional[str] = None
+    patient_email: Optional[str] = None
+    earliest_date: date
+    latest_date: Optional[date] = None  # None = earliest_date + WAITLIST_DAYS
+    earliest_time: Optional[time] = None
+    latest_time: Optional[time] = None
+
+class WaitlistEntryModel(WaitlistRequest):
+    entry_id: int
+    status: str
+    ticket_id: Optional[str] = None
+    created_at: datetime
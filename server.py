@@ -1,13 +1,16 @@
 # -------------------------------------------------
 # Standard Imports
 # -------------------------------------------------
-from fastapi import FastAPI, HTTPException, Depends, Query, Request, Body
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Body, Header
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from typing import Optional
 from sqlalchemy.orm import Session
 from typing import List, Union
-from datetime import date
+from datetime import date, datetime, time, timedelta
 from statistics import mean
 import logging
+import os
 
 # -------------------------------------------------
 # Logging-Konfiguration für Render
@@ -24,6 +27,8 @@ from voice.router import router as voice_router
 from dashboard.router import router as dashboard_router
 from tickets.router import router as tickets_router
 from inbox.router import router as inbox_router
+from practices.router import router as practices_router
+from waitlist.router import router as waitlist_router
 
 # Twilio Handler
 from voice.twilio_handler import handle_twilio_webhook, handle_twilio_status
@@ -32,27 +37,51 @@ from voice.test_handler import test_voice_webhook
 # -------------------------------------------------
 # Datenbank
 # -------------------------------------------------
-from database import engine, Base, get_db
+# Schema über migrations.runner (Startup bzw. `python -m migrations`),
+# nicht mehr per create_all bei jedem Import
+from database import async_pool_stats, close_async_engine, engine, get_db, pool_stats, SessionLocal
 import database_models  # wichtig für SQLAlchemy Metadata
-Base.metadata.create_all(bind=engine)
+from migrations.runner import pending_migrations, run_migrations
 
 # -------------------------------------------------
 # Schemas
 # -------------------------------------------------
 from schemas import (
+    BatchBookingItem,
     BookingRequest,
     SlotModel,
     TicketModel,
     CallbackTicket,
-    PracticeId,
+    PracticeKey,
     TicketStatus,
 )
 
 # Services
-from slots.dispatcher import get_slots_for_practice
-from booking.booking_flow import process_booking_request
+from slots.dispatcher import get_day_slots_json, slot_cache_stats
+from slots.range_query import build_range_slots_json, MAX_RANGE_DAYS
+from slots.etag import slots_etag, etag_matches
+from slots.holds import slot_holds
+from waitlist.service import add_booking_request_to_waitlist, load_waitlist, waitlist_index
+from booking.booking_flow import HOUSE_VISIT_REASON, process_booking_request
 from physio_services.calendar_service import CalendarService
-from tickets.service import list_tickets
+from outbox.service import CALENDAR_CREATE_EVENT, outbox_stats
+from outbox.worker import OutboxWorker, calendar_handler
+from archive.worker import ArchiveWorker
+from idempotency.store import (
+    IdempotencyConflict,
+    IdempotencyInProgress,
+    fingerprint,
+    idempotency_store,
+    twilio_status_key,
+    twilio_webhook_key,
+)
+from tickets.service import (
+    NEXT_CURSOR_HEADER,
+    list_ticket_rows,
+    rebuild_occupancy_index,
+)
+from slots.occupancy import occupancy_index
+from slots.registry import schedule_registry, seed_builtin_schedules
 
 # -------------------------------------------------
 # App Initialisierung
@@ -63,25 +92,176 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Browser-Frontends anderer Origins (kommagetrennt, leer = keine).
+# X-Next-Cursor muss freigegeben sein, sonst sieht fetch() den Cursor der
+# Folgeseite nicht – die Listen bleiben Arrays, der Cursor steht im Header.
+CORS_ALLOW_ORIGINS = [o.strip() for o in os.getenv("CORS_ALLOW_ORIGINS", "").split(",") if o.strip()]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ALLOW_ORIGINS,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+)
+
 app.include_router(tickets_router)
 app.include_router(dashboard_router)
 app.include_router(voice_router)
 app.include_router(inbox_router)
+app.include_router(practices_router)
+app.include_router(waitlist_router)
 
 calendar_service = CalendarService()
 
+# Kalender-Sync aus der Outbox (abschaltbar, z. B. für Skripte)
+outbox_worker = OutboxWorker(
+    SessionLocal,
+    handlers={CALENDAR_CREATE_EVENT: calendar_handler(calendar_service)},
+)
+OUTBOX_WORKER_ENABLED = os.getenv("OUTBOX_WORKER_ENABLED", "1") == "1"
+
+# Kalte Tickets (CLOSED / vergangene Termine) ins Archiv verschieben
+archive_worker = ArchiveWorker(SessionLocal)
+ARCHIVE_WORKER_ENABLED = os.getenv("ARCHIVE_WORKER_ENABLED", "1") == "1"
+
+# Standard: Schema nur prüfen – Migrationen laufen einmal vor dem Start
+# (`python -m migrations`, siehe render.yaml). 1 = beim App-Start migrieren
+# (z. B. lokal oder in Tests)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "0") == "1"
+
+
+@app.on_event("startup")
+def migrate_schema():
+    """Schema-Version prüfen; ausstehende Migrationen unter Lock ausführen."""
+    pending = pending_migrations(engine)
+    if not pending:
+        return
+    if not MIGRATE_ON_STARTUP:
+        raise RuntimeError(
+            f"Schema veraltet ({len(pending)} Migrationen ausstehend) – `python -m migrations` ausführen"
+        )
+    run_migrations(engine)
+
+
+@app.on_event("startup")
+def load_schedules():
+    """Zeitpläne aus der DB laden (fehlende Standard-Praxen vorher anlegen)."""
+    db = SessionLocal()
+    try:
+        seed_builtin_schedules(db)
+        count = schedule_registry.load(db)
+    finally:
+        db.close()
+    schedule_registry.bind(SessionLocal)
+    logger.info(f"Schedule-Registry geladen ({count} Praxen)")
+
+
+@app.on_event("startup")
+def load_occupancy_index():
+    """Belegungs-Index einmal aus den gebuchten Tickets aufbauen."""
+    db = SessionLocal()
+    try:
+        count = rebuild_occupancy_index(db)
+    finally:
+        db.close()
+    logger.info(f"Belegungs-Index aufgebaut ({count} gebuchte Slots)")
+
+
+@app.on_event("startup")
+def load_waitlist_index():
+    """Wartende Einträge in die Tages-Warteschlangen laden."""
+    db = SessionLocal()
+    try:
+        count = load_waitlist(db)
+    finally:
+        db.close()
+    logger.info(f"Warteliste geladen ({count} wartende Einträge)")
+
+
+@app.on_event("startup")
+def start_outbox_worker():
+    if OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_outbox_worker():
+    outbox_worker.stop()
+
+
+@app.on_event("startup")
+def start_archive_worker():
+    if ARCHIVE_WORKER_ENABLED:
+        archive_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_archive_worker():
+    archive_worker.stop()
+
+
+@app.on_event("startup")
+def start_slot_hold_expiry():
+    slot_holds.start()
+
+
+@app.on_event("shutdown")
+def stop_slot_hold_expiry():
+    slot_holds.stop()
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await close_async_engine()
+
+# -------------------------------------------------
+# Idempotenz (Twilio-Retries, Idempotency-Key)
+# -------------------------------------------------
+@app.on_event("startup")
+def purge_idempotency_records():
+    db = SessionLocal()
+    try:
+        idempotency_store.purge_expired(db)
+    finally:
+        db.close()
+
+
+def _idempotency_error(e: Exception) -> HTTPException:
+    if isinstance(e, IdempotencyConflict):
+        return HTTPException(status_code=422, detail=str(e))
+    # Erstverarbeitung läuft noch → später erneut versuchen
+    return HTTPException(status_code=409, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _idempotent_async(key: str, produce) -> Response:
+    try:
+        return await idempotency_store.run_async(key, produce)
+    except (IdempotencyConflict, IdempotencyInProgress) as e:
+        raise _idempotency_error(e)
+
 # -------------------------------------------------
 # Twilio Webhooks
 # -------------------------------------------------
 @app.post("/voice/twilio-webhook")
 async def twilio_webhook(request: Request):
-    """Twilio Webhook für eingehende Voice-Anrufe"""
-    return await handle_twilio_webhook(request)
+    """Twilio Webhook für eingehende Voice-Anrufe (Retries → gespeicherte Antwort)"""
+    key = twilio_webhook_key(await request.form(), request.query_params.get("turn", "0"))
+    if key is None:
+        return await handle_twilio_webhook(request)
+    return await _idempotent_async(key, lambda: handle_twilio_webhook(request))
 
 @app.post("/voice/status")
 async def twilio_status(request: Request):
     """Twilio Status Callback für Call-Events"""
-    return await handle_twilio_status(request)
+    key = twilio_status_key(await request.form())
+    if key is None:
+        return await handle_twilio_status(request)
+
+    async def produce():
+        return JSONResponse(await handle_twilio_status(request))
+
+    return await _idempotent_async(key, produce)
 
 # -------------------------------------------------
 # KOSTENLOSER TEST-ENDPOINT (ohne echte Anrufe)
@@ -134,49 +314,153 @@ def root():
         "message": "IntelAiGent Backend läuft.",
     }
 
+# -------------------------------------------------
+# Monitoring
+# -------------------------------------------------
+@app.get("/api/metrics")
+def metrics(db: Session = Depends(get_db)):
+    """Interne Zähler (Caches, Outbox-Lag etc.) für Monitoring."""
+    return {
+        "slot_cache": slot_cache_stats(),
+        "occupancy": occupancy_index.stats(),
+        "outbox": {**outbox_stats(db), **outbox_worker.stats()},
+        "archive": archive_worker.stats(),
+        "idempotency": idempotency_store.stats(),
+        "slot_holds": slot_holds.stats(),
+        "waitlist": waitlist_index.stats(),
+        "db_pool": pool_stats(),
+        "db_pool_async": async_pool_stats(),
+    }
+
 # -------------------------------------------------
 # Slots abrufen
 # -------------------------------------------------
+def _etag_headers(etag: str) -> dict:
+    # Dashboard soll immer revalidieren, aber 304 nutzen können
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
 @app.get("/slots", response_model=List[SlotModel])
 def get_slots(
-    practice_id: PracticeId,
-    date_str: str,
+    practice_id: PracticeKey,
+    date_str: Optional[str] = None,
+    from_str: Optional[str] = Query(None, alias="from"),
+    to_str: Optional[str] = Query(None, alias="to"),
+    if_none_match: Optional[str] = Header(None),
 ):
+    """
+    Einzelner Tag: ?date_str=YYYY-MM-DD
+    Zeitraum:      ?from=YYYY-MM-DD&to=YYYY-MM-DD (inklusive, max. 90 Tage)
+    Unterstützt ETag / If-None-Match (304 ohne Slot-Erzeugung).
+    """
+    if from_str or to_str:
+        try:
+            from_date = date.fromisoformat(from_str or "")
+            to_date = date.fromisoformat(to_str or "")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ungültiges Datumsformat")
+
+        if to_date < from_date:
+            raise HTTPException(status_code=400, detail="'to' liegt vor 'from'")
+        if to_date - from_date >= timedelta(days=MAX_RANGE_DAYS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Zeitraum zu groß (max. {MAX_RANGE_DAYS} Tage)",
+            )
+
+        etag = slots_etag(practice_id, from_date, to_date)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=_etag_headers(etag))
+
+        return Response(
+            content=build_range_slots_json(practice_id, from_date, to_date),
+            media_type="application/json",
+            headers=_etag_headers(etag),
+        )
+
     try:
-        for_date = date.fromisoformat(date_str)
+        for_date = date.fromisoformat(date_str or "")
     except ValueError:
         raise HTTPException(status_code=400, detail="Ungültiges Datumsformat")
 
-    return get_slots_for_practice(
-        practice_id=practice_id,
-        for_date=for_date,
+    etag = slots_etag(practice_id, for_date, for_date)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+
+    # Direkt aus der kompakten Darstellung serialisiert (ohne SlotModel), LRU je Tag
+    return Response(
+        content=get_day_slots_json(practice_id, for_date),
+        media_type="application/json",
+        headers=_etag_headers(etag),
     )
 
 # -------------------------------------------------
 # Booking auslösen
 # -------------------------------------------------
-from tickets.service import create_ticket
+from booking.reservation import MAX_BATCH_SIZE, book_batch, book_with_retry, conflict_callback
 
 @app.post("/book", response_model=Union[TicketModel, CallbackTicket])
 def book_appointment(
     booking_request: BookingRequest,
     db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    result = process_booking_request(booking_request)
-
-    # 🔥 NUR WENN ES EIN TICKET IST → IN DB SPEICHERN
-    if isinstance(result, TicketModel):
-        create_ticket(db=db, ticket_model=result)
-
-        if result.slot:
-            calendar_service.create_event(
-                title=f"Termin – {booking_request.patient_name}",
-                start=result.slot.start_time,
-                end=result.slot.end_time,
-                description="Gebucht über IntelAiGent",
-            )
+    def produce():
+        # 🔥 NUR WENN ES EIN TICKET IST → IN DB SPEICHERN
+        # (bei parallel vergebenem Slot wird automatisch der nächste gewählt)
+        result = book_with_retry(
+            db,
+            decide=lambda: process_booking_request(booking_request),
+            on_conflict=lambda: conflict_callback(booking_request),
+        )
+        # Kein Slot → Warteliste (rückt bei Storno automatisch nach)
+        if isinstance(result, CallbackTicket) and result.reason != HOUSE_VISIT_REASON:
+            entry = add_booking_request_to_waitlist(db, booking_request)
+            result.waitlist_entry_id = entry.id
+        # Kalender-Termin liegt in der Outbox (gleiche Transaktion wie das Ticket)
+        return JSONResponse(result.model_dump(mode="json"))
+
+    if not idempotency_key:
+        return produce()
 
-    return result
+    # Gleicher Key → gespeicherte Antwort; gleicher Key mit anderem Inhalt → 422
+    request_fingerprint = fingerprint(
+        booking_request.model_dump_json(exclude={"created_at"})
+    )
+    try:
+        return idempotency_store.run(f"book:{idempotency_key}", produce, request_fingerprint)
+    except (IdempotencyConflict, IdempotencyInProgress) as e:
+        raise _idempotency_error(e)
+
+
+@app.post("/book/batch", response_model=List[BatchBookingItem])
+def book_appointments_batch(
+    booking_requests: List[BookingRequest],
+    db: Session = Depends(get_db),
+):
+    """
+    Bucht viele Anfragen in einem Durchlauf (Import / Partner-Schnittstellen).
+    Alle gebuchten Tickets werden in einer Transaktion gespeichert;
+    Anfragen ohne freien Slot kommen als Callback zurück (siehe book_batch)
+    und landen wie bei /book auf der Warteliste.
+    """
+    if len(booking_requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Maximal {MAX_BATCH_SIZE} Buchungen pro Batch",
+        )
+
+    # Kein Slot → Warteliste (wie /book; Hausbesuche bleiben Rückruf)
+    results = book_batch(db, booking_requests, waitlist=True)
+
+    return [
+        BatchBookingItem(
+            index=index,
+            booked=isinstance(result, TicketModel) and result.slot is not None,
+            result=result,
+        )
+        for index, result in enumerate(results)
+    ]
 
 
 # ---------------------------------------------------------
@@ -184,16 +468,19 @@ def book_appointment(
 # ---------------------------------------------------------
 @app.get("/api/dashboard/summary")
 def dashboard_summary(
-    practice_id: PracticeId = Query(..., description="Mandanten-ID"),
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
     db: Session = Depends(get_db),
 ):
-    tickets = list_tickets(db=db, practice_id=practice_id.value)
     today = date.today()
+    day_start = datetime.combine(today, time.min)
 
-    tickets_today = [
-        t for t in tickets
-        if t.created_at and t.created_at.date() == today
-    ]
+    # Tagesfilter in der DB (ix_tickets_practice_created), nur Kopfspalten
+    tickets_today = list_ticket_rows(
+        db=db,
+        practice_id=practice_id,
+        created_from=day_start,
+        created_to=day_start + timedelta(days=1),
+    )
 
     total_today = len(tickets_today)
 
@@ -211,8 +498,8 @@ def dashboard_summary(
 
     response_times = []
     for t in successful:
-        if t.slot and t.slot.start_time:
-            delta = t.slot.start_time - t.created_at
+        if t.slot_start:
+            delta = t.slot_start - t.created_at
             minutes = int(delta.total_seconds() / 60)
             if minutes >= 0:
                 response_times.append(minutes)
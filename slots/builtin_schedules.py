@@ -0,0 +1,102 @@
+from datetime import time
+from typing import Dict
+
+from schemas import DaySchedule, PracticeId, PracticeSchedule
+
+
+# -------------------------------------------------
+# Mitgelieferte Zeitpläne
+# -------------------------------------------------
+# Werden beim Start in die Tabelle practice_schedules übernommen,
+# falls dort noch kein Eintrag existiert. Danach gilt die DB.
+
+_WORKDAY_8_TO_18 = DaySchedule(open=time(8, 0), close=time(18, 0))
+
+
+# Standardpraxis: Montag–Freitag, 08:00–18:00, 20-Minuten-Slots
+DEFAULT_20 = PracticeSchedule(
+    slot_duration_minutes=20,
+    days={weekday: _WORKDAY_8_TO_18 for weekday in range(5)},
+)
+
+# Alternative Standardpraxis: Montag–Freitag, 08:00–18:00, 30-Minuten-Slots
+DEFAULT_30 = PracticeSchedule(
+    slot_duration_minutes=30,
+    days={weekday: _WORKDAY_8_TO_18 for weekday in range(5)},
+)
+
+# Wochenplan – Physio Krebs Nottuln (Premium)
+KREBS_NOTTULN = PracticeSchedule(
+    slot_duration_minutes=20,
+    days={
+        # Montag
+        0: DaySchedule(
+            open=time(8, 30),
+            close=time(18, 30),
+            admin=[
+                (time(8, 0), time(8, 30)),
+                (time(10, 30), time(11, 0)),
+                (time(13, 0), time(14, 0)),
+                (time(16, 0), time(16, 30)),
+            ],
+        ),
+        # Dienstag
+        1: DaySchedule(
+            open=time(8, 30),
+            close=time(19, 0),
+            admin=[
+                (time(16, 0), time(16, 20)),
+            ],
+            house_visit=[
+                (time(8, 30), time(14, 0)),
+            ],
+        ),
+        # Mittwoch
+        2: DaySchedule(
+            open=time(6, 30),
+            close=time(18, 0),
+            admin=[
+                (time(6, 30), time(7, 0)),
+                (time(9, 0), time(9, 30)),
+                (time(11, 30), time(12, 0)),
+                (time(14, 0), time(14, 30)),
+            ],
+            house_visit=[
+                (time(15, 0), time(18, 0)),  # Option A: keine Slots
+            ],
+        ),
+        # Donnerstag
+        3: DaySchedule(
+            open=time(8, 0),
+            close=time(19, 0),
+            admin=[
+                (time(8, 0), time(8, 30)),
+                (time(10, 30), time(11, 0)),
+                (time(13, 0), time(14, 0)),
+                (time(16, 0), time(16, 30)),
+                (time(18, 30), time(19, 0)),
+            ],
+        ),
+        # Freitag
+        4: DaySchedule(
+            open=time(14, 0),
+            close=time(18, 30),
+            admin=[
+                (time(14, 0), time(14, 30)),
+                (time(16, 30), time(17, 0)),
+            ],
+        ),
+        # Samstag
+        5: DaySchedule(
+            open=time(12, 0),
+            close=time(16, 0),
+        ),
+    },
+)
+
+
+BUILTIN_SCHEDULES: Dict[str, PracticeSchedule] = {
+    PracticeId.PHYSIO_DEFAULT_20.value: DEFAULT_20,
+    PracticeId.PHYSIO_DEFAULT_30.value: DEFAULT_30,
+    PracticeId.PHYSIO_KREBS_NOTTULN.value: KREBS_NOTTULN,
+}
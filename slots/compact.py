@@ -0,0 +1,120 @@
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from schemas import SlotModel, SlotType
+
+
+# -------------------------------------------------
+# Kompakte Slot-Darstellung eines Tages
+# -------------------------------------------------
+# Struct-of-Arrays statt einer SlotModel-Instanz pro Slot:
+# - offsets:    array('H') – Startminute seit Mitternacht je Slot
+# - type_codes: bytes     – Slot-Typ-Code je Slot (siehe SLOT_TYPE_BY_CODE)
+# - bookable:   int       – Bitset, Bit i = Slot i buchbar (nicht ausgebucht)
+# - counts:     bytes     – Buchungen je Slot (None = keine Buchungen)
+# SlotModel-Objekte entstehen erst an der API-Grenze (to_model / to_models).
+
+SLOT_TYPE_BY_CODE: Tuple[SlotType, ...] = tuple(SlotType)
+SLOT_TYPE_CODE: Dict[SlotType, int] = {t: code for code, t in enumerate(SLOT_TYPE_BY_CODE)}
+
+# "HH:MM:00" für jede Minute eines Tages (JSON-Encoder)
+_CLOCK = tuple(f"{m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60))
+
+_BOOL_JSON = ("false", "true")
+
+_EMPTY_OFFSETS = array("H")
+
+
+class DaySlots:
+    __slots__ = (
+        "base_date", "duration_minutes", "offsets", "type_codes", "bookable",
+        "capacity", "counts",
+    )
+
+    def __init__(
+        self,
+        base_date: date,
+        duration_minutes: int,
+        offsets: array,
+        type_codes: bytes,
+        bookable: int,
+        capacity: int = 1,
+        counts: Optional[bytes] = None,
+    ):
+        self.base_date = base_date
+        self.duration_minutes = duration_minutes
+        self.offsets = offsets
+        self.type_codes = type_codes
+        self.bookable = bookable
+        self.capacity = capacity
+        self.counts = counts
+
+    @classmethod
+    def empty(cls, base_date: date) -> "DaySlots":
+        return cls(base_date, 0, _EMPTY_OFFSETS, b"", 0)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def is_bookable(self, i: int) -> bool:
+        return bool(self.bookable >> i & 1)
+
+    def remaining(self, i: int) -> int:
+        if not self.bookable >> i & 1:
+            return 0
+        return self.capacity - (self.counts[i] if self.counts else 0)
+
+    def has_type(self, slot_type: SlotType) -> bool:
+        return SLOT_TYPE_CODE[slot_type] in self.type_codes
+
+    def first_bookable(self) -> Optional[int]:
+        if not self.bookable:
+            return None
+        return (self.bookable & -self.bookable).bit_length() - 1
+
+    def start_time(self, i: int) -> datetime:
+        return datetime.combine(self.base_date, datetime.min.time()) + timedelta(minutes=self.offsets[i])
+
+    # -------------------------------------------------
+    # API-Grenze
+    # -------------------------------------------------
+
+    def to_model(self, i: int) -> SlotModel:
+        start = self.start_time(i)
+        return SlotModel(
+            start_time=start,
+            end_time=start + timedelta(minutes=self.duration_minutes),
+            duration_minutes=self.duration_minutes,
+            slot_type=SLOT_TYPE_BY_CODE[self.type_codes[i]],
+            is_bookable=self.is_bookable(i),
+            remaining_capacity=self.remaining(i),
+        )
+
+    def to_models(self) -> List[SlotModel]:
+        return [self.to_model(i) for i in range(len(self.offsets))]
+
+    def to_json(self) -> bytes:
+        """
+        Serialisiert direkt aus den Arrays – gleiches Format wie
+        List[SlotModel] über FastAPI.
+        """
+        if not self.offsets:
+            return b"[]"
+
+        day = self.base_date.isoformat() + "T"
+        next_day = (self.base_date + timedelta(days=1)).isoformat() + "T"
+        duration = self.duration_minutes
+        bookable = self.bookable
+        remaining = self.remaining
+
+        items = []
+        for i, (offset, code) in enumerate(zip(self.offsets, self.type_codes)):
+            end = offset + duration
+            end_str = day + _CLOCK[end] if end < 1440 else next_day + _CLOCK[end - 1440]
+            items.append(
+                f'{{"start_time":"{day}{_CLOCK[offset]}","end_time":"{end_str}",'
+                f'"duration_minutes":{duration},"slot_type":"{SLOT_TYPE_BY_CODE[code].value}",'
+                f'"is_bookable":{_BOOL_JSON[bookable >> i & 1]},"remaining_capacity":{remaining(i)}}}'
+            )
+        return ("[" + ",".join(items) + "]").encode("utf-8")
@@ -1,45 +0,0 @@
-from datetime import datetime, time, timedelta, date
-from typing import List
-
-from schemas import SlotModel, SlotType
-
-
-
-OPEN_TIME = time(8, 0)
-CLOSE_TIME = time(18, 0)
-SLOT_DURATION_MINUTES = 30
-
-
-def generate_default30_slots(for_date: date) -> List[SlotModel]:
-    """
-    Alternative Standardpraxis:
-    - Montag–Freitag
-    - 08:00–18:00
-    - 30-Minuten-Slots
-    """
-
-    # Wochenende = keine Slots
-    if for_date.weekday() >= 5:
-        return []
-
-    slots: List[SlotModel] = []
-
-    current_start = datetime.combine(for_date, OPEN_TIME)
-    end_of_day = datetime.combine(for_date, CLOSE_TIME)
-
-    while current_start + timedelta(minutes=SLOT_DURATION_MINUTES) <= end_of_day:
-        current_end = current_start + timedelta(minutes=SLOT_DURATION_MINUTES)
-
-        slots.append(
-            SlotModel(
-                start_time=current_start,
-                end_time=current_end,
-                duration_minutes=SLOT_DURATION_MINUTES,
-                slot_type=SlotType.TREATMENT,
-                is_bookable=True,
-            )
-        )
-
-        current_start = current_end
-
-    return slots
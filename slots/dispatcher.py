@@ -1,36 +1,142 @@
-from datetime import date
-from typing import List
+import os
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
 
 from schemas import SlotModel, PracticeId
 
-from slots.default20 import generate_default20_slots
-from slots.default30 import generate_default30_slots
-from slots.physio_krebs_nottuln import generate_krebs_slots
+from slots.compact import DaySlots
+from slots.occupancy import occupancy_index
+from slots.registry import schedule_registry
+from slots.templates import (
+    EMPTY_DAY,
+    DayTemplate,
+    PracticeTemplate,
+    SlotCache,
+)
 
 
+# -------------------------------------------------
+# Slot-Cache (/slots je Tag)
+# -------------------------------------------------
+# Offsets und Slot-Typen teilen sich alle Tage mit der kompilierten
+# Vorlage; gecacht wird daher nur die fertige JSON-Antwort eines Tages.
+# Key: (practice_id, Zeitplan-Version, Datum, Belegungsversion) – jede
+# Buchung, Freigabe und Zeitplan-Änderung ergibt einen neuen Key, alte
+# Einträge laufen aus dem LRU.
+
+SLOT_CACHE_SIZE = int(os.getenv("SLOT_CACHE_SIZE", "512"))
+
+slot_cache = SlotCache(maxsize=SLOT_CACHE_SIZE)
 
 
 # -------------------------------------------------
 # Zentrale Slot-Auswahl
 # -------------------------------------------------
 
-def get_slots_for_practice(
+def _template_day(
+    practice_id: PracticeId,
+    for_date: date,
+) -> Tuple[int, DayTemplate]:
+    """
+    Kapazität + Tagesvorlage (Unbekannte Praxis → keine Slots).
+    """
+    compiled = schedule_registry.get(practice_id)
+    if compiled is None:
+        return 1, EMPTY_DAY
+    return compiled.capacity, compiled.template[for_date.weekday()]
+
+
+def practice_capacity(practice_id: PracticeId) -> int:
+    """
+    Parallel buchbare Plätze je Slot (Therapeuten/Räume), mindestens 1.
+    """
+    compiled = schedule_registry.get(practice_id)
+    return compiled.capacity if compiled else 1
+
+
+def get_day_slots(practice_id: PracticeId, for_date: date) -> DaySlots:
+    """
+    Kompakte Slots eines Tages inkl. Belegung – interner Hot Path
+    (Booking-Flow, Suche, /slots). Erzeugt keine SlotModel-Objekte.
+    Offsets und Slot-Typen teilt sich jeder Tag mit seiner kompilierten
+    Wochentags-Vorlage; pro Datum kommen nur Belegungs-Bits dazu.
+    """
+    capacity, day = _template_day(practice_id, for_date)
+    return day.stamp_compact(
+        for_date,
+        occupancy_index.occupied_mask(practice_id, for_date, capacity),
+        capacity,
+        occupancy_index.day_counts(practice_id, for_date),
+    )
+
+
+def get_day_slots_json(practice_id: PracticeId, for_date: date) -> bytes:
+    """
+    /slots-Antwort eines Tages (gleiches Format wie DaySlots.to_json) aus
+    dem LRU-Cache (practice_id, date).
+    """
+    compiled = schedule_registry.get(practice_id)
+    practice = getattr(practice_id, "value", practice_id)
+    occupancy = occupancy_index.day_version(practice_id, for_date)
+    key = (practice, compiled.version if compiled else None, for_date, occupancy)
+
+    body = slot_cache.get(key)
+    if body is None:
+        body = get_day_slots(practice_id, for_date).to_json()
+        # Belegung hat sich währenddessen geändert → nicht unter altem Key ablegen
+        if occupancy_index.day_version(practice_id, for_date) == occupancy:
+            slot_cache.put(key, body)
+    return body
+
+
+def slot_cache_stats() -> Dict[str, int]:
+    return slot_cache.stats()
+
+
+def first_free_slot(
     practice_id: PracticeId,
-    for_date: date
-) -> List[SlotModel]:
+    for_date: date,
+    allowed_mask: int = -1,
+) -> Optional[SlotModel]:
     """
-    Zentrale Slot-Funktion für das gesamte Backend.
-    Entscheidet anhand der Praxis-ID, welche Slot-Logik greift.
+    Erster buchbarer Slot des Tages mit freier Kapazität – ohne Listen-Scan.
+    allowed_mask schränkt optional auf bestimmte Startminuten ein.
     """
 
-    if practice_id == PracticeId.PHYSIO_DEFAULT_20:
-        return generate_default20_slots(for_date)
+    capacity, day = _template_day(practice_id, for_date)
+
+    full = occupancy_index.occupied_mask(practice_id, for_date, capacity)
+    free = day.bookable_mask & allowed_mask & ~full
+    if not free:
+        return None
+
+    offset = (free & -free).bit_length() - 1
+    day_slots = day.stamp_compact(
+        for_date, full, capacity, occupancy_index.day_counts(practice_id, for_date)
+    )
+    return day_slots.to_model(day.index_by_offset[offset])
 
-    if practice_id == PracticeId.PHYSIO_DEFAULT_30:
-        return generate_default30_slots(for_date)
 
-    if practice_id == PracticeId.PHYSIO_KREBS_NOTTULN:
-        return generate_krebs_slots(for_date)
+def is_slot_free(practice_id: PracticeId, start_time: datetime) -> bool:
+    """
+    Prüft, ob der Slot mit dieser Startzeit existiert, buchbar ist und
+    noch freie Kapazität hat.
+    """
+
+    capacity, day = _template_day(practice_id, start_time.date())
+    offset = start_time.hour * 60 + start_time.minute
+
+    if start_time.second or start_time.microsecond:
+        return False
+    if not day.bookable_mask >> offset & 1:
+        return False
+    return not occupancy_index.is_booked(practice_id, start_time, capacity)
+
+
+def get_practice_template(practice_id: PracticeId) -> Optional[PracticeTemplate]:
+    """
+    Kompilierte Wochenvorlage einer Praxis (None, wenn unbekannt).
+    """
+    compiled = schedule_registry.get(practice_id)
+    return compiled.template if compiled else None
 
-    # Fallback (sollte nie passieren)
-    return []
@@ -0,0 +1,46 @@
+import hashlib
+from datetime import date, timedelta
+from typing import Optional
+
+from schemas import PracticeId
+from slots.occupancy import occupancy_index
+from slots.registry import schedule_registry
+
+
+# -------------------------------------------------
+# ETags für Slot-Antworten
+# -------------------------------------------------
+# Starker ETag aus Zeitplan-Version + Belegungsversion aller Tage im
+# Zeitraum. Lässt sich berechnen, ohne Slots zu erzeugen.
+
+def slots_etag(practice_id: PracticeId, from_date: date, to_date: date) -> str:
+    compiled = schedule_registry.get(practice_id)
+    version = compiled.version if compiled else "-"
+    practice = getattr(practice_id, "value", practice_id)
+
+    h = hashlib.blake2b(
+        f"{practice}:{version}:{from_date.isoformat()}:{to_date.isoformat()}".encode(),
+        digest_size=16,
+    )
+    day = from_date
+    while day <= to_date:
+        h.update(b":" + occupancy_index.day_version(practice_id, day).encode())
+        day += timedelta(days=1)
+
+    return f'"{h.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Auswertung von If-None-Match (Liste oder "*"). Schwacher Vergleich
+    (RFC 9110): ein W/-Präfix wird ignoriert – Proxies schwächen ETags
+    z. B. beim Komprimieren ab.
+    """
+    if not if_none_match:
+        return False
+    candidates = [_opaque(c.strip()) for c in if_none_match.split(",")]
+    return "*" in candidates or _opaque(etag) in candidates
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from slots.occupancy import occupancy_index
+
+HOLD_TTL_SECONDS = float(os.getenv("SLOT_HOLD_TTL_SECONDS", "90"))
+# Abgelaufene Angebote, die noch auf eine Antwort warten können (je Anruf eins)
+LAPSED_HOLDS_MAX = int(os.getenv("SLOT_HOLD_LAPSED_MAX", "10000"))
+
+
+# -------------------------------------------------
+# Slot-Holds (Voice-Dialoge über mehrere Turns)
+# -------------------------------------------------
+# Ein angebotener Slot wird für HOLD_TTL_SECONDS reserviert (pro CallSid
+# höchstens ein Hold). Der Hold belegt einen Platz im Belegungs-Index –
+# alle Verfügbarkeitsabfragen (Tag, Bereich, Suche, ETag) schließen ihn
+# damit automatisch aus. Ablauf über einen Min-Heap (O(log n)) mit
+# Timer-Thread; veraltete Heap-Einträge werden beim Pop übersprungen.
+
+@dataclass
+class SlotHold:
+    call_sid: str
+    practice_id: str
+    start_time: datetime
+    expires_at: float  # time.monotonic()
+    seq: int
+    payload: Any = None  # z. B. das angebotene TicketModel
+
+
+class SlotHoldRegistry:
+
+    def __init__(self, ttl_seconds: float = HOLD_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._holds: Dict[str, SlotHold] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        # Abgelaufene Holds je Anruf: eine spätere Antwort ("ja") bezieht
+        # sich noch auf das Angebot und darf nicht ungefragt buchen
+        self._lapsed: "OrderedDict[str, SlotHold]" = OrderedDict()
+        self.expired = 0
+        self.confirmed = 0
+
+    # --- Holds ---
+
+    def hold(
+        self,
+        call_sid: str,
+        practice_id,
+        start_time: datetime,
+        capacity: int = 1,
+        payload: Any = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Reserviert den Slot für den Anruf. Ein bestehender Hold des Anrufs
+        wird ersetzt (bzw. beim selben Slot nur verlängert).
+        False, wenn der Slot inzwischen ausgebucht ist.
+        """
+        practice_id = getattr(practice_id, "value", practice_id)
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+
+        with self._cond:
+            self._expire_due()
+            current = self._holds.get(call_sid)
+            same_slot = (
+                current is not None
+                and current.practice_id == practice_id
+                and current.start_time == start_time
+            )
+
+            if not same_slot:
+                if not occupancy_index.try_book(practice_id, start_time, capacity):
+                    return False
+                if current is not None:
+                    occupancy_index.release(current.practice_id, current.start_time)
+
+            self._lapsed.pop(call_sid, None)
+            seq = next(self._seq)
+            self._holds[call_sid] = SlotHold(
+                call_sid, practice_id, start_time, expires_at, seq,
+                payload if payload is not None or current is None else current.payload,
+            )
+            heapq.heappush(self._heap, (expires_at, seq, call_sid))
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+            return True
+
+    def get(self, call_sid: str) -> Optional[SlotHold]:
+        with self._cond:
+            self._expire_due()
+            return self._holds.get(call_sid)
+
+    def take(self, call_sid: str) -> Optional[SlotHold]:
+        """
+        Entfernt den Hold OHNE den Platz freizugeben – der Aufrufer wandelt
+        ihn in eine Buchung um (create_ticket(..., claimed=True)).
+        """
+        with self._cond:
+            self._expire_due()
+            hold = self._holds.pop(call_sid, None)
+            self._lapsed.pop(call_sid, None)
+            if hold is not None:
+                self.confirmed += 1
+            return hold
+
+    def lapsed(self, call_sid: str) -> Optional[SlotHold]:
+        """
+        Abgelaufener Hold des Anrufs (Angebot ohne rechtzeitige Antwort).
+        """
+        with self._cond:
+            self._expire_due()
+            return self._lapsed.get(call_sid)
+
+    def release(self, call_sid: str) -> Optional[SlotHold]:
+        with self._cond:
+            self._lapsed.pop(call_sid, None)
+            hold = self._holds.pop(call_sid, None)
+            if hold is not None:
+                occupancy_index.release(hold.practice_id, hold.start_time)
+            return hold
+
+    # --- Ablauf ---
+
+    def _expire_due(self) -> Optional[float]:
+        """
+        Gibt abgelaufene Holds frei (Lock muss gehalten werden).
+        Liefert die Sekunden bis zum nächsten Ablauf (oder None).
+        """
+        now = time.monotonic()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, seq, call_sid = heapq.heappop(heap)
+            hold = self._holds.get(call_sid)
+            if hold is None or hold.seq != seq:
+                continue  # ersetzt, bestätigt oder freigegeben
+            del self._holds[call_sid]
+            occupancy_index.release(hold.practice_id, hold.start_time)
+            self.expired += 1
+            self._lapsed[call_sid] = hold
+            if len(self._lapsed) > LAPSED_HOLDS_MAX:
+                self._lapsed.popitem(last=False)
+        return heap[0][0] - now if heap else None
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._stopped:
+                self._cond.wait(self._expire_due())
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="slot-holds", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "active": len(self._holds),
+                "lapsed": len(self._lapsed),
+                "heap": len(self._heap),
+                "expired": self.expired,
+                "confirmed": self.confirmed,
+            }
+
+
+slot_holds = SlotHoldRegistry()
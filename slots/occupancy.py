@@ -0,0 +1,201 @@
+import hashlib
+from datetime import date, datetime
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# -------------------------------------------------
+# Belegungs-Index pro Praxis & Tag
+# -------------------------------------------------
+# Pro (practice_id, date):
+# - counts: bytearray(1440) – Anzahl Buchungen je Startminute
+# - full:   int-Bitmap      – Bit m gesetzt → Slot um Minute m ausgebucht
+# Die Bitmap gilt für eine bestimmte Kapazität (Therapeuten/Räume der
+# Praxis); ändert sich die Kapazität, wird sie aus counts neu berechnet.
+
+DayKey = Tuple[str, date]
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _practice_key(practice_id) -> str:
+    return getattr(practice_id, "value", practice_id)
+
+
+def _minute_of_day(start_time: datetime) -> int:
+    return start_time.hour * 60 + start_time.minute
+
+
+class _DayOccupancy:
+    __slots__ = ("counts", "capacity", "full", "version")
+
+    def __init__(self):
+        self.counts = bytearray(MINUTES_PER_DAY)
+        self.capacity = 1
+        self.full = 0
+        self.version: Optional[str] = None
+
+    def full_mask(self, capacity: int) -> int:
+        if capacity != self.capacity:
+            full = 0
+            for minute, count in enumerate(self.counts):
+                if count >= capacity:
+                    full |= 1 << minute
+            self.capacity, self.full = capacity, full
+        return self.full
+
+    def add(self, minute: int, capacity: int) -> None:
+        self.full_mask(capacity)
+        self.counts[minute] = min(self.counts[minute] + 1, 255)
+        if self.counts[minute] >= self.capacity:
+            self.full |= 1 << minute
+        self.version = None
+
+    def remove(self, minute: int) -> None:
+        if self.counts[minute]:
+            self.counts[minute] -= 1
+        if self.counts[minute] < self.capacity:
+            self.full &= ~(1 << minute)
+        self.version = None
+
+
+class OccupancyIndex:
+    """
+    In-Memory-Index der gebuchten Slot-Startzeiten mit Zählern je Slot.
+    Wird aus den Tickets der DB aufgebaut und bei Create / Statuswechsel /
+    Delete fortgeschrieben.
+    """
+
+    def __init__(self):
+        self._days: Dict[DayKey, _DayOccupancy] = {}
+        self._lock = Lock()
+
+    def try_book(self, practice_id, start_time: datetime, capacity: int = 1) -> bool:
+        """
+        Belegt atomar einen Platz im Slot, falls noch Kapazität frei ist.
+        """
+        key = (_practice_key(practice_id), start_time.date())
+        minute = _minute_of_day(start_time)
+        with self._lock:
+            day = self._days.get(key)
+            if day is None:
+                day = self._days[key] = _DayOccupancy()
+            if day.counts[minute] >= capacity:
+                return False
+            day.add(minute, capacity)
+            return True
+
+    def book(self, practice_id, start_time: datetime, capacity: int = 1) -> None:
+        """
+        Übernimmt eine bestehende Buchung (auch über die Kapazität hinaus).
+        """
+        key = (_practice_key(practice_id), start_time.date())
+        with self._lock:
+            day = self._days.get(key)
+            if day is None:
+                day = self._days[key] = _DayOccupancy()
+            day.add(_minute_of_day(start_time), capacity)
+
+    def set_count(self, practice_id, start_time: datetime, count: int, capacity: int = 1) -> None:
+        """
+        Setzt den Zähler eines Slots auf den Stand der DB (nach Konflikten
+        mit anderen Workern).
+        """
+        key = (_practice_key(practice_id), start_time.date())
+        minute = _minute_of_day(start_time)
+        with self._lock:
+            day = self._days.get(key)
+            if day is None:
+                day = self._days[key] = _DayOccupancy()
+            day.full_mask(capacity)
+            day.counts[minute] = min(count, 255)
+            if day.counts[minute] >= capacity:
+                day.full |= 1 << minute
+            else:
+                day.full &= ~(1 << minute)
+            day.version = None
+
+    def release(self, practice_id, start_time: datetime) -> None:
+        key = (_practice_key(practice_id), start_time.date())
+        with self._lock:
+            day = self._days.get(key)
+            if day is None:
+                return
+            day.remove(_minute_of_day(start_time))
+            if not any(day.counts):
+                del self._days[key]
+
+    def booked_count(self, practice_id, start_time: datetime) -> int:
+        day = self._days.get((_practice_key(practice_id), start_time.date()))
+        return day.counts[_minute_of_day(start_time)] if day else 0
+
+    def is_booked(self, practice_id, start_time: datetime, capacity: int = 1) -> bool:
+        """
+        True, wenn der Slot ausgebucht ist (keine Kapazität mehr frei).
+        """
+        return self.booked_count(practice_id, start_time) >= capacity
+
+    def occupied_mask(self, practice_id, for_date: date, capacity: int = 1) -> int:
+        """
+        Bitmap der ausgebuchten Startminuten des Tages.
+        """
+        day = self._days.get((_practice_key(practice_id), for_date))
+        if day is None:
+            return 0
+        with self._lock:
+            return day.full_mask(capacity)
+
+    def day_counts(self, practice_id, for_date: date) -> Optional[bytearray]:
+        """
+        Buchungen je Startminute (None = keine Buchungen an diesem Tag).
+        Nur lesend verwenden.
+        """
+        day = self._days.get((_practice_key(practice_id), for_date))
+        return day.counts if day else None
+
+    def day_version(self, practice_id, for_date: date) -> str:
+        """
+        Versionskennung der Belegung eines Tages (für ETags).
+        Aus dem Belegungszustand selbst abgeleitet, daher über Worker und
+        Neustarts hinweg stabil.
+        """
+        day = self._days.get((_practice_key(practice_id), for_date))
+        if day is None:
+            return "0"
+        if day.version is None:
+            day.version = hashlib.blake2b(day.counts, digest_size=8).hexdigest()
+        return day.version
+
+    def rebuild(self, bookings: Iterable[Tuple[str, datetime]]) -> int:
+        """
+        Baut den Index komplett neu auf (z. B. beim Start aus der DB).
+        Gibt die Anzahl der übernommenen Buchungen zurück.
+        """
+        days: Dict[DayKey, _DayOccupancy] = {}
+        count = 0
+        for practice_id, start_time in bookings:
+            key = (_practice_key(practice_id), start_time.date())
+            day = days.get(key)
+            if day is None:
+                day = days[key] = _DayOccupancy()
+            minute = _minute_of_day(start_time)
+            day.counts[minute] = min(day.counts[minute] + 1, 255)
+            count += 1
+
+        # full-Bitmaps werden beim ersten Zugriff für die Praxis-Kapazität berechnet
+        for day in days.values():
+            day.capacity = 0
+
+        with self._lock:
+            self._days = days
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "days": len(self._days),
+                "booked_slots": sum(sum(day.counts) for day in self._days.values()),
+            }
+
+
+occupancy_index = OccupancyIndex()
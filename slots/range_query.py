@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+
+from schemas import PracticeId
+from slots.dispatcher import get_practice_template, practice_capacity
+from slots.occupancy import occupancy_index
+
+
+# -------------------------------------------------
+# Mehrtägige Slot-Abfrage (vektorisiert)
+# -------------------------------------------------
+
+MAX_RANGE_DAYS = 90
+
+# 1970-01-01 war ein Donnerstag (weekday 3)
+_EPOCH_WEEKDAY = 3
+
+
+def build_range_slots_json(
+    practice_id: PracticeId,
+    from_date: date,
+    to_date: date,
+) -> bytes:
+    """
+    Erzeugt alle Slots von from_date bis to_date (inklusive) in einem Durchlauf
+    und serialisiert sie direkt als JSON-Liste – ohne SlotModel pro Slot.
+    Format identisch zu GET /slots für einen einzelnen Tag.
+    """
+
+    template = get_practice_template(practice_id)
+    if template is None:
+        return b"[]"
+
+    capacity = practice_capacity(practice_id)
+
+    days = np.arange(
+        np.datetime64(from_date, "D"),
+        np.datetime64(to_date + timedelta(days=1), "D"),
+    )
+    weekdays = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+
+    starts: List[np.ndarray] = []
+    ends: List[np.ndarray] = []
+    types: List[np.ndarray] = []
+    remaining: List[np.ndarray] = []
+    durations: List[np.ndarray] = []
+
+    for weekday, day in enumerate(template):
+        if not day.offsets:
+            continue
+
+        selected = days[weekdays == weekday]
+        if not selected.size:
+            continue
+
+        offsets = np.asarray(day.offsets, dtype="timedelta64[m]")
+        day_starts = selected.astype("datetime64[m]")[:, None] + offsets[None, :]
+
+        # Restkapazität je Slot: Kapazität (buchbar) bzw. 0 (blockiert)
+        day_remaining = np.broadcast_to(
+            np.asarray(day.bookable, dtype=np.int64) * capacity, day_starts.shape
+        ).copy()
+
+        # Belegung nur für Tage mit Buchungen einrechnen
+        offset_index = np.asarray(day.offsets, dtype=np.int64)
+        for row, d in enumerate(selected.tolist()):
+            counts = occupancy_index.day_counts(practice_id, d)
+            if counts:
+                booked = np.frombuffer(counts, dtype=np.uint8)[offset_index]
+                day_remaining[row] = np.maximum(day_remaining[row] - booked, 0)
+
+        starts.append(day_starts.ravel())
+        ends.append((day_starts + np.timedelta64(day.duration_minutes, "m")).ravel())
+        types.append(np.tile(np.asarray([t.value for t in day.slot_types]), selected.size))
+        remaining.append(day_remaining.ravel())
+        durations.append(np.full(day_starts.size, day.duration_minutes))
+
+    if not starts:
+        return b"[]"
+
+    all_starts = np.concatenate(starts)
+    order = np.argsort(all_starts, kind="stable")
+
+    start_str = np.datetime_as_string(all_starts[order], unit="s").tolist()
+    end_str = np.datetime_as_string(np.concatenate(ends)[order], unit="s").tolist()
+    type_str = np.concatenate(types)[order].tolist()
+    remaining_list = np.concatenate(remaining)[order].tolist()
+    duration_list = np.concatenate(durations)[order].tolist()
+
+    items = [
+        f'{{"start_time":"{s}","end_time":"{e}","duration_minutes":{d},'
+        f'"slot_type":"{t}","is_bookable":{"true" if r else "false"},"remaining_capacity":{r}}}'
+        for s, e, d, t, r in zip(start_str, end_str, duration_list, type_str, remaining_list)
+    ]
+    return ("[" + ",".join(items) + "]").encode("utf-8")
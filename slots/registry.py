@@ -0,0 +1,216 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from database_models import PracticeSchedule as PracticeScheduleRow
+from schemas import PracticeSchedule
+from slots.builtin_schedules import BUILTIN_SCHEDULES
+from slots.templates import PracticeTemplate, compile_schedule
+
+
+logger = logging.getLogger("twilio-agent")
+
+# Wie oft andere Worker Änderungen aus der DB nachladen
+SCHEDULE_REFRESH_SECONDS = float(os.getenv("SCHEDULE_REFRESH_SECONDS", "30"))
+
+
+# -------------------------------------------------
+# Schedule-Registry
+# -------------------------------------------------
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    version: int
+    template: PracticeTemplate
+    capacity: int = 1
+
+
+def _practice_key(practice_id) -> str:
+    return getattr(practice_id, "value", practice_id)
+
+
+def _compile(schedule: PracticeSchedule, version: int) -> CompiledSchedule:
+    return CompiledSchedule(
+        version=version,
+        template=compile_schedule(schedule),
+        capacity=schedule.capacity,
+    )
+
+
+class ScheduleRegistry:
+    """
+    Hält die kompilierten Zeitpläne aller Praxen im Speicher (O(1) per ID).
+    Quelle ist die Tabelle practice_schedules; Änderungen werden per
+    Versionsnummer erkannt und nur die betroffenen Praxen neu kompiliert.
+    """
+
+    def __init__(self, refresh_seconds: float = SCHEDULE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._compiled: Dict[str, CompiledSchedule] = {}
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._last_refresh = 0.0
+        self._lock = Lock()
+        # Serialisiert register() und load() (kein veralteter Stand nach PUT)
+        self._write_lock = Lock()
+
+    def bind(self, session_factory: Callable[[], Session]) -> None:
+        """
+        Aktiviert das periodische Nachladen aus der DB.
+        """
+        self._session_factory = session_factory
+        self._last_refresh = time.monotonic()
+
+    def register(self, practice_id, schedule: PracticeSchedule, version: int) -> None:
+        compiled = _compile(schedule, version)
+        with self._write_lock:
+            self._compiled = {**self._compiled, _practice_key(practice_id): compiled}
+
+    def get(self, practice_id) -> Optional[CompiledSchedule]:
+        self._maybe_refresh()
+        return self._compiled.get(_practice_key(practice_id))
+
+    def load(self, db: Session) -> int:
+        """
+        Gleicht die Registry mit der DB ab: Die DB ist der vollständige
+        Stand – in der DB gelöschte Praxen verschwinden auch hier. Gibt die
+        Anzahl neu kompilierter Praxen zurück.
+        """
+        with self._write_lock:
+            return self._load(db)
+
+    def _load(self, db: Session) -> int:
+        versions = dict(db.query(PracticeScheduleRow.practice_id, PracticeScheduleRow.version).all())
+
+        current = self._compiled
+        changed = [
+            practice_id for practice_id, version in versions.items()
+            if getattr(current.get(practice_id), "version", None) != version
+        ]
+        removed = current.keys() - versions.keys()
+        if not changed and not removed:
+            return 0
+
+        compiled = {
+            practice_id: entry for practice_id, entry in current.items()
+            if practice_id in versions and practice_id not in changed
+        }
+        rows = (
+            db.query(PracticeScheduleRow)
+            .filter(PracticeScheduleRow.practice_id.in_(changed))
+            .all()
+        ) if changed else []
+        for row in rows:
+            compiled[row.practice_id] = _compile(PracticeSchedule.model_validate(row.schedule), row.version)
+
+        # Mapping als Ganzes ersetzen (Leser sehen alten oder neuen Stand)
+        self._compiled = compiled
+        if removed:
+            logger.info(f"Schedule-Registry: Praxen entfernt: {', '.join(sorted(removed))}")
+        return len(rows)
+
+    def _maybe_refresh(self) -> None:
+        """
+        Stößt das Nachladen im Hintergrund an; der Aufrufer (ggf. die
+        Event-Loop) arbeitet ohne DB-Wartezeit mit dem bisherigen Stand.
+        """
+        if self._session_factory is None:
+            return
+        if time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+
+        self._last_refresh = time.monotonic()
+        try:
+            threading.Thread(target=self._refresh, name="schedule-refresh", daemon=True).start()
+        except RuntimeError as e:
+            self._lock.release()
+            logger.error(f"Schedule-Registry konnte nicht nachladen: {e}")
+
+    def _refresh(self) -> None:
+        try:
+            db = self._session_factory()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Schedule-Registry konnte nicht nachladen: {e}")
+        finally:
+            self._lock.release()
+
+
+schedule_registry = ScheduleRegistry()
+
+# Ohne DB sofort nutzbar (Skripte, Start vor dem Seeding)
+for _practice_id, _schedule in BUILTIN_SCHEDULES.items():
+    schedule_registry.register(_practice_id, _schedule, version=0)
+
+
+# -------------------------------------------------
+# Persistenz
+# -------------------------------------------------
+
+def seed_builtin_schedules(db: Session) -> int:
+    """
+    Legt fehlende Zeitpläne der mitgelieferten Praxen in der DB an.
+    """
+    existing = {
+        practice_id for (practice_id,) in db.query(PracticeScheduleRow.practice_id).all()
+    }
+
+    created = 0
+    for practice_id, schedule in BUILTIN_SCHEDULES.items():
+        if practice_id in existing:
+            continue
+        db.add(PracticeScheduleRow(
+            practice_id=practice_id,
+            schedule=schedule.model_dump(mode="json"),
+            version=1,
+        ))
+        created += 1
+
+    if created:
+        db.commit()
+    return created
+
+
+def get_schedule(db: Session, practice_id: str) -> Optional[PracticeSchedule]:
+    row = (
+        db.query(PracticeScheduleRow)
+        .filter(PracticeScheduleRow.practice_id == practice_id)
+        .first()
+    )
+    if not row:
+        return None
+    return PracticeSchedule.model_validate(row.schedule)
+
+
+def save_schedule(db: Session, practice_id: str, schedule: PracticeSchedule) -> int:
+    """
+    Legt den Zeitplan an oder ersetzt ihn (Version +1) und kompiliert
+    ihn in diesem Worker sofort neu. Gibt die neue Version zurück.
+    """
+    row = (
+        db.query(PracticeScheduleRow)
+        .filter(PracticeScheduleRow.practice_id == practice_id)
+        .first()
+    )
+    if row is None:
+        row = PracticeScheduleRow(practice_id=practice_id, version=1)
+        db.add(row)
+    else:
+        row.version = PracticeScheduleRow.version + 1
+
+    row.schedule = schedule.model_dump(mode="json")
+    db.commit()
+    db.refresh(row)
+
+    schedule_registry.register(practice_id, schedule, row.version)
+    return row.version
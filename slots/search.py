@@ -0,0 +1,176 @@
+import os
+import re
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from schemas import PracticeId, SlotModel, SlotType
+from slots.compact import DaySlots
+from slots.dispatcher import first_free_slot, get_practice_template
+
+
+# -------------------------------------------------
+# Suche "nächster freier Slot" über mehrere Tage
+# -------------------------------------------------
+
+MAX_SEARCH_DAYS = 60
+
+
+def _minute_window_mask(earliest: Optional[time], latest: Optional[time]) -> int:
+    """
+    Bitmap der Startminuten im Fenster [earliest, latest).
+    """
+    first = earliest.hour * 60 + earliest.minute if earliest else 0
+    mask = -1 << first
+    if latest:
+        mask &= (1 << (latest.hour * 60 + latest.minute)) - 1
+    return mask
+
+
+def iter_working_days(
+    practice_id: PracticeId,
+    start_date: date,
+    max_days: int = MAX_SEARCH_DAYS,
+) -> Iterator[date]:
+    """
+    Läuft lazy Tag für Tag vorwärts und liefert nur Tage, an denen die Praxis
+    laut Vorlage überhaupt Slots hat. Geschlossene Wochentage werden
+    übersprungen, ohne Slots zu erzeugen.
+    """
+    template = get_practice_template(practice_id)
+    if template is None:
+        return
+
+    for i in range(max_days):
+        day = start_date + timedelta(days=i)
+        if template[day.weekday()].offsets:
+            yield day
+
+
+def find_next_available(
+    practice_id: PracticeId,
+    start_date: date,
+    slot_type: Optional[SlotType] = None,
+    earliest: Optional[time] = None,
+    latest: Optional[time] = None,
+    not_before: Optional[datetime] = None,
+    max_days: int = MAX_SEARCH_DAYS,
+) -> Optional[SlotModel]:
+    """
+    Erster freier, buchbarer Slot ab start_date.
+    - slot_type: nur Slots dieses Typs
+    - earliest / latest: Tageszeitfenster für den Slot-Start
+    - not_before: Slots davor (z. B. heute schon vorbei) überspringen
+    Bricht beim ersten Treffer ab; None, wenn innerhalb max_days nichts frei ist.
+    """
+    template = get_practice_template(practice_id)
+    window = _minute_window_mask(earliest, latest)
+
+    for day in iter_working_days(practice_id, start_date, max_days):
+        allowed = window
+
+        if slot_type is not None:
+            allowed &= template[day.weekday()].bookable_mask_by_type.get(slot_type, 0)
+
+        if not_before is not None:
+            if day < not_before.date():
+                continue
+            if day == not_before.date():
+                first = not_before.hour * 60 + not_before.minute
+                if not_before.second or not_before.microsecond:
+                    first += 1
+                allowed &= -1 << first
+
+        slot = first_free_slot(practice_id, day, allowed_mask=allowed)
+        if slot is not None:
+            return slot
+
+    return None
+
+
+# -------------------------------------------------
+# Wunschzeit → nächstgelegene freie Slots
+# -------------------------------------------------
+
+# Max. Abstand zwischen Wunschzeit und angebotenem Slot
+REQUESTED_TIME_TOLERANCE_MINUTES = int(os.getenv("REQUESTED_TIME_TOLERANCE_MINUTES", "120"))
+
+MAX_ALTERNATIVES = 3
+
+# "14:30", "9.15", "14 Uhr", "14"
+_TIME_PATTERN = re.compile(r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*(?:uhr)?\s*$", re.IGNORECASE)
+
+
+def parse_requested_time(value: Optional[str]) -> Optional[time]:
+    """
+    Wunschzeit aus BookingRequest.requested_time; None, wenn nicht lesbar.
+    """
+    if not value:
+        return None
+
+    match = _TIME_PATTERN.match(value)
+    if not match:
+        return None
+
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def tolerance_window(
+    requested: time,
+    tolerance_minutes: int = REQUESTED_TIME_TOLERANCE_MINUTES,
+) -> Tuple[time, Optional[time]]:
+    """
+    (earliest, latest) für find_next_available rund um die Wunschzeit.
+    """
+    target = requested.hour * 60 + requested.minute
+    first = max(0, target - tolerance_minutes)
+    last = target + tolerance_minutes + 1
+
+    earliest = time(first // 60, first % 60)
+    latest = time(last // 60, last % 60) if last < 24 * 60 else None
+    return earliest, latest
+
+
+def nearest_free_slots(
+    day_slots: DaySlots,
+    requested: time,
+    tolerance_minutes: int = REQUESTED_TIME_TOLERANCE_MINUTES,
+    limit: int = MAX_ALTERNATIVES + 1,
+) -> List[int]:
+    """
+    Indizes der freien Slots um die Wunschzeit, nach Abstand sortiert
+    (bei Gleichstand der frühere zuerst). Einstieg per Binärsuche über die
+    sortierten Startminuten, danach Zwei-Zeiger-Lauf nach außen.
+    """
+    target = requested.hour * 60 + requested.minute
+    offsets = day_slots.offsets
+
+    right = bisect_left(offsets, target)
+    left = right - 1
+
+    result: List[int] = []
+    while len(result) < limit:
+        left_distance = target - offsets[left] if left >= 0 else None
+        right_distance = offsets[right] - target if right < len(offsets) else None
+
+        if left_distance is not None and left_distance > tolerance_minutes:
+            left_distance, left = None, -1
+        if right_distance is not None and right_distance > tolerance_minutes:
+            right_distance, right = None, len(offsets)
+
+        if left_distance is None and right_distance is None:
+            break
+
+        if right_distance is not None and (left_distance is None or right_distance < left_distance):
+            if day_slots.is_bookable(right):
+                result.append(right)
+            right += 1
+        else:
+            if day_slots.is_bookable(left):
+                result.append(left)
+            left -= 1
+
+    return result
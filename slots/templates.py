@@ -0,0 +1,220 @@
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import date, time
+from threading import Lock
+from typing import Dict, Hashable, Optional, Tuple
+
+from schemas import DaySchedule, PracticeSchedule, SlotType
+from slots.compact import SLOT_TYPE_CODE, DaySlots
+
+
+# -------------------------------------------------
+# Kompilierte Tagesvorlagen
+# -------------------------------------------------
+
+@dataclass(frozen=True)
+class DayTemplate:
+    """
+    Unveränderliches Slot-Layout eines Wochentags.
+    - offsets: Startzeit jedes Slots in Minuten seit Mitternacht
+    - slot_types / bookable: parallel zu offsets
+    """
+
+    duration_minutes: int
+    offsets: Tuple[int, ...]
+    slot_types: Tuple[SlotType, ...]
+    bookable: Tuple[bool, ...]
+
+    @cached_property
+    def bookable_mask(self) -> int:
+        """
+        Bitmap der buchbaren Slots (Bit = Startminute seit Mitternacht).
+        """
+        mask = 0
+        for offset, is_bookable in zip(self.offsets, self.bookable):
+            if is_bookable:
+                mask |= 1 << offset
+        return mask
+
+    @cached_property
+    def bookable_mask_by_type(self) -> Dict[SlotType, int]:
+        masks: Dict[SlotType, int] = {}
+        for offset, slot_type, is_bookable in zip(self.offsets, self.slot_types, self.bookable):
+            if is_bookable:
+                masks[slot_type] = masks.get(slot_type, 0) | 1 << offset
+        return masks
+
+    @cached_property
+    def index_by_offset(self) -> Dict[int, int]:
+        return {offset: i for i, offset in enumerate(self.offsets)}
+
+    # Kompakte Form (geteilt von allen gestempelten DaySlots)
+    @cached_property
+    def offsets_array(self) -> array:
+        return array("H", self.offsets)
+
+    @cached_property
+    def type_codes(self) -> bytes:
+        return bytes(SLOT_TYPE_CODE[t] for t in self.slot_types)
+
+    @cached_property
+    def bookable_bits(self) -> int:
+        """
+        Bitset der buchbaren Slots (Bit = Slot-Index).
+        """
+        bits = 0
+        for i, is_bookable in enumerate(self.bookable):
+            if is_bookable:
+                bits |= 1 << i
+        return bits
+
+    def stamp_compact(
+        self,
+        for_date: date,
+        occupied_mask: int = 0,
+        capacity: int = 1,
+        minute_counts: Optional[bytearray] = None,
+    ) -> DaySlots:
+        """
+        Kompakte Slots des Tages.
+        - occupied_mask (Bit = Startminute) markiert ausgebuchte Slots
+        - minute_counts: Buchungen je Startminute (für Restkapazität)
+        """
+        bookable = self.bookable_bits
+        occupied = occupied_mask & self.bookable_mask
+        while occupied:
+            low = occupied & -occupied
+            bookable &= ~(1 << self.index_by_offset[low.bit_length() - 1])
+            occupied ^= low
+
+        counts = bytes(minute_counts[o] for o in self.offsets) if minute_counts else None
+
+        return DaySlots(
+            for_date,
+            self.duration_minutes,
+            self.offsets_array,
+            self.type_codes,
+            bookable,
+            capacity,
+            counts,
+        )
+
+
+EMPTY_DAY = DayTemplate(duration_minutes=0, offsets=(), slot_types=(), bookable=())
+
+# Wochentag (0 = Montag) → Vorlage
+PracticeTemplate = Tuple[DayTemplate, ...]
+
+
+# -------------------------------------------------
+# Kompilieren eines PracticeSchedule
+# -------------------------------------------------
+# Admin- und Hausbesuchszeiten werden auf eine Minuten-Maske des Tages
+# gemalt; jeder Slot liest seinen Typ dann per Lookup an seiner Startminute.
+
+MINUTES_PER_DAY = 24 * 60
+
+_TREATMENT, _ADMIN, _HOUSE_VISIT = 0, 1, 2
+
+_CODE_TO_TYPE = {
+    _TREATMENT: SlotType.TREATMENT,
+    _ADMIN: SlotType.ADMIN,
+    _HOUSE_VISIT: SlotType.HOUSE_VISIT,
+}
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _fill(minute_codes: bytearray, ranges, code: int) -> None:
+    for start, end in ranges:
+        first, last = _minutes(start), _minutes(end)
+        minute_codes[first:last] = bytes([code]) * (last - first)
+
+
+def compile_day(day: DaySchedule, duration_minutes: int) -> DayTemplate:
+    minute_codes = bytearray(MINUTES_PER_DAY)
+
+    _fill(minute_codes, day.admin, _ADMIN)
+    # Hausbesuch hat Vorrang vor Verwaltung
+    _fill(minute_codes, day.house_visit, _HOUSE_VISIT)
+
+    offsets = tuple(range(
+        _minutes(day.open),
+        _minutes(day.close) - duration_minutes + 1,
+        duration_minutes,
+    ))
+    if not offsets:
+        return EMPTY_DAY
+
+    codes = [minute_codes[o] for o in offsets]
+
+    return DayTemplate(
+        duration_minutes=duration_minutes,
+        offsets=offsets,
+        slot_types=tuple(_CODE_TO_TYPE[c] for c in codes),
+        bookable=tuple(c == _TREATMENT for c in codes),
+    )
+
+
+def compile_schedule(schedule: PracticeSchedule) -> PracticeTemplate:
+    """
+    Übersetzt den Zeitplan einer Praxis in sieben Tagesvorlagen.
+    Nicht definierte Wochentage → keine Slots.
+    """
+    return tuple(
+        compile_day(schedule.days[weekday], schedule.slot_duration_minutes)
+        if weekday in schedule.days else EMPTY_DAY
+        for weekday in range(7)
+    )
+
+
+# -------------------------------------------------
+# LRU-Cache
+# -------------------------------------------------
+
+class SlotCache:
+    """
+    Begrenzter LRU-Cache für fertig serialisierte Slot-Tage (/slots).
+    Werte sind unveränderlich (bytes) und werden geteilt.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
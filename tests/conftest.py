@@ -0,0 +1,46 @@
+# -------------------------------------------------
+# Test-Setup
+# -------------------------------------------------
+# database, outbox und archive lesen ihre Konfiguration beim Import –
+# deshalb werden die Umgebungsvariablen gesetzt, bevor server geladen wird.
+# Jeder Testlauf bekommt eine eigene temporäre SQLite-Datei.
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="intelaigent-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "0")
+os.environ.setdefault("ARCHIVE_WORKER_ENABLED", "0")
+os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://dashboard.test")
+# Frische DB → Migrationen beim Start (im Betrieb separat per `python -m migrations`)
+os.environ.setdefault("MIGRATE_ON_STARTUP", "1")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient mit Startup (Migrationen, Zeitpläne, Belegungs-Index)."""
+    from fastapi.testclient import TestClient
+
+    import server
+
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
@@ -0,0 +1,63 @@
+# -------------------------------------------------
+# Archivierung kalter Tickets in mehreren Batches
+# -------------------------------------------------
+
+from datetime import date, datetime, timedelta
+
+from archive.worker import ArchiveWorker
+from database import SessionLocal
+from database_models import Ticket, TicketArchive
+from schemas import BookingRequest, TicketModel, TicketStatus
+from tickets.service import create_tickets_bulk, list_tickets_page
+
+# Praxis nur aus der Registry (kein PracticeId-Eintrag)
+PRACTICE_ID = "physio_archiv_registry"
+SCHEDULE = {
+    "slot_duration_minutes": 30,
+    "days": {"0": {"open": "09:00", "close": "12:00"}},
+}
+
+
+def _closed(count: int, prefix: str):
+    return [
+        TicketModel(
+            practice_id=PRACTICE_ID,
+            status=TicketStatus.CLOSED,
+            booking_request=BookingRequest(
+                practice_id=PRACTICE_ID, patient_name=f"{prefix} {i}", requested_date=date.today(),
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def test_archive_moves_cold_tickets_across_batches(client, db):
+    assert client.put(f"/api/practices/{PRACTICE_ID}/schedule", json=SCHEDULE).status_code == 200
+
+    cold = create_tickets_bulk(db, _closed(5, "Alt"))
+    cold_ids = [t.id for t in cold]
+    db.query(Ticket).filter(Ticket.id.in_(cold_ids)).update(
+        {Ticket.created_at: datetime.utcnow() - timedelta(days=400)}, synchronize_session=False
+    )
+    db.commit()
+    # Höchste ID bleibt stehen → frisches Ticket danach anlegen
+    fresh = create_tickets_bulk(db, _closed(1, "Neu"))
+
+    worker = ArchiveWorker(SessionLocal, after_days=90, batch_size=2, batch_pause_seconds=0)
+    assert worker.run_once() >= len(cold_ids)
+    assert worker.batches >= 3
+
+    db.expire_all()
+    assert db.query(Ticket).filter(Ticket.id.in_(cold_ids)).count() == 0
+    archived = {row.id for row in db.query(TicketArchive).filter(TicketArchive.id.in_(cold_ids))}
+    assert archived == set(cold_ids)
+
+    live, _ = list_tickets_page(db, PRACTICE_ID, limit=50)
+    assert [t.ticket_id for t in live] == [str(fresh[0].id)]
+
+    everything, _ = list_tickets_page(db, PRACTICE_ID, limit=50, include_archive=True)
+    assert {int(t.ticket_id) for t in everything} == set(cold_ids) | {fresh[0].id}
+
+    response = client.get("/tickets", params={"practice_id": PRACTICE_ID, "include_archive": "true"})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == len(cold_ids) + 1
@@ -0,0 +1,164 @@
+# -------------------------------------------------
+# POST /book/batch: Anfragen ohne Slot → Warteliste (wie /book)
+# -------------------------------------------------
+
+from datetime import date, timedelta
+
+import pytest
+
+from booking import reservation
+from booking.booking_flow import HOUSE_VISIT_REASON
+from database_models import WaitlistEntry
+from schemas import CallbackTicket
+
+PRACTICE_ID = "physio_default_20min"
+
+
+def test_batch_callbacks_are_waitlisted(client, db, monkeypatch):
+    requested = date.today() + timedelta(days=120)
+    decide = reservation.process_booking_request
+
+    def no_slot_for_some(booking_request):
+        if booking_request.patient_name.startswith("Voll"):
+            return CallbackTicket(
+                practice_id=booking_request.practice_id,
+                patient_name=booking_request.patient_name,
+                patient_phone=booking_request.patient_phone,
+                reason="Kein freier Termin – Rückruf notwendig",
+            )
+        if booking_request.patient_name.startswith("Hausbesuch"):
+            return CallbackTicket(
+                practice_id=booking_request.practice_id,
+                patient_name=booking_request.patient_name,
+                reason=HOUSE_VISIT_REASON,
+            )
+        return decide(booking_request)
+
+    monkeypatch.setattr(reservation, "process_booking_request", no_slot_for_some)
+
+    names = ["Batch Frei", "Voll Eins", "Hausbesuch Batch", "Voll Zwei"]
+    response = client.post("/book/batch", json=[
+        {
+            "practice_id": PRACTICE_ID,
+            "patient_name": name,
+            "patient_phone": f"+4917{i:07d}",
+            "requested_date": requested.isoformat(),
+            "requested_time": "14:00",
+        }
+        for i, name in enumerate(names)
+    ])
+    assert response.status_code == 200, response.text
+    items = response.json()
+
+    assert [item["booked"] for item in items] == [True, False, False, False]
+    assert items[0]["result"]["status"] == "booked"
+    # Hausbesuch bleibt reiner Rückruf
+    assert items[2]["result"]["waitlist_entry_id"] is None
+
+    for item in (items[1], items[3]):
+        entry_id = item["result"]["waitlist_entry_id"]
+        assert entry_id is not None
+        row = db.get(WaitlistEntry, entry_id)
+        assert row.practice_id == PRACTICE_ID
+        assert row.patient_name == item["result"]["patient_name"]
+        assert row.earliest_date == requested
+
+
+def _requests(requested: date, names):
+    from schemas import BookingRequest
+
+    return [
+        BookingRequest(
+            practice_id=PRACTICE_ID,
+            patient_name=name,
+            patient_phone=f"+4916{i:07d}",
+            requested_date=requested,
+            requested_time="14:00",
+        )
+        for i, name in enumerate(names)
+    ]
+
+
+def _no_slot_for_voll(monkeypatch):
+    decide = reservation.process_booking_request
+
+    def no_slot(booking_request):
+        if booking_request.patient_name.startswith("Voll"):
+            return CallbackTicket(
+                practice_id=booking_request.practice_id,
+                patient_name=booking_request.patient_name,
+                patient_phone=booking_request.patient_phone,
+                reason="Kein freier Termin – Rückruf notwendig",
+            )
+        return decide(booking_request)
+
+    monkeypatch.setattr(reservation, "process_booking_request", no_slot)
+
+
+def test_batch_fallback_books_individually_and_waitlists_once(client, db, monkeypatch):
+    from database_models import Ticket
+    from tickets.service import SlotUnavailableError
+    from waitlist.service import waitlist_index
+
+    requested = date.today() + timedelta(days=130)
+    _no_slot_for_voll(monkeypatch)
+
+    attempts = []
+
+    def always_conflicting(db, booked, stage=None):
+        attempts.append(len(booked))
+        raise SlotUnavailableError("Test: Slot parallel vergeben")
+
+    monkeypatch.setattr(reservation, "create_tickets_bulk", always_conflicting)
+
+    tickets_before = db.query(Ticket).count()
+    commits = []
+    commit = db.commit
+    monkeypatch.setattr(db, "commit", lambda: commits.append(1) or commit())
+
+    names = ["Fallback Eins", "Voll Fallback", "Fallback Zwei", "Voll Fallback Zwei"]
+    results = reservation.book_batch(db, _requests(requested, names), waitlist=True)
+
+    assert attempts == [2] * reservation.MAX_BATCH_ATTEMPTS
+    booked = [r for r in results if not isinstance(r, CallbackTicket)]
+    assert [r.booking_request.patient_name for r in booked] == ["Fallback Eins", "Fallback Zwei"]
+    assert all(ticket.status == "booked" for ticket in booked)
+    assert db.query(Ticket).count() == tickets_before + len(booked)
+
+    # Einzelbuchungen committen je Ticket, die Warteliste einmal gemeinsam
+    assert len(commits) == len(booked) + 1
+
+    callbacks = [results[1], results[3]]
+    for callback in callbacks:
+        row = db.get(WaitlistEntry, callback.waitlist_entry_id)
+        assert row.patient_name == callback.patient_name
+        assert row.earliest_date == requested
+    assert waitlist_index.match(PRACTICE_ID, requested, 14 * 60) == results[1].waitlist_entry_id
+
+
+def test_batch_waitlist_is_rolled_back_with_the_tickets(client, db, monkeypatch):
+    from database_models import Ticket
+    from waitlist import service as waitlist_service
+
+    requested = date.today() + timedelta(days=131)
+    _no_slot_for_voll(monkeypatch)
+
+    staged = []
+
+    def failing_stage(db, booking_requests):
+        staged.extend(waitlist_service.stage_booking_requests(db, booking_requests))
+        raise RuntimeError("Test: Warteliste nicht speicherbar")
+
+    monkeypatch.setattr(reservation, "stage_booking_requests", failing_stage)
+
+    tickets_before = db.query(Ticket).count()
+    names = ["Atomar Frei", "Voll Atomar"]
+    with pytest.raises(RuntimeError):
+        reservation.book_batch(db, _requests(requested, names), waitlist=True)
+
+    # Weder Ticket noch Wartelisten-Eintrag gespeichert, Slot wieder frei
+    assert len(staged) == 1
+    assert db.query(Ticket).count() == tickets_before
+    assert db.query(WaitlistEntry).filter(WaitlistEntry.earliest_date == requested).count() == 0
+    results = reservation.book_batch(db, _requests(requested, ["Atomar Frei"]))
+    assert results[0].slot is not None
@@ -0,0 +1,122 @@
+# -------------------------------------------------
+# Doppelbuchungen unter Last (/book parallel)
+# -------------------------------------------------
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from database_models import SlotReservation, Ticket
+from schemas import BookingRequest, SlotModel, SlotType, TicketModel, TicketStatus
+from slots.dispatcher import practice_capacity
+from tickets import service
+from tickets.service import SlotUnavailableError, create_ticket, update_ticket_status
+
+PRACTICE_ID = "physio_default_20min"
+# Ohne Wartelisten-Einträge: frei gewordene Slots bleiben frei
+STATUS_PRACTICE_ID = "physio_default_30min"
+PARALLEL_BOOKINGS = 300
+THREADS = 16
+# Untergrenze für den Durchsatz (/book über den TestClient, SQLite) – fängt
+# grobe Regressionen wie Sperren über die ganze Anfrage ab
+MIN_BOOKINGS_PER_SECOND = float(os.getenv("MIN_BOOKINGS_PER_SECOND", "25"))
+
+
+def _weekday(start: date) -> date:
+    while start.weekday() > 4:
+        start += timedelta(days=1)
+    return start
+
+
+def _booked_ticket(day: date, hour: int) -> TicketModel:
+    start = datetime.combine(day, datetime.min.time()).replace(hour=hour)
+    return TicketModel(
+        practice_id=STATUS_PRACTICE_ID,
+        booking_request=BookingRequest(
+            practice_id=STATUS_PRACTICE_ID, patient_name="Status", requested_date=day
+        ),
+        slot=SlotModel(
+            start_time=start,
+            end_time=start + timedelta(minutes=30),
+            duration_minutes=30,
+            slot_type=SlotType.TREATMENT,
+        ),
+        status=TicketStatus.BOOKED,
+    )
+
+
+def test_parallel_bookings_never_double_book(client, db, record_property):
+    requested = _weekday(date.today() + timedelta(days=30))
+
+    def book(i: int) -> dict:
+        response = client.post("/book", json={
+            "practice_id": PRACTICE_ID,
+            "patient_name": f"Last {i}",
+            "patient_phone": f"+49{i:08d}",
+            "requested_date": requested.isoformat(),
+            "requested_time": "08:00",
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(book, range(PARALLEL_BOOKINGS)))
+    bookings_per_second = PARALLEL_BOOKINGS / (time.perf_counter() - started)
+    record_property("bookings_per_second", round(bookings_per_second, 1))
+    print(f"{PARALLEL_BOOKINGS} Buchungen parallel ({THREADS} Threads): {bookings_per_second:.1f}/s")
+    assert bookings_per_second >= MIN_BOOKINGS_PER_SECOND
+
+    booked = [r for r in results if r.get("status") == TicketStatus.BOOKED.value]
+    assert booked, "keine Buchung erfolgreich"
+
+    # Antworten: kein Slot wurde zweimal über die Kapazität hinaus vergeben
+    capacity = practice_capacity(PRACTICE_ID)
+    per_slot = Counter(r["slot"]["start_time"] for r in booked)
+    assert max(per_slot.values()) <= capacity
+
+    # Datenbank: Reservierungen eindeutig, je gebuchtem Ticket genau eine
+    reservations = (
+        db.query(SlotReservation.slot_start, SlotReservation.resource, SlotReservation.ticket_id)
+        .filter(SlotReservation.practice_id == PRACTICE_ID)
+        .all()
+    )
+    assert len({(r.slot_start, r.resource) for r in reservations}) == len(reservations)
+    reserved_ids = Counter(r.ticket_id for r in reservations)
+    booked_rows = (
+        db.query(Ticket.id, Ticket.slot_start)
+        .filter(Ticket.practice_id == PRACTICE_ID, Ticket.status == TicketStatus.BOOKED)
+        .all()
+    )
+    assert len(booked_rows) >= len(booked)
+    assert all(reserved_ids[row.id] == 1 for row in booked_rows)
+
+    db_per_slot = Counter(row.slot_start for row in booked_rows)
+    assert max(db_per_slot.values()) <= capacity
+
+
+def test_rebooking_taken_slot_raises_slot_unavailable(client, db):
+    day = _weekday(date.today() + timedelta(days=60))
+    first = create_ticket(db, _booked_ticket(day, 9))
+    update_ticket_status(db, first.id, STATUS_PRACTICE_ID, TicketStatus.CLOSED)
+    create_ticket(db, _booked_ticket(day, 9))
+
+    with pytest.raises(SlotUnavailableError):
+        update_ticket_status(db, first.id, STATUS_PRACTICE_ID, TicketStatus.BOOKED)
+
+
+def test_release_error_is_not_masked(client, db, monkeypatch):
+    day = _weekday(date.today() + timedelta(days=61))
+    ticket = create_ticket(db, _booked_ticket(day, 10))
+
+    def failing_delete(session, ticket_id):
+        raise IntegrityError("DELETE", {}, Exception("simuliert"))
+
+    monkeypatch.setattr(service, "_delete_reservations", failing_delete)
+    with pytest.raises(IntegrityError):
+        update_ticket_status(db, ticket.id, STATUS_PRACTICE_ID, TicketStatus.CLOSED)
@@ -0,0 +1,65 @@
+# -------------------------------------------------
+# Kompakte DaySlots: Modelle und JSON direkt aus den Arrays
+# -------------------------------------------------
+
+import json
+from array import array
+from datetime import date, datetime, timedelta
+
+from schemas import SlotModel, SlotType
+from slots import compact
+from slots.compact import SLOT_TYPE_CODE, DaySlots
+
+DAY = date(2026, 11, 5)
+
+
+def _day_slots() -> DaySlots:
+    types = [SlotType.TREATMENT, SlotType.ADMIN, SlotType.TREATMENT, SlotType.HOUSE_VISIT, SlotType.TREATMENT]
+    return DaySlots(
+        DAY,
+        30,
+        array("H", [480, 510, 540, 570, 23 * 60 + 40]),  # letzter Slot endet nach Mitternacht
+        bytes(SLOT_TYPE_CODE[t] for t in types),
+        bookable=0b10001,  # 09:00 ausgebucht, Admin / Hausbesuch nie buchbar
+        capacity=3,
+        counts=bytes([1, 0, 3, 0, 0]),
+    )
+
+
+def test_json_matches_pydantic_models():
+    day_slots = _day_slots()
+    models = day_slots.to_models()
+    assert json.loads(day_slots.to_json()) == [m.model_dump(mode="json") for m in models]
+
+    last = models[-1]
+    assert last.end_time == datetime.combine(DAY + timedelta(days=1), datetime.min.time()) + timedelta(minutes=10)
+    assert [m.remaining_capacity for m in models] == [2, 0, 0, 0, 3]
+
+
+def test_lookups_without_models():
+    day_slots = _day_slots()
+    assert len(day_slots) == 5
+    assert day_slots.first_bookable() == 0
+    assert day_slots.has_type(SlotType.HOUSE_VISIT)
+    assert day_slots.start_time(2) == datetime(2026, 11, 5, 9, 0)
+    assert not day_slots.is_bookable(2)
+
+    empty = DaySlots.empty(DAY)
+    assert empty.to_json() == b"[]"
+    assert empty.first_bookable() is None
+    assert empty.to_models() == []
+
+
+def test_slots_endpoint_builds_no_slot_models(client, monkeypatch):
+    def no_models(*args, **kwargs):
+        raise AssertionError("SlotModel im Hot Path erzeugt")
+
+    monkeypatch.setattr(compact, "SlotModel", no_models)
+    day = date.today() + timedelta(days=120)
+    while day.weekday() > 4:
+        day += timedelta(days=1)
+    response = client.get("/slots", params={"practice_id": "physio_krebs_nottuln", "date_str": day.isoformat()})
+    assert response.status_code == 200, response.text
+    assert response.json()
+    for slot in response.json():
+        SlotModel.model_validate(slot)
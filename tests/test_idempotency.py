@@ -0,0 +1,92 @@
+# -------------------------------------------------
+# Idempotenz-Store (async-Pfad des Voice-Webhooks)
+# -------------------------------------------------
+
+import asyncio
+
+from fastapi.responses import Response
+
+from database import run_in_db_thread
+from idempotency.store import idempotency_store
+
+
+def test_duplicate_waits_without_blocking_the_db_thread(client):
+    # Unter SQLite gibt es nur einen DB-Thread: Das wartende Duplikat darf
+    # ihn nicht belegen, sonst kommt complete() der Erstverarbeitung nie dran
+    key = "test:duplicate-in-flight"
+
+    async def scenario():
+        assert await idempotency_store.begin_async(key, "fp") is None
+        duplicate = asyncio.ensure_future(idempotency_store.begin_async(key, "fp"))
+        await asyncio.sleep(0.2)
+        assert not duplicate.done()
+
+        response = Response(content=b"<Response/>", media_type="application/xml")
+        await asyncio.wait_for(run_in_db_thread(idempotency_store.complete, key, response), 2)
+        return await asyncio.wait_for(duplicate, 2)
+
+    stored = client.portal.call(scenario)
+    assert stored is not None and stored.body == b"<Response/>"
+
+
+def test_voice_webhook_retry_is_replayed(client):
+    form = {
+        "From": "+4915100000001",
+        "CallSid": "CA-test-replay",
+        "CallStatus": "in-progress",
+        "SpeechResult": "Ich möchte einen Termin buchen",
+    }
+    first = client.post("/voice/twilio-webhook?turn=0", data=form)
+    retry = client.post("/voice/twilio-webhook?turn=0", data=form)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert retry.content == first.content
+
+
+def test_error_twiml_is_not_stored(client, monkeypatch):
+    import voice.twilio_handler as twilio_handler
+
+    form = {
+        "From": "+4915100000002",
+        "CallSid": "CA-test-error",
+        "CallStatus": "in-progress",
+        "SpeechResult": "Ich möchte einen Termin buchen",
+    }
+
+    def broken_intent(text):
+        raise RuntimeError("Intent-Erkennung ausgefallen")
+
+    monkeypatch.setattr(twilio_handler, "detect_intent", broken_intent)
+    failed = client.post("/voice/twilio-webhook?turn=0", data=form)
+    assert failed.status_code == 200
+    assert "Systemfehler" in failed.text
+
+    # Retry nach Behebung → neu verarbeitet, nicht die Fehler-TwiML abgespielt
+    monkeypatch.undo()
+    retry = client.post("/voice/twilio-webhook?turn=0", data=form)
+    assert retry.status_code == 200
+    assert retry.headers.get("Idempotent-Replayed") is None
+    assert "Systemfehler" not in retry.text
+
+
+def test_duplicate_gets_409_with_retry_after_when_first_is_slow(client, monkeypatch):
+    import idempotency.store as store
+
+    monkeypatch.setattr(store, "IDEMPOTENCY_WAIT_SECONDS", 0.3)
+    form = {"From": "+4915100000003", "CallSid": "CA-test-busy", "CallStatus": "in-progress"}
+    key = store.twilio_webhook_key(form, "0")
+
+    # Erstverarbeitung hängt (Schlüssel reserviert, nie abgeschlossen)
+    assert idempotency_store.begin(key) is None
+    busy = idempotency_store.stats()["busy"]
+    try:
+        response = client.post("/voice/twilio-webhook?turn=0", data=form)
+        assert response.status_code == 409
+        assert response.headers["Retry-After"] == str(store.IDEMPOTENCY_RETRY_AFTER_SECONDS)
+        assert idempotency_store.stats()["busy"] == busy + 1
+    finally:
+        idempotency_store.abort(key)
+
+    # Nach Freigabe verarbeitet der Retry normal
+    assert client.post("/voice/twilio-webhook?turn=0", data=form).status_code == 200
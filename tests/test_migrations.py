@@ -0,0 +1,92 @@
+# -------------------------------------------------
+# Migrations-Runner: Lease-Lock und fortsetzbare Batches
+# -------------------------------------------------
+
+import pytest
+from sqlalchemy import column, select, table, text, update
+
+from database import make_engine
+from migrations import runner
+from migrations.runner import (
+    MigrationLock,
+    MigrationLockTimeout,
+    _ensure_tables,
+    pending_migrations,
+    run_in_batches,
+    run_migrations,
+)
+
+
+@pytest.fixture
+def fresh_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, "_LOCK_POLL_SECONDS", 0.02)
+    engine = make_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def test_second_runner_waits_for_lock_then_skips(fresh_engine):
+    _ensure_tables(fresh_engine)
+    holder = MigrationLock(fresh_engine)
+    holder.acquire(0)
+
+    # Anderer Worker migriert gerade → warten, nach Frist Abbruch
+    with pytest.raises(MigrationLockTimeout):
+        run_migrations(fresh_engine, wait_seconds=0.1)
+    assert pending_migrations(fresh_engine)
+
+    holder.release()
+    applied = run_migrations(fresh_engine, wait_seconds=0.1)
+    assert applied == [m.version for m in runner.MIGRATIONS]
+
+    # Danach nichts mehr zu tun – kein Lock nötig
+    holder.acquire(0)
+    assert run_migrations(fresh_engine, wait_seconds=0) == []
+    holder.release()
+
+
+def test_expired_lease_is_taken_over(fresh_engine):
+    _ensure_tables(fresh_engine)
+    dead = MigrationLock(fresh_engine)
+    dead.acquire(0)
+    with fresh_engine.begin() as conn:
+        conn.execute(text("UPDATE schema_migration_lock SET locked_until = '2000-01-01 00:00:00'"))
+
+    successor = MigrationLock(fresh_engine)
+    successor.acquire(0)
+    with fresh_engine.connect() as conn:
+        owner = conn.execute(text("SELECT locked_by FROM schema_migration_lock")).scalar()
+    assert owner == successor.owner
+
+
+def test_run_in_batches_resumes_after_failure(fresh_engine, monkeypatch):
+    monkeypatch.setattr(runner, "MIGRATION_BATCH_SIZE", 10)
+    with fresh_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, filled INTEGER)"))
+        conn.execute(text("INSERT INTO items (id) VALUES " + ", ".join(f"({i})" for i in range(1, 26))))
+
+    items = table("items", column("id"), column("filled"))
+    missing = select(items.c.id).where(items.c.filled.is_(None))
+    batches = []
+
+    def fill(rows, fail_on=None):
+        batches.append(len(rows))
+        if len(batches) == fail_on:
+            raise RuntimeError("Worker beendet")
+        conn.execute(update(items).where(items.c.id.in_([r.id for r in rows])).values(filled=1))
+
+    with fresh_engine.connect() as conn:
+        with pytest.raises(RuntimeError):
+            run_in_batches(conn, missing, items.c.id, lambda rows: fill(rows, fail_on=2))
+        conn.rollback()
+
+    # Erster Batch ist committet, der abgebrochene nicht
+    with fresh_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM items WHERE filled = 1")).scalar() == 10
+
+        batches.clear()
+        assert run_in_batches(conn, missing, items.c.id, fill) == 15
+        assert batches == [10, 5]
+        assert conn.execute(text("SELECT COUNT(*) FROM items WHERE filled IS NULL")).scalar() == 0
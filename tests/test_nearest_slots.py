@@ -0,0 +1,97 @@
+# -------------------------------------------------
+# Wunschzeit: nächstgelegene freie Slots (Rangfolge, Gleichstand)
+# -------------------------------------------------
+
+from array import array
+from datetime import date, time, timedelta
+
+import pytest
+
+from schemas import SlotType
+from slots.compact import SLOT_TYPE_CODE, DaySlots
+from slots.search import nearest_free_slots, parse_requested_time
+
+DAY = date(2026, 11, 3)
+
+
+def _day(taken=(), first="08:00", count=12, step=20) -> DaySlots:
+    """Slots im Abstand `step` ab `first`; `taken` = belegte Uhrzeiten."""
+    hour, minute = map(int, first.split(":"))
+    offsets = array("H", (hour * 60 + minute + i * step for i in range(count)))
+    bookable = 0
+    for i, offset in enumerate(offsets):
+        if f"{offset // 60:02d}:{offset % 60:02d}" not in taken:
+            bookable |= 1 << i
+    type_codes = bytes([SLOT_TYPE_CODE[SlotType.TREATMENT]]) * count
+    return DaySlots(DAY, step, offsets, type_codes, bookable)
+
+
+def _clock(day_slots: DaySlots, indexes) -> list:
+    return [day_slots.start_time(i).strftime("%H:%M") for i in indexes]
+
+
+def test_exact_slot_first_then_by_distance():
+    day_slots = _day()
+    ranked = nearest_free_slots(day_slots, time(9, 0), limit=5)
+    assert _clock(day_slots, ranked) == ["09:00", "08:40", "09:20", "08:20", "09:40"]
+
+
+def test_tie_prefers_earlier_slot():
+    day_slots = _day()
+    # 09:10 liegt genau zwischen 09:00 und 09:20
+    ranked = nearest_free_slots(day_slots, time(9, 10), limit=4)
+    assert _clock(day_slots, ranked) == ["09:00", "09:20", "08:40", "09:40"]
+
+
+def test_taken_slots_are_skipped():
+    day_slots = _day(taken={"09:00", "08:40"})
+    ranked = nearest_free_slots(day_slots, time(9, 0), limit=3)
+    assert _clock(day_slots, ranked) == ["09:20", "08:20", "09:40"]
+
+
+def test_tolerance_window_bounds_the_search():
+    day_slots = _day(taken={"09:00", "09:20", "08:40"})
+    assert _clock(day_slots, nearest_free_slots(day_slots, time(9, 0), tolerance_minutes=20)) == []
+    assert _clock(day_slots, nearest_free_slots(day_slots, time(9, 0), tolerance_minutes=40)) == ["08:20", "09:40"]
+
+
+@pytest.mark.parametrize("requested, expected", [
+    (time(6, 0), []),                    # vor Öffnung, außerhalb der Toleranz
+    (time(7, 30), ["08:00", "08:20"]),   # vor dem ersten Slot
+    (time(12, 30), ["11:40", "11:20"]),  # nach dem letzten Slot
+])
+def test_requested_time_outside_opening_hours(requested, expected):
+    day_slots = _day()
+    ranked = nearest_free_slots(day_slots, requested, tolerance_minutes=70, limit=2)
+    assert _clock(day_slots, ranked) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("14:30", time(14, 30)),
+    ("9 Uhr", time(9, 0)),
+    ("25:00", None),
+    ("nachmittags", None),
+    (None, None),
+])
+def test_parse_requested_time(value, expected):
+    assert parse_requested_time(value) == expected
+
+
+def test_booking_offers_ranked_alternatives(client):
+    day = date.today() + timedelta(days=95)
+    while day.weekday() > 4:
+        day += timedelta(days=1)
+    booking = {
+        "practice_id": "physio_default_30min",
+        "patient_name": "Wunschzeit",
+        "requested_date": day.isoformat(),
+        "requested_time": "10:00",
+    }
+
+    first = client.post("/book", json=booking).json()
+    assert first["slot"]["start_time"] == f"{day.isoformat()}T10:00:00"
+
+    # 10:00 ist jetzt belegt (Kapazität 1) → nächster Termin, Alternativen nach Abstand
+    second = client.post("/book", json={**booking, "patient_name": "Wunschzeit 2"}).json()
+    starts = [second["slot"]["start_time"]] + [a["start_time"] for a in second["alternatives"]]
+    assert [s[11:16] for s in starts] == ["09:30", "10:30", "09:00", "11:00"]
@@ -0,0 +1,91 @@
+# -------------------------------------------------
+# "Nächster freier Slot" über mehrere Tage (lazy)
+# -------------------------------------------------
+
+from datetime import date, datetime, time, timedelta
+from types import GeneratorType
+
+import pytest
+
+from booking.booking_flow import auto_book_from_voice
+from schemas import SlotType, TicketModel
+from slots import search
+from slots.search import find_next_available, iter_working_days
+
+# Ein Slot pro Tag, nur Montag und Mittwoch
+PRACTICE_ID = "physio_mo_mi"
+SCHEDULE = {
+    "slot_duration_minutes": 30,
+    "days": {"0": {"open": "09:00", "close": "09:30"}, "2": {"open": "09:00", "close": "09:30"}},
+}
+
+
+@pytest.fixture
+def practice(client):
+    assert client.put(f"/api/practices/{PRACTICE_ID}/schedule", json=SCHEDULE).status_code == 200
+    return PRACTICE_ID
+
+
+def _monday(weeks_ahead: int) -> date:
+    day = date.today() + timedelta(weeks=weeks_ahead)
+    return day - timedelta(days=day.weekday())
+
+
+@pytest.fixture
+def checked_days(monkeypatch):
+    """Tage, für die find_next_available tatsächlich Slots prüft."""
+    days = []
+    first_free_slot = search.first_free_slot
+
+    def counting(practice_id, day, **kwargs):
+        days.append(day)
+        return first_free_slot(practice_id, day, **kwargs)
+
+    monkeypatch.setattr(search, "first_free_slot", counting)
+    return days
+
+
+def test_working_days_are_generated_lazily(practice):
+    monday = _monday(20)
+    days = iter_working_days(practice, monday, max_days=10)
+    assert isinstance(days, GeneratorType)
+    assert list(days) == [monday, monday + timedelta(days=2), monday + timedelta(days=7), monday + timedelta(days=9)]
+
+
+def test_full_day_moves_to_next_working_day(client, practice, checked_days):
+    monday = _monday(21)
+    response = client.post("/book", json={
+        "practice_id": practice, "patient_name": "Montag", "requested_date": monday.isoformat(),
+    })
+    assert response.json()["slot"]["start_time"] == f"{monday.isoformat()}T09:00:00"
+
+    slot = find_next_available(practice, monday)
+    assert slot.start_time == datetime.combine(monday + timedelta(days=2), time(9, 0))
+    # Dienstag (geschlossen) wird nie geprüft, nach dem Treffer ist Schluss
+    assert checked_days == [monday, monday + timedelta(days=2)]
+
+    # /book am vollen Tag → Folgetermin statt Rückruf
+    response = client.post("/book", json={
+        "practice_id": practice, "patient_name": "Montag 2", "requested_date": monday.isoformat(),
+    })
+    assert response.json()["status"] == "booked"
+    assert response.json()["slot"]["start_time"] == f"{(monday + timedelta(days=2)).isoformat()}T09:00:00"
+
+
+def test_filters_and_search_limit(practice, checked_days):
+    monday = _monday(22)
+    assert find_next_available(practice, monday, slot_type=SlotType.HOUSE_VISIT, max_days=14) is None
+    assert find_next_available(practice, monday, earliest=time(10, 0), max_days=14) is None
+    # Nur Arbeitstage innerhalb max_days wurden angefasst
+    assert len(checked_days) == 2 * 4
+
+    not_before = datetime.combine(monday, time(9, 5))
+    slot = find_next_available(practice, monday, not_before=not_before)
+    assert slot.start_time.date() == monday + timedelta(days=2)
+
+
+def test_voice_gets_offer_instead_of_callback(practice):
+    monday = _monday(23)
+    ticket = auto_book_from_voice(practice, "Anrufer", "+4915100000400", monday - timedelta(days=1))
+    assert isinstance(ticket, TicketModel)
+    assert ticket.slot.start_time == datetime.combine(monday, time(9, 0))
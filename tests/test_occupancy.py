@@ -0,0 +1,104 @@
+# -------------------------------------------------
+# Belegungs-Index: Zähler, Bitmaps, Neuaufbau aus der DB
+# -------------------------------------------------
+
+from datetime import date, datetime, timedelta
+
+from database import SessionLocal
+from slots.occupancy import OccupancyIndex, occupancy_index
+from tickets import service
+from tickets.service import rebuild_occupancy_index
+
+DAY = date(2026, 11, 4)
+NINE = datetime(2026, 11, 4, 9, 0)
+NINE_THIRTY = datetime(2026, 11, 4, 9, 30)
+
+
+def test_try_book_respects_capacity_and_release():
+    index = OccupancyIndex()
+    assert index.try_book("p", NINE, capacity=2)
+    assert index.try_book("p", NINE, capacity=2)
+    assert not index.try_book("p", NINE, capacity=2)
+    assert index.booked_count("p", NINE) == 2
+    assert index.is_booked("p", NINE, capacity=2)
+
+    index.release("p", NINE)
+    assert not index.is_booked("p", NINE, capacity=2)
+    assert index.try_book("p", NINE, capacity=2)
+
+    # Andere Praxis / anderer Tag unabhängig
+    assert index.booked_count("q", NINE) == 0
+    assert index.booked_count("p", NINE + timedelta(days=1)) == 0
+
+
+def test_occupied_mask_follows_capacity():
+    index = OccupancyIndex()
+    index.book("p", NINE, capacity=1)
+    index.book("p", NINE_THIRTY, capacity=1)
+    index.book("p", NINE_THIRTY, capacity=1)
+
+    assert index.occupied_mask("p", DAY, capacity=1) == (1 << 540) | (1 << 570)
+    # Neue Kapazität → Bitmap aus den Zählern neu berechnet
+    assert index.occupied_mask("p", DAY, capacity=2) == 1 << 570
+    assert index.occupied_mask("p", DAY + timedelta(days=1)) == 0
+
+
+def test_day_version_is_derived_from_state():
+    index = OccupancyIndex()
+    empty = index.day_version("p", DAY)
+    index.book("p", NINE)
+    booked = index.day_version("p", DAY)
+    assert booked != empty
+
+    index.release("p", NINE)
+    assert index.day_version("p", DAY) == empty
+    assert index.stats() == {"days": 0, "booked_slots": 0}
+
+    # Gleicher Zustand in einem anderen Index (Worker) → gleiche Version
+    other = OccupancyIndex()
+    other.rebuild([("p", NINE)])
+    assert other.day_version("p", DAY) == booked
+
+
+def test_rebuild_replaces_index():
+    index = OccupancyIndex()
+    index.book("p", NINE)
+    assert index.rebuild([("q", NINE), ("q", NINE), ("q", NINE_THIRTY)]) == 3
+    assert index.booked_count("p", NINE) == 0
+    assert index.booked_count("q", NINE) == 2
+    assert index.occupied_mask("q", DAY, capacity=2) == 1 << 540
+    assert index.stats() == {"days": 1, "booked_slots": 3}
+
+
+def test_bookings_get_distinct_slots_and_index_matches_db(client, monkeypatch):
+    day = date.today() + timedelta(days=110)
+    while day.weekday() > 4:
+        day += timedelta(days=1)
+
+    starts = []
+    for i in range(3):
+        response = client.post("/book", json={
+            "practice_id": "physio_default_30min",
+            "patient_name": f"Index {i}",
+            "requested_date": day.isoformat(),
+        })
+        starts.append(datetime.fromisoformat(response.json()["slot"]["start_time"]))
+    # Nicht jeder Anrufer bekommt den ersten Slot des Tages
+    assert len(set(starts)) == 3
+
+    slots = client.get("/slots", params={"practice_id": "physio_default_30min", "date_str": day.isoformat()}).json()
+    taken = {datetime.fromisoformat(s["start_time"]) for s in slots if not s["is_bookable"]}
+    assert set(starts) <= taken
+
+    # Neuaufbau aus der DB (wie beim Start) in einen frischen Index –
+    # der laufende hält auch Slot-Holds, die nicht in der DB stehen
+    rebuilt = OccupancyIndex()
+    monkeypatch.setattr(service, "occupancy_index", rebuilt)
+    db = SessionLocal()
+    try:
+        rebuild_occupancy_index(db)
+    finally:
+        db.close()
+    for start in starts:
+        assert rebuilt.booked_count("physio_default_30min", start) == 1
+        assert occupancy_index.booked_count("physio_default_30min", start) == 1
@@ -0,0 +1,176 @@
+# -------------------------------------------------
+# Outbox → Kalender gegen einen lokalen Fake-Kalender
+# -------------------------------------------------
+# Der Fake spricht das Google-REST-Format (POST …/calendars/<id>/events),
+# antwortet für bekannte Event-IDs mit 409 und kann die ersten N Aufrufe
+# mit 503 ablehnen.
+
+import json
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from database_models import OutboxEvent
+from outbox import service as outbox_service
+from outbox.service import CALENDAR_CREATE_EVENT, STATUS_DONE, STATUS_PENDING
+from outbox.worker import OutboxWorker, calendar_handler
+from physio_services import calendar_service
+from physio_services.calendar_service import CalendarService
+
+PRACTICE_ID = "physio_default_20min"
+
+
+class FakeCalendar:
+    def __init__(self):
+        self.events = {}
+        self.calls = 0
+        self.fail_first = 0
+        self.lock = threading.Lock()
+
+        calendar = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with calendar.lock:
+                    calendar.calls += 1
+                    if calendar.calls <= calendar.fail_first:
+                        self.send_response(503)
+                        self.end_headers()
+                        return
+                    code = 409 if body["id"] in calendar.events else 200
+                    calendar.events.setdefault(body["id"], body)
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+
+@pytest.fixture
+def fake_calendar(monkeypatch, db):
+    calendar = FakeCalendar()
+    monkeypatch.setattr(calendar_service, "CALENDAR_API_URL", calendar.url)
+    # Nur die Events dieses Tests zählen
+    db.query(OutboxEvent).delete()
+    db.commit()
+    yield calendar
+    calendar.server.shutdown()
+
+
+@pytest.fixture
+def worker():
+    from database import SessionLocal
+
+    return OutboxWorker(
+        SessionLocal,
+        {CALENDAR_CREATE_EVENT: calendar_handler(CalendarService())},
+        workers=1,
+        batch_size=50,
+    )
+
+
+def _book(client, count: int, days_ahead: int) -> None:
+    requested = date.today() + timedelta(days=days_ahead)
+    response = client.post("/book/batch", json=[
+        {
+            "practice_id": PRACTICE_ID,
+            "patient_name": f"Outbox {i}",
+            "requested_date": requested.isoformat(),
+        }
+        for i in range(count)
+    ])
+    assert response.status_code == 200, response.text
+
+
+def _drain(worker: OutboxWorker) -> None:
+    while worker.run_once("test-worker"):
+        pass
+
+
+def _statuses(db) -> list:
+    db.expire_all()
+    return [status for (status,) in db.query(OutboxEvent.status).all()]
+
+
+def test_events_are_delivered_once(client, db, fake_calendar, worker):
+    _book(client, 60, days_ahead=120)
+    _drain(worker)
+
+    assert len(fake_calendar.events) == 60
+    assert set(_statuses(db)) == {STATUS_DONE}
+
+    # Erneutes Senden (z. B. nach abgelaufener Lease) legt nichts doppelt an
+    db.query(OutboxEvent).update({OutboxEvent.status: STATUS_PENDING})
+    db.commit()
+    _drain(worker)
+    assert len(fake_calendar.events) == 60
+    assert set(_statuses(db)) == {STATUS_DONE}
+
+
+def test_failed_calls_are_retried_with_backoff(client, db, fake_calendar, worker):
+    fake_calendar.fail_first = 5
+    _book(client, 10, days_ahead=130)
+
+    _drain(worker)
+    db.expire_all()
+    retrying = db.query(OutboxEvent).filter(OutboxEvent.status == STATUS_PENDING).all()
+    assert len(retrying) == 5
+    assert all(e.attempts == 1 and e.next_attempt_at > datetime.utcnow() for e in retrying)
+
+    # Backoff abgelaufen → Zustellung
+    db.query(OutboxEvent).update({OutboxEvent.next_attempt_at: datetime.utcnow()})
+    db.commit()
+    _drain(worker)
+    assert len(fake_calendar.events) == 10
+    assert set(_statuses(db)) == {STATUS_DONE}
+
+
+class _Crash(BaseException):
+    """Simulierter Prozess-Absturz mitten im Batch."""
+
+
+def test_each_event_is_committed_before_the_next_send(client, db, fake_calendar, worker):
+    _book(client, 5, days_ahead=140)
+    deliver = worker.handlers[CALENDAR_CREATE_EVENT]
+    sent = []
+
+    def crash_on_third(payload, idempotency_key):
+        if len(sent) == 2:
+            raise _Crash()
+        deliver(payload, idempotency_key)
+        sent.append(idempotency_key)
+
+    worker.handlers = {CALENDAR_CREATE_EVENT: crash_on_third}
+    with pytest.raises(_Crash):
+        worker.run_once("test-worker")
+
+    assert _statuses(db).count(STATUS_DONE) == 2
+
+
+def test_short_lease_releases_the_rest_of_the_batch(client, db, fake_calendar, worker, monkeypatch):
+    _book(client, 5, days_ahead=150)
+    # Rest-Lease reicht nie für einen Aufruf → nichts senden, alles freigeben
+    monkeypatch.setattr(
+        outbox_service, "OUTBOX_HANDLER_TIMEOUT_SECONDS", outbox_service.OUTBOX_LEASE_SECONDS + 1
+    )
+
+    assert worker.run_once("test-worker") == 0
+    assert fake_calendar.calls == 0
+    db.expire_all()
+    assert all(
+        e.locked_by is None and e.status == STATUS_PENDING
+        for e in db.query(OutboxEvent).all()
+    )
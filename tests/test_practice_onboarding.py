@@ -0,0 +1,81 @@
+# -------------------------------------------------
+# Neue Praxis ohne Deploy: Zeitplan per PUT → Slots → Buchung
+# -------------------------------------------------
+
+from datetime import date, timedelta
+
+from database_models import PracticeSchedule as PracticeScheduleRow
+from slots.registry import schedule_registry
+
+SCHEDULE = {
+    "slot_duration_minutes": 30,
+    "days": {str(weekday): {"open": "09:00", "close": "12:00"} for weekday in range(5)},
+    "resources": ["Raum 1", "Raum 2"],
+}
+
+
+def _weekday(start: date) -> date:
+    while start.weekday() > 4:
+        start += timedelta(days=1)
+    return start
+
+
+def test_new_practice_gets_slots_and_bookings(client):
+    practice_id = "physio_neu_onboarding"
+    day = _weekday(date.today() + timedelta(days=40))
+
+    # Vorher unbekannt → 422 wie jede ungültige Praxis
+    assert client.get("/slots", params={"practice_id": practice_id, "date_str": day.isoformat()}).status_code == 422
+
+    response = client.put(f"/api/practices/{practice_id}/schedule", json=SCHEDULE)
+    assert response.status_code == 200, response.text
+
+    response = client.get("/slots", params={"practice_id": practice_id, "date_str": day.isoformat()})
+    assert response.status_code == 200, response.text
+    slots = response.json()
+    assert [s["start_time"][11:16] for s in slots] == ["09:00", "09:30", "10:00", "10:30", "11:00", "11:30"]
+    assert all(s["remaining_capacity"] == 2 for s in slots)
+
+    response = client.post("/book", json={
+        "practice_id": practice_id,
+        "patient_name": "Neue Praxis",
+        "requested_date": day.isoformat(),
+        "requested_time": "10:00",
+    })
+    assert response.status_code == 200, response.text
+    ticket = response.json()
+    assert ticket["status"] == "booked"
+    assert ticket["practice_id"] == practice_id
+    assert ticket["slot"]["start_time"] == f"{day.isoformat()}T10:00:00"
+
+    response = client.get("/slots", params={"practice_id": practice_id, "date_str": day.isoformat()})
+    ten = next(s for s in response.json() if s["start_time"].endswith("10:00:00"))
+    assert ten["remaining_capacity"] == 1
+
+    response = client.get("/tickets", params={"practice_id": practice_id})
+    assert response.status_code == 200
+    assert [t["slot"]["start_time"] for t in response.json()] == [ticket["slot"]["start_time"]]
+
+
+def test_unknown_practice_is_rejected(client):
+    day = date.today().isoformat()
+    assert client.get("/slots", params={"practice_id": "gibt_es_nicht", "date_str": day}).status_code == 422
+    response = client.post("/book", json={
+        "practice_id": "gibt_es_nicht", "patient_name": "X", "requested_date": day,
+    })
+    assert response.status_code == 422
+
+
+def test_registry_load_drops_deleted_schedules(client, db):
+    practice_id = "physio_neu_geloescht"
+    day = _weekday(date.today() + timedelta(days=41)).isoformat()
+    assert client.put(f"/api/practices/{practice_id}/schedule", json=SCHEDULE).status_code == 200
+    assert client.get("/slots", params={"practice_id": practice_id, "date_str": day}).status_code == 200
+
+    db.query(PracticeScheduleRow).filter(PracticeScheduleRow.practice_id == practice_id).delete()
+    db.commit()
+    schedule_registry.load(db)
+
+    assert schedule_registry.get(practice_id) is None
+    assert schedule_registry.get("physio_default_20min") is not None
+    assert client.get("/slots", params={"practice_id": practice_id, "date_str": day}).status_code == 422
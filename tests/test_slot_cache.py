@@ -0,0 +1,60 @@
+# -------------------------------------------------
+# Slot-Cache für /slots (LRU je Praxis & Tag, Treffer/Fehlzugriffe)
+# -------------------------------------------------
+
+from datetime import date, timedelta
+
+from slots.dispatcher import get_day_slots, get_day_slots_json, slot_cache_stats
+from slots.templates import SlotCache
+
+PRACTICE_ID = "physio_krebs_nottuln"
+
+
+def _weekday(start: date) -> date:
+    while start.weekday() not in (0, 3):  # Montag / Donnerstag: nur Behandlung & Verwaltung
+        start += timedelta(days=1)
+    return start
+
+
+def test_repeated_day_is_a_hit_and_booking_invalidates(client):
+    day = _weekday(date.today() + timedelta(days=70))
+    params = {"practice_id": PRACTICE_ID, "date_str": day.isoformat()}
+
+    before = slot_cache_stats()
+    first = client.get("/slots", params=params)
+    second = client.get("/slots", params=params)
+    after = slot_cache_stats()
+
+    assert first.content == second.content
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+    assert client.get("/api/metrics").json()["slot_cache"]["hits"] >= after["hits"]
+
+    # Buchung ändert die Belegungsversion → neuer Key, aktuelle Antwort
+    response = client.post("/book", json={
+        "practice_id": PRACTICE_ID,
+        "patient_name": "Cache",
+        "requested_date": day.isoformat(),
+        "requested_time": "09:00",
+    })
+    assert response.status_code == 200, response.text
+    booked_start = response.json()["slot"]["start_time"]
+
+    third = client.get("/slots", params=params)
+    assert slot_cache_stats()["misses"] - after["misses"] == 1
+    slot = next(s for s in third.json() if s["start_time"] == booked_start)
+    assert slot["is_bookable"] is False
+    assert third.content == get_day_slots(PRACTICE_ID, day).to_json()
+    assert get_day_slots_json(PRACTICE_ID, day) == third.content
+
+
+def test_slot_cache_is_bounded_lru():
+    cache = SlotCache(maxsize=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"  # a zuletzt benutzt
+    cache.put("c", b"3")           # verdrängt b
+
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2, "maxsize": 2}
@@ -0,0 +1,87 @@
+# -------------------------------------------------
+# Kapazität je Slot bei mehreren Therapeuten / Räumen
+# -------------------------------------------------
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+from database_models import SlotReservation, Ticket
+from slots.dispatcher import practice_capacity
+
+PRACTICE_ID = "physio_drei_raeume"
+SCHEDULE = {
+    "slot_duration_minutes": 30,
+    "days": {str(weekday): {"open": "09:00", "close": "12:00"} for weekday in range(5)},
+    "resources": ["Raum 1", "Raum 2", "Raum 3"],
+}
+
+
+def _weekday(start: date) -> date:
+    while start.weekday() > 4:
+        start += timedelta(days=1)
+    return start
+
+
+def _remaining(client, day: date) -> dict:
+    response = client.get("/slots", params={"practice_id": PRACTICE_ID, "date_str": day.isoformat()})
+    assert response.status_code == 200, response.text
+    return {s["start_time"][11:16]: s["remaining_capacity"] for s in response.json()}
+
+
+def _book(client, day: date, name: str) -> dict:
+    response = client.post("/book", json={
+        "practice_id": PRACTICE_ID,
+        "patient_name": name,
+        "requested_date": day.isoformat(),
+        "requested_time": "10:00",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_each_booking_takes_one_resource(client, db):
+    assert client.put(f"/api/practices/{PRACTICE_ID}/schedule", json=SCHEDULE).status_code == 200
+    assert practice_capacity(PRACTICE_ID) == 3
+    # Bestehende Ein-Platz-Praxen unverändert
+    assert practice_capacity("physio_default_30min") == 1
+
+    day = _weekday(date.today() + timedelta(days=100))
+    assert _remaining(client, day)["10:00"] == 3
+
+    booked = [_book(client, day, f"Raum {i}") for i in range(3)]
+    assert all(t["slot"]["start_time"].endswith("10:00:00") for t in booked)
+    assert _remaining(client, day)["10:00"] == 0
+
+    # Voll → nächstgelegener Slot
+    overflow = _book(client, day, "Überlauf")
+    assert not overflow["slot"]["start_time"].endswith("10:00:00")
+
+    resources = sorted(
+        r for (r,) in db.query(SlotReservation.resource).filter(
+            SlotReservation.practice_id == PRACTICE_ID,
+            SlotReservation.slot_start == datetime.combine(day, time(10, 0)),
+        )
+    )
+    assert resources == [0, 1, 2]
+
+    # Storno gibt genau einen Platz frei
+    cancelled = db.query(Ticket.id).filter(
+        Ticket.practice_id == PRACTICE_ID, Ticket.patient_name == "Raum 1"
+    ).scalar()
+    response = client.patch(
+        f"/tickets/{cancelled}/status", params={"practice_id": PRACTICE_ID, "status": "closed"}
+    )
+    assert response.status_code == 200, response.text
+    assert _remaining(client, day)["10:00"] == 1
+
+
+def test_parallel_bookings_fill_capacity_exactly(client, db):
+    assert client.put(f"/api/practices/{PRACTICE_ID}/schedule", json=SCHEDULE).status_code == 200
+    day = _weekday(date.today() + timedelta(days=101))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: _book(client, day, f"Parallel {i}"), range(8)))
+
+    at_ten = [t for t in results if t["slot"]["start_time"].endswith("10:00:00")]
+    assert len(at_ten) == 3
+    assert _remaining(client, day)["10:00"] == 0
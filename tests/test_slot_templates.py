@@ -0,0 +1,85 @@
+# -------------------------------------------------
+# Kompilierte Tagesvorlagen (Admin- / Hausbesuchszeiten)
+# -------------------------------------------------
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from schemas import DaySchedule, PracticeSchedule, SlotType
+from slots.builtin_schedules import KREBS_NOTTULN
+from slots.templates import EMPTY_DAY, compile_day, compile_schedule
+
+DAY = date(2026, 11, 2)  # Montag
+
+
+def _reference(day: DaySchedule, duration: int) -> list:
+    """Frühere Implementierung: je Slot alle Bereiche durchlaufen."""
+    def in_ranges(start: datetime, ranges) -> bool:
+        return any(
+            datetime.combine(DAY, a) <= start < datetime.combine(DAY, b) for a, b in ranges
+        )
+
+    slots = []
+    start = datetime.combine(DAY, day.open)
+    close = datetime.combine(DAY, day.close)
+    while start + timedelta(minutes=duration) <= close:
+        if in_ranges(start, day.house_visit):
+            slot_type = SlotType.HOUSE_VISIT
+        elif in_ranges(start, day.admin):
+            slot_type = SlotType.ADMIN
+        else:
+            slot_type = SlotType.TREATMENT
+        slots.append((start.hour * 60 + start.minute, slot_type, slot_type == SlotType.TREATMENT))
+        start += timedelta(minutes=duration)
+    return slots
+
+
+@pytest.mark.parametrize("weekday", sorted(KREBS_NOTTULN.days))
+def test_krebs_plan_matches_reference(weekday):
+    day = KREBS_NOTTULN.days[weekday]
+    template = compile_day(day, KREBS_NOTTULN.slot_duration_minutes)
+    compiled = list(zip(template.offsets, template.slot_types, template.bookable))
+    assert compiled == _reference(day, KREBS_NOTTULN.slot_duration_minutes)
+
+
+def test_dense_blocks_at_ten_minute_granularity():
+    day = DaySchedule(
+        open=time(8, 0),
+        close=time(9, 0),
+        admin=[(time(8, 10), time(8, 30)), (time(8, 40), time(9, 0))],
+        house_visit=[(time(8, 20), time(8, 50))],  # Vorrang vor Verwaltung
+    )
+    template = compile_day(day, 10)
+    assert template.offsets == (480, 490, 500, 510, 520, 530)
+    assert template.slot_types == (
+        SlotType.TREATMENT, SlotType.ADMIN, SlotType.HOUSE_VISIT,
+        SlotType.HOUSE_VISIT, SlotType.HOUSE_VISIT, SlotType.ADMIN,
+    )
+    assert template.bookable == (True, False, False, False, False, False)
+    assert template.bookable_mask == 1 << 480
+    assert template.bookable_mask_by_type == {SlotType.TREATMENT: 1 << 480}
+
+
+def test_last_slot_must_fit_before_close():
+    template = compile_day(DaySchedule(open=time(8, 0), close=time(9, 10)), 20)
+    assert template.offsets == (480, 500, 520)
+    assert compile_day(DaySchedule(open=time(8, 0), close=time(8, 10)), 20) is EMPTY_DAY
+
+
+def test_schedule_has_seven_days_and_stamps_occupancy():
+    schedule = PracticeSchedule(
+        slot_duration_minutes=30,
+        days={0: DaySchedule(open=time(9, 0), close=time(10, 30), admin=[(time(10, 0), time(10, 30))])},
+    )
+    template = compile_schedule(schedule)
+    assert len(template) == 7
+    assert all(day is EMPTY_DAY for day in template[1:])
+
+    monday = template[0]
+    counts = bytearray(24 * 60)
+    counts[540] = 1
+    day_slots = monday.stamp_compact(DAY, occupied_mask=1 << 540, minute_counts=counts)
+    assert [day_slots.is_bookable(i) for i in range(len(day_slots))] == [False, True, False]
+    assert day_slots.first_bookable() == 1
+    assert day_slots.start_time(1) == datetime(2026, 11, 2, 9, 30)
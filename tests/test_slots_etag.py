@@ -0,0 +1,31 @@
+# -------------------------------------------------
+# ETag / If-None-Match für /slots
+# -------------------------------------------------
+
+from datetime import date, timedelta
+
+from slots.etag import etag_matches
+
+ETAG = '"abc123"'
+
+
+def test_etag_matches_strong_weak_and_lists():
+    assert etag_matches('"abc123"', ETAG)
+    assert etag_matches('W/"abc123"', ETAG)
+    assert etag_matches('"other", W/"abc123"', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches('W/"other"', ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+
+
+def test_slots_weak_if_none_match_returns_304(client):
+    day = (date.today() + timedelta(days=200)).isoformat()
+    params = {"practice_id": "physio_default_30min", "date_str": day}
+
+    response = client.get("/slots", params=params)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached = client.get("/slots", params=params, headers={"If-None-Match": f"W/{etag}"})
+    assert cached.status_code == 304
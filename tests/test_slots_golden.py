@@ -0,0 +1,60 @@
+# -------------------------------------------------
+# Golden-Test: Schedule-Registry vs. alte Slot-Generatoren
+# -------------------------------------------------
+# golden/baseline_slots.json wurde einmalig mit den alten, fest codierten
+# Generatoren erzeugt (slots/default20.py, default30.py,
+# physio_krebs_nottuln.py – Stand vor der Schedule-Registry): zwei Wochen
+# ohne Buchungen, alle drei Praxen. Registry, /slots (Tag) und /slots
+# (Bereich) müssen exakt dieselben Slots liefern.
+
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from slots.dispatcher import get_day_slots
+
+GOLDEN = json.loads((Path(__file__).parent / "golden" / "baseline_slots.json").read_text())
+FIELDS = ("start_time", "end_time", "duration_minutes", "slot_type", "is_bookable")
+
+
+def _expected(day: str, rows) -> list:
+    def at(hhmm: str) -> str:
+        return datetime.combine(date.fromisoformat(day), datetime.strptime(hhmm, "%H:%M").time()).isoformat()
+
+    return [
+        {
+            "start_time": at(start),
+            "end_time": at(end),
+            "duration_minutes": duration,
+            "slot_type": slot_type,
+            "is_bookable": bookable,
+        }
+        for start, end, duration, slot_type, bookable in rows
+    ]
+
+
+def _fields(slots) -> list:
+    return [{field: slot[field] for field in FIELDS} for slot in slots]
+
+
+@pytest.mark.parametrize("practice_id", sorted(GOLDEN))
+def test_registry_matches_baseline_generators(client, practice_id):
+    days = GOLDEN[practice_id]
+
+    for day, rows in days.items():
+        expected = _expected(day, rows)
+
+        models = get_day_slots(practice_id, date.fromisoformat(day)).to_models()
+        assert _fields(m.model_dump(mode="json") for m in models) == expected, day
+
+        response = client.get("/slots", params={"practice_id": practice_id, "date_str": day})
+        assert response.status_code == 200
+        assert _fields(response.json()) == expected, day
+
+    first, last = min(days), max(days)
+    response = client.get("/slots", params={"practice_id": practice_id, "from": first, "to": last})
+    assert response.status_code == 200
+    expected = [slot for day in sorted(days) for slot in _expected(day, days[day])]
+    assert _fields(response.json()) == expected
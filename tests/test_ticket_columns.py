@@ -0,0 +1,91 @@
+# -------------------------------------------------
+# Ticket-Spalten aus `data`: set_data und Backfill-Migration
+# -------------------------------------------------
+
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+
+from database import make_engine
+from database_models import Ticket
+from migrations import runner
+from migrations.runner import run_migrations
+from schemas import BookingRequest, SlotModel, SlotType, TicketModel, TicketStatus
+
+PRACTICE_ID = "physio_default_20min"
+DAY = date(2026, 11, 2)
+START = datetime(2026, 11, 2, 9, 20)
+
+
+def _ticket_model(phone="+4915100000100", slot=True) -> TicketModel:
+    return TicketModel(
+        practice_id=PRACTICE_ID,
+        status=TicketStatus.BOOKED if slot else TicketStatus.CALLBACK,
+        booking_request=BookingRequest(
+            practice_id=PRACTICE_ID, patient_name="Spalte", patient_phone=phone, requested_date=DAY,
+        ),
+        slot=SlotModel(
+            start_time=START,
+            end_time=START + timedelta(minutes=20),
+            duration_minutes=20,
+            slot_type=SlotType.TREATMENT,
+        ) if slot else None,
+    )
+
+
+def test_set_data_keeps_columns_in_sync():
+    ticket = Ticket(practice_id=PRACTICE_ID)
+    ticket.set_data(_ticket_model())
+    assert (ticket.patient_name, ticket.patient_phone, ticket.requested_date) == ("Spalte", "+4915100000100", DAY)
+    assert (ticket.slot_start, ticket.slot_end) == (START, START + timedelta(minutes=20))
+
+    # Erneutes set_data überschreibt bzw. leert die Spalten
+    ticket.set_data(_ticket_model(phone=None, slot=False))
+    assert ticket.patient_phone is None
+    assert ticket.slot_start is None and ticket.slot_end is None
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """DB im Stand vor den Spalten: tickets nur mit `data`."""
+    engine = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tickets (id INTEGER PRIMARY KEY, practice_id VARCHAR NOT NULL, "
+            "status VARCHAR, created_at DATETIME, data JSON NOT NULL, "
+            "insurance_status VARCHAR NOT NULL DEFAULT 'gesetzlich', "
+            "prescription_required VARCHAR NOT NULL DEFAULT 'no')"
+        ))
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def test_hot_column_migration_backfills_in_batches(legacy_engine, monkeypatch):
+    monkeypatch.setattr(runner, "MIGRATION_BATCH_SIZE", 2)
+    models = [_ticket_model(phone=f"+49151000002{i:02d}", slot=i % 2 == 0) for i in range(5)]
+    with legacy_engine.begin() as conn:
+        for i, model in enumerate(models, start=1):
+            conn.execute(
+                text("INSERT INTO tickets (id, practice_id, status, created_at, data) VALUES (:id, :p, :s, :c, :d)"),
+                {"id": i, "p": PRACTICE_ID, "s": model.status.value, "c": datetime(2026, 1, 1),
+                 "d": json.dumps(model.model_dump(mode="json"))},
+            )
+
+    run_migrations(legacy_engine, wait_seconds=0)
+
+    with legacy_engine.connect() as conn:
+        columns = {c["name"] for c in inspect(conn).get_columns("tickets")}
+        assert {"patient_name", "patient_phone", "requested_date", "slot_start", "slot_end"} <= columns
+        rows = conn.execute(text(
+            "SELECT patient_phone, requested_date, slot_start FROM tickets ORDER BY id"
+        )).all()
+        indexes = {i["name"] for i in inspect(conn).get_indexes("tickets")}
+
+    assert [row.patient_phone for row in rows] == [m.booking_request.patient_phone for m in models]
+    assert all(row.requested_date == DAY.isoformat() for row in rows)
+    assert [row.slot_start is not None for row in rows] == [True, False, True, False, True]
+    assert {"ix_tickets_practice_phone_created", "ix_tickets_practice_slot_start"} <= indexes
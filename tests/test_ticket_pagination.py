@@ -0,0 +1,112 @@
+# -------------------------------------------------
+# Keyset-Pagination über /tickets und /api/inbox
+# -------------------------------------------------
+# Reihenfolge (created_at, id) absteigend, Cursor im Header X-Next-Cursor.
+
+from datetime import date, datetime, timedelta
+
+from archive.service import archive_tickets
+from database_models import Ticket
+from schemas import BookingRequest, TicketModel, TicketStatus
+from tickets.service import NEXT_CURSOR_HEADER, create_tickets_bulk
+
+SCHEDULE = {
+    "slot_duration_minutes": 30,
+    "days": {"0": {"open": "09:00", "close": "12:00"}},
+}
+ORIGIN = "http://dashboard.test"
+
+
+def _practice(client, practice_id: str) -> str:
+    assert client.put(f"/api/practices/{practice_id}/schedule", json=SCHEDULE).status_code == 200
+    return practice_id
+
+
+def _tickets(db, practice_id: str, created_at: list) -> list:
+    """Legt je Zeitstempel ein Ticket an und setzt created_at fest."""
+    tickets = create_tickets_bulk(db, [
+        TicketModel(
+            practice_id=practice_id,
+            status=TicketStatus.CALLBACK,
+            booking_request=BookingRequest(
+                practice_id=practice_id, patient_name=f"Seite {i}", requested_date=date.today(),
+            ),
+        )
+        for i in range(len(created_at))
+    ])
+    for ticket, stamp in zip(tickets, created_at):
+        db.query(Ticket).filter(Ticket.id == ticket.id).update({Ticket.created_at: stamp})
+    db.commit()
+    return [t.id for t in tickets]
+
+
+def _pages(client, path: str, practice_id: str, limit: int, between=None, **params) -> list:
+    pages, cursor = [], None
+    while True:
+        query = {"practice_id": practice_id, "limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(path, params=query)
+        assert response.status_code == 200, response.text
+        pages.append([int(item.get("ticket_id") or item["id"]) for item in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+        if between:
+            between()
+
+
+def test_ties_on_created_at_are_ordered_by_id(client, db):
+    practice_id = _practice(client, "physio_pages_ties")
+    stamp = datetime(2026, 3, 1, 9, 0)
+    ids = _tickets(db, practice_id, [stamp] * 5)
+
+    for path in ("/tickets", "/api/inbox"):
+        pages = _pages(client, path, practice_id, limit=2)
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert sum(pages, []) == sorted(ids, reverse=True)
+
+
+def test_inserts_between_pages_do_not_shift_pages(client, db):
+    practice_id = _practice(client, "physio_pages_inserts")
+    base = datetime(2026, 3, 2, 9, 0)
+    ids = _tickets(db, practice_id, [base + timedelta(minutes=i) for i in range(6)])
+
+    inserted = []
+    seen = sum(_pages(
+        client, "/tickets", practice_id, limit=2,
+        between=lambda: inserted.extend(_tickets(db, practice_id, [datetime.utcnow()])),
+    ), [])
+
+    # Neue Tickets landen vor dem Cursor: keine Dubletten, keine Lücken
+    assert seen == sorted(ids, reverse=True)
+    assert len(inserted) == 2
+    first = client.get("/tickets", params={"practice_id": practice_id, "limit": 2}).json()
+    assert [int(t["ticket_id"]) for t in first] == sorted(inserted, reverse=True)
+
+
+def test_archive_merge_keeps_order_across_pages(client, db):
+    practice_id = _practice(client, "physio_pages_archive")
+    base = datetime(2026, 3, 3, 9, 0)
+    ids = _tickets(db, practice_id, [base + timedelta(minutes=i // 2) for i in range(7)])
+    archived = ids[::2]
+    assert archive_tickets(db, archived) == len(archived)
+
+    live = sum(_pages(client, "/tickets", practice_id, limit=2), [])
+    assert live == sorted(set(ids) - set(archived), reverse=True)
+
+    merged = sum(_pages(client, "/tickets", practice_id, limit=2, include_archive="true"), [])
+    expected = sorted(ids, key=lambda i: (base + timedelta(minutes=ids.index(i) // 2), i), reverse=True)
+    assert merged == expected
+
+
+def test_next_cursor_header_is_exposed_to_browsers(client, db):
+    practice_id = _practice(client, "physio_pages_cors")
+    _tickets(db, practice_id, [datetime(2026, 3, 4, 9, 0)] * 2)
+
+    response = client.get(
+        "/tickets", params={"practice_id": practice_id, "limit": 1}, headers={"Origin": ORIGIN},
+    )
+    assert response.headers[NEXT_CURSOR_HEADER]
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert NEXT_CURSOR_HEADER.lower() in response.headers["access-control-expose-headers"].lower()
@@ -0,0 +1,88 @@
+# -------------------------------------------------
+# Ticket-Listen: Query-Plan nutzt die Composite-Indizes
+# -------------------------------------------------
+# Jede Variante (mit/ohne Status, mit/ohne Zeitraum, Keyset-Seiten) muss
+# über ix_tickets_practice_* laufen – ohne Full Scan und ohne
+# nachträgliches Sortieren (SQLite: "USE TEMP B-TREE FOR ORDER BY").
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from database import engine
+from schemas import TicketStatus
+from tickets.service import (
+    list_ticket_rows,
+    list_ticket_rows_page,
+    list_tickets,
+    list_tickets_page,
+)
+
+PRACTICE_ID = "physio_default_20min"
+DAY = datetime(2026, 10, 18)
+
+
+@contextmanager
+def _captured_ticket_queries():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM tickets" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def _query_plan(statement, parameters) -> list:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[3] for row in rows]
+
+
+VARIANTS = {
+    "all": (lambda db: list_tickets(db, PRACTICE_ID), "ix_tickets_practice_created"),
+    "status": (
+        lambda db: list_tickets(db, PRACTICE_ID, status=TicketStatus.CALLBACK),
+        "ix_tickets_practice_status_created",
+    ),
+    "range": (
+        lambda db: list_tickets(db, PRACTICE_ID, created_from=DAY, created_to=DAY + timedelta(days=1)),
+        "ix_tickets_practice_created",
+    ),
+    "status_range": (
+        lambda db: list_ticket_rows(
+            db, PRACTICE_ID, status=TicketStatus.BOOKED,
+            created_from=DAY, created_to=DAY + timedelta(days=1),
+        ),
+        "ix_tickets_practice_status_created",
+    ),
+    "page": (lambda db: list_tickets_page(db, PRACTICE_ID, limit=20), "ix_tickets_practice_created"),
+    "page_status": (
+        lambda db: list_ticket_rows_page(db, PRACTICE_ID, status=TicketStatus.BOOKED, limit=20),
+        "ix_tickets_practice_status_created",
+    ),
+    "page_phone": (
+        lambda db: list_tickets_page(db, PRACTICE_ID, limit=20, patient_phone="+4925020000"),
+        "ix_tickets_practice_phone_created",
+    ),
+}
+
+
+@pytest.mark.parametrize("variant", sorted(VARIANTS))
+def test_list_tickets_uses_composite_index(db, variant):
+    run, index = VARIANTS[variant]
+
+    with _captured_ticket_queries() as statements:
+        run(db)
+
+    assert statements, "keine Ticket-Abfrage ausgeführt"
+    for statement, parameters in statements:
+        plan = _query_plan(statement, parameters)
+        assert any(index in step for step in plan), plan
+        assert not any("TEMP B-TREE" in step for step in plan), plan
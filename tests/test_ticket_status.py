@@ -0,0 +1,150 @@
+# -------------------------------------------------
+# Statuswechsel: einzeln, Bulk, Löschen
+# -------------------------------------------------
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from database_models import OutboxEvent, SlotReservation, Ticket
+from schemas import BookingRequest, SlotModel, SlotType, TicketModel, TicketStatus
+from slots.occupancy import occupancy_index
+from tickets import service
+from tickets.service import (
+    bulk_update_ticket_status,
+    create_ticket,
+    create_tickets_bulk,
+    delete_ticket,
+    update_ticket_status,
+)
+
+# Ohne Wartelisten-Einträge: frei gewordene Slots bleiben frei
+BOOKED_PRACTICE_ID = "physio_default_30min"
+SCHEDULE = {
+    "slot_duration_minutes": 30,
+    "days": {"0": {"open": "09:00", "close": "12:00"}},
+}
+
+
+def _weekday(start: date) -> date:
+    while start.weekday() > 4:
+        start += timedelta(days=1)
+    return start
+
+
+def _booked(day: date, hour: int) -> TicketModel:
+    start = datetime.combine(day, datetime.min.time()).replace(hour=hour)
+    return TicketModel(
+        practice_id=BOOKED_PRACTICE_ID,
+        booking_request=BookingRequest(
+            practice_id=BOOKED_PRACTICE_ID, patient_name="Status", requested_date=day
+        ),
+        slot=SlotModel(
+            start_time=start,
+            end_time=start + timedelta(minutes=30),
+            duration_minutes=30,
+            slot_type=SlotType.TREATMENT,
+        ),
+        status=TicketStatus.BOOKED,
+    )
+
+
+def _unbooked(practice_id: str, statuses: list) -> list:
+    return [
+        TicketModel(
+            practice_id=practice_id,
+            status=status,
+            booking_request=BookingRequest(
+                practice_id=practice_id, patient_name=f"Bulk {i}", requested_date=date.today()
+            ),
+        )
+        for i, status in enumerate(statuses)
+    ]
+
+
+def test_bulk_counts_only_changed_tickets_matching_ids_and_filter(client, db):
+    practice_id = "physio_bulk_status"
+    assert client.put(f"/api/practices/{practice_id}/schedule", json=SCHEDULE).status_code == 200
+    callback, other_callback, open_ticket, closed = create_tickets_bulk(db, _unbooked(practice_id, [
+        TicketStatus.CALLBACK, TicketStatus.CALLBACK, TicketStatus.OPEN, TicketStatus.CLOSED,
+    ]))
+
+    # ids ∩ Filter: nur das Rückruf-Ticket aus der Liste, das geschlossene zählt nicht
+    result = bulk_update_ticket_status(
+        db, practice_id, TicketStatus.CLOSED,
+        ticket_ids=[callback.id, open_ticket.id, closed.id], status=TicketStatus.CALLBACK,
+    )
+    assert result.updated == 1
+    assert result.released_slots == 0
+
+    statuses = dict(db.query(Ticket.id, Ticket.status).filter(Ticket.practice_id == practice_id))
+    assert statuses[callback.id] == TicketStatus.CLOSED
+    assert statuses[other_callback.id] == TicketStatus.CALLBACK
+    assert statuses[open_ticket.id] == TicketStatus.OPEN
+
+    # Nur Filter
+    response = client.patch(
+        "/tickets/status", params={"practice_id": practice_id},
+        json={"new_status": "closed", "status": "callback"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json() == {"updated": 1, "released_slots": 0}
+
+
+def test_bulk_releases_reserved_slots(client, db):
+    day = _weekday(date.today() + timedelta(days=70))
+    tickets = [create_ticket(db, _booked(day, hour)) for hour in (9, 10)]
+    starts = [t.slot_start for t in tickets]
+    assert all(occupancy_index.booked_count(BOOKED_PRACTICE_ID, s) == 1 for s in starts)
+
+    result = bulk_update_ticket_status(
+        db, BOOKED_PRACTICE_ID, TicketStatus.CLOSED, ticket_ids=[t.id for t in tickets]
+    )
+
+    assert result == (2, 2)
+    ids = [t.id for t in tickets]
+    assert db.query(SlotReservation).filter(SlotReservation.ticket_id.in_(ids)).count() == 0
+    assert all(occupancy_index.booked_count(BOOKED_PRACTICE_ID, s) == 0 for s in starts)
+
+
+def test_bulk_rejects_booked_target(client, db):
+    with pytest.raises(ValueError):
+        bulk_update_ticket_status(db, BOOKED_PRACTICE_ID, TicketStatus.BOOKED, ticket_ids=[1])
+
+    response = client.patch(
+        "/tickets/status", params={"practice_id": BOOKED_PRACTICE_ID},
+        json={"new_status": "booked", "ticket_ids": [1]},
+    )
+    assert response.status_code == 400
+
+
+def test_rebooking_closed_ticket_enqueues_calendar_event(client, db):
+    day = _weekday(date.today() + timedelta(days=71))
+    ticket = create_ticket(db, _booked(day, 11))
+    calendar_events = OutboxEvent.idempotency_key.like(f"calendar:ticket:{ticket.id}%")
+    assert db.query(OutboxEvent).filter(calendar_events).count() == 1
+
+    update_ticket_status(db, ticket.id, BOOKED_PRACTICE_ID, TicketStatus.CLOSED)
+    rebooked = update_ticket_status(db, ticket.id, BOOKED_PRACTICE_ID, TicketStatus.BOOKED)
+
+    assert rebooked.status == TicketStatus.BOOKED
+    events = db.query(OutboxEvent).filter(calendar_events).order_by(OutboxEvent.id).all()
+    assert len(events) == 2
+    assert events[1].payload["start"] == rebooked.slot.start_time.isoformat()
+
+
+def test_delete_rolls_back_on_error(client, db, monkeypatch):
+    day = _weekday(date.today() + timedelta(days=72))
+    ticket = create_ticket(db, _booked(day, 9))
+
+    def failing_delete(session, ticket_id):
+        raise IntegrityError("DELETE", {}, Exception("simuliert"))
+
+    monkeypatch.setattr(service, "_delete_reservations", failing_delete)
+    with pytest.raises(IntegrityError):
+        delete_ticket(db, ticket.id, BOOKED_PRACTICE_ID)
+
+    # Session ist wieder benutzbar, Ticket und Reservierung unverändert
+    assert db.query(Ticket).filter(Ticket.id == ticket.id).count() == 1
+    assert db.query(SlotReservation).filter(SlotReservation.ticket_id == ticket.id).count() == 1
@@ -0,0 +1,106 @@
+# -------------------------------------------------
+# Twilio-Webhook: Begrüßung, Stille bei offenem Terminangebot
+# -------------------------------------------------
+
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from database_models import Ticket
+from schemas import TicketStatus
+from slots.holds import slot_holds
+
+WEBHOOK = "/voice/twilio-webhook"
+GREETING = "Wie kann ich Ihnen helfen?"
+
+
+def test_first_call_gets_greeting(client):
+    response = client.post(WEBHOOK, data={"CallSid": "CA-begruessung", "From": "+4925021111"})
+    assert response.status_code == 200
+    assert GREETING in response.text
+    assert "<Gather" in response.text
+
+
+def test_speech_response_has_no_greeting(client):
+    response = client.post(f"{WEBHOOK}?turn=1", data={
+        "CallSid": "CA-rueckruf",
+        "From": "+4925022222",
+        "SpeechResult": "Bitte zurückrufen",
+    })
+    assert response.status_code == 200
+    assert "Wir rufen Sie gerne zurück" in response.text
+    assert GREETING not in response.text
+
+
+def test_silence_with_active_hold_repeats_offer(client):
+    call_sid = "CA-stille"
+    day = date.today() + timedelta(days=150)
+    start = datetime.combine(day, datetime.min.time()).replace(hour=11)
+    assert slot_holds.hold(call_sid, "physio_default_30min", start)
+    expires_at = slot_holds.get(call_sid).expires_at
+    try:
+        response = client.post(f"{WEBHOOK}?turn=2", data={"CallSid": call_sid, "From": "+4925023333"})
+        assert response.status_code == 200
+        assert start.strftime("%d.%m.%Y um %H:%M") in response.text
+        assert "?turn=3" in response.text
+        assert GREETING not in response.text
+
+        held = slot_holds.get(call_sid)
+        assert held is not None and held.start_time == start
+        assert held.expires_at > expires_at
+    finally:
+        slot_holds.release(call_sid)
+
+
+def _offer(client, call_sid: str, from_number: str) -> str:
+    response = client.post(f"{WEBHOOK}?turn=0", data={
+        "CallSid": call_sid, "From": from_number, "SpeechResult": "Ich möchte einen Termin buchen",
+    })
+    assert response.status_code == 200
+    assert "Ich kann Ihnen einen Termin" in response.text
+    return response.text
+
+
+def _expire(call_sid: str) -> None:
+    held = slot_holds.get(call_sid)
+    slot_holds.hold(call_sid, held.practice_id, held.start_time, ttl_seconds=0.001)
+    time.sleep(0.01)
+    assert slot_holds.get(call_sid) is None
+    assert slot_holds.lapsed(call_sid) is not None
+
+
+def _booked_tickets(db, from_number: str) -> int:
+    return (
+        db.query(Ticket)
+        .filter(Ticket.patient_phone == from_number, Ticket.status == TicketStatus.BOOKED)
+        .count()
+    )
+
+
+@pytest.mark.parametrize("answer", ["ähm, wie bitte", "ja"])
+def test_answer_after_expired_hold_offers_again(client, db, answer):
+    call_sid = f"CA-abgelaufen-{len(answer)}"
+    from_number = f"+492502{len(answer):04d}"
+    _offer(client, call_sid, from_number)
+    _expire(call_sid)
+
+    try:
+        response = client.post(f"{WEBHOOK}?turn=1", data={
+            "CallSid": call_sid, "From": from_number, "SpeechResult": answer,
+        })
+        assert response.status_code == 200
+        # Neues Angebot mit neuem Hold – gebucht wird erst nach erneutem "ja"
+        assert "Ich kann Ihnen einen Termin" in response.text
+        assert "gebucht" not in response.text
+        assert slot_holds.get(call_sid) is not None
+        assert slot_holds.lapsed(call_sid) is None
+        assert _booked_tickets(db, from_number) == 0
+
+        response = client.post(f"{WEBHOOK}?turn=2", data={
+            "CallSid": call_sid, "From": from_number, "SpeechResult": "ja",
+        })
+        assert "gebucht" in response.text
+        assert _booked_tickets(db, from_number) == 1
+    finally:
+        slot_holds.release(call_sid)
@@ -0,0 +1,120 @@
+# -------------------------------------------------
+# Warteliste: Nachrücken bei frei gewordenen Slots
+# -------------------------------------------------
+
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+from database_models import WaitlistEntry
+from schemas import BookingRequest, SlotModel, SlotType, TicketModel, TicketStatus, WaitlistRequest
+from tickets.service import bulk_update_ticket_status, create_ticket, update_ticket_status
+from waitlist import service as waitlist_service
+from waitlist.service import (
+    STATUS_BOOKED,
+    STATUS_WAITING,
+    WaitlistIndex,
+    add_to_waitlist,
+    backfill_released_slot,
+    waitlist_index,
+)
+
+PRACTICE_ID = "physio_default_20min"
+
+
+def _weekday(start: date) -> date:
+    while start.weekday() > 4:
+        start += timedelta(days=1)
+    return start
+
+
+def _book(db, day: date, hour: int, minute: int = 0):
+    start = datetime.combine(day, time(hour, minute))
+    return create_ticket(db, TicketModel(
+        practice_id=PRACTICE_ID,
+        booking_request=BookingRequest(practice_id=PRACTICE_ID, patient_name="Belegt", requested_date=day),
+        slot=SlotModel(
+            start_time=start,
+            end_time=start + timedelta(minutes=20),
+            duration_minutes=20,
+            slot_type=SlotType.TREATMENT,
+        ),
+        status=TicketStatus.BOOKED,
+    ))
+
+
+def _wait(db, day: date, earliest: time, latest: time, name: str) -> WaitlistEntry:
+    return add_to_waitlist(db, WaitlistRequest(
+        practice_id=PRACTICE_ID,
+        patient_name=name,
+        earliest_date=day,
+        latest_date=day,
+        earliest_time=earliest,
+        latest_time=latest,
+    ))
+
+
+def test_bulk_release_syncs_once_and_backfills_every_slot(client, db, monkeypatch):
+    day = _weekday(date.today() + timedelta(days=150))
+    tickets = [_book(db, day, 10, minute) for minute in (0, 20, 40)]
+    entries = [_wait(db, day, time(10, 0), time(10, 40), f"Bulk {i}") for i in range(3)]
+
+    syncs = []
+    sync = waitlist_index.sync
+    monkeypatch.setattr(waitlist_index, "sync", lambda session: syncs.append(1) or sync(session))
+
+    result = bulk_update_ticket_status(
+        db, PRACTICE_ID, TicketStatus.CLOSED, ticket_ids=[t.id for t in tickets]
+    )
+
+    assert result.released_slots == 3
+    assert len(syncs) == 1
+    for entry in entries:
+        db.refresh(entry)
+        assert entry.status == STATUS_BOOKED
+        assert entry.ticket_id is not None
+
+
+def test_failed_backfill_keeps_entry_waiting(client, db, monkeypatch):
+    day = _weekday(date.today() + timedelta(days=151))
+    ticket = _book(db, day, 11)
+    entry = _wait(db, day, time(11, 0), time(11, 0), "Fehler")
+
+    def failing_create_ticket(**kwargs):
+        raise RuntimeError("DB weg")
+
+    monkeypatch.setattr(waitlist_service, "create_ticket", failing_create_ticket)
+    update_ticket_status(db, ticket.id, PRACTICE_ID, TicketStatus.CLOSED)
+
+    db.refresh(entry)
+    assert entry.status == STATUS_WAITING
+    assert entry.ticket_id is None
+    assert waitlist_index.match(PRACTICE_ID, day, 11 * 60) == entry.id
+
+    # Nächster Versuch klappt → Eintrag rückt nach
+    monkeypatch.undo()
+    backfilled = backfill_released_slot(db, PRACTICE_ID, datetime.combine(day, time(11, 0)))
+    assert backfilled is not None
+    db.refresh(entry)
+    assert entry.status == STATUS_BOOKED
+    assert str(entry.ticket_id) == backfilled.ticket_id
+
+
+def test_readded_entry_is_queued_once():
+    index = WaitlistIndex()
+    day = date.today() + timedelta(days=3)
+    row = SimpleNamespace(
+        id=7, status=STATUS_WAITING, practice_id=PRACTICE_ID,
+        earliest_date=day, latest_date=day, earliest_minute=9 * 60, latest_minute=9 * 60,
+    )
+
+    index.add(row)
+    index.remove(row.id)
+    index.add(row)  # z. B. nach gescheitertem Nachrücken
+
+    assert index.match(PRACTICE_ID, day, 9 * 60) == 7
+    # Das Element der alten Generation wurde beim Match verworfen
+    assert index.stats()["queued"] == 1
+
+    index.remove(row.id)
+    assert index.match(PRACTICE_ID, day, 9 * 60) is None
+    assert index.stats()["queued"] == 0
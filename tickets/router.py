@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from schemas import TicketModel, TicketStatus
+from database import get_db
+from schemas import PracticeKey, TicketBulkStatusUpdate, TicketModel, TicketStatus
 from tickets.service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_BULK_TICKET_IDS,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    SlotUnavailableError,
+    bulk_update_ticket_status,
     create_ticket,
+    from_db_ticket_to_pydantic,
     get_ticket,
-    list_tickets,
+    list_bookings_in_window,
+    list_tickets_page,
     update_ticket_status,
     delete_ticket,
 )
@@ -13,17 +25,65 @@ from tickets.service import (
 # Standard-Router ohne versteckte Flags
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
+# Obergrenze für /tickets/bookings (ungepaginiert)
+MAX_BOOKING_WINDOW_DAYS = 31
+
+INCLUDE_ARCHIVE_DESCRIPTION = "Auch archivierte Tickets (tickets_archive) lesen"
+
 # --- READ (List) ---
 @router.get("", response_model=List[TicketModel])
 @router.get("/", response_model=List[TicketModel])
-def api_list_tickets():
+def api_list_tickets(
+    response: Response,
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    status: Optional[TicketStatus] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor der vorherigen Seite"),
+    patient_phone: Optional[str] = Query(None, description="Nur Tickets dieser Telefonnummer"),
+    include_archive: bool = Query(False, description=INCLUDE_ARCHIVE_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
     """Akzeptiert /tickets und /tickets/ ohne Redirect für maximale Stabilität."""
-    return list_tickets()
+    try:
+        tickets, next_cursor = list_tickets_page(
+            db, practice_id, status, limit, cursor,
+            patient_phone=patient_phone, include_archive=include_archive,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return tickets
+
+# --- READ (Buchungen im Zeitfenster) ---
+@router.get("/bookings", response_model=List[TicketModel])
+def api_list_bookings(
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    slot_from: datetime = Query(..., alias="from", description="Slot-Start ab (inklusive)"),
+    slot_to: datetime = Query(..., alias="to", description="Slot-Start bis (exklusive)"),
+    include_archive: bool = Query(False, description=INCLUDE_ARCHIVE_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    if slot_to <= slot_from:
+        raise HTTPException(status_code=400, detail="'to' liegt nicht nach 'from'")
+    if slot_to - slot_from > timedelta(days=MAX_BOOKING_WINDOW_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Zeitfenster größer als {MAX_BOOKING_WINDOW_DAYS} Tage",
+        )
+    return list_bookings_in_window(
+        db, practice_id, slot_from, slot_to, include_archive=include_archive
+    )
 
 # --- READ (Single) ---
 @router.get("/{ticket_id}", response_model=TicketModel)
-def api_get_ticket(ticket_id: str):
-    ticket = get_ticket(ticket_id)
+def api_get_ticket(
+    ticket_id: int,
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    include_archive: bool = Query(False, description=INCLUDE_ARCHIVE_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    ticket = get_ticket(db, ticket_id, practice_id, include_archive=include_archive)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket nicht gefunden")
     return ticket
@@ -31,21 +91,63 @@ def api_get_ticket(ticket_id: str):
 # --- CREATE ---
 @router.post("", response_model=TicketModel)
 @router.post("/", response_model=TicketModel)
-def api_create_ticket(ticket: TicketModel):
+def api_create_ticket(ticket: TicketModel, db: Session = Depends(get_db)):
     """Erlaubt Ticket-Erstellung über beide Pfad-Varianten."""
-    return create_ticket(ticket)
+    try:
+        db_ticket = create_ticket(db, ticket)
+    except SlotUnavailableError:
+        raise HTTPException(status_code=409, detail="Slot bereits vergeben")
+    return from_db_ticket_to_pydantic(db_ticket)
+
+# --- UPDATE (Bulk: ein UPDATE für alle passenden Tickets) ---
+@router.patch("/status")
+def api_bulk_update_status(
+    body: TicketBulkStatusUpdate,
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    db: Session = Depends(get_db),
+):
+    has_filter = body.status or body.created_from or body.created_to
+    if body.ticket_ids is None and not has_filter:
+        raise HTTPException(status_code=400, detail="ticket_ids oder Filter angeben")
+    if body.ticket_ids is not None and len(body.ticket_ids) > MAX_BULK_TICKET_IDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Maximal {MAX_BULK_TICKET_IDS} Tickets pro Aufruf",
+        )
+    try:
+        result = bulk_update_ticket_status(
+            db,
+            practice_id,
+            body.new_status,
+            ticket_ids=body.ticket_ids,
+            status=body.status,
+            created_from=body.created_from,
+            created_to=body.created_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return result._asdict()
 
 # --- UPDATE ---
 @router.patch("/{ticket_id}/status", response_model=TicketModel)
-def api_update_status(ticket_id: str, status: TicketStatus):
-    ticket = update_ticket_status(ticket_id, status)
+def api_update_status(
+    ticket_id: int,
+    status: TicketStatus,
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    db: Session = Depends(get_db),
+):
+    ticket = update_ticket_status(db, ticket_id, practice_id, status)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket nicht gefunden")
     return ticket
 
 # --- DELETE ---
 @router.delete("/{ticket_id}")
-def api_delete_ticket(ticket_id: str):
-    if not delete_ticket(ticket_id):
+def api_delete_ticket(
+    ticket_id: int,
+    practice_id: PracticeKey = Query(..., description="Mandanten-ID"),
+    db: Session = Depends(get_db),
+):
+    if not delete_ticket(db, ticket_id, practice_id):
         raise HTTPException(status_code=404, detail="Ticket nicht gefunden")
-    return {"deleted": True}
\ No newline at end of file
+    return {"deleted": True}
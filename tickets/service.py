@@ -1,63 +1,559 @@
 # app/tickets/service.py
 
+import base64
+import logging
+import uuid
+
+from sqlalchemy import Text, cast, delete, func, tuple_
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from database_models import SlotReservation, Ticket, TicketArchive
+from outbox.service import enqueue_calendar_event
+from schemas import STORED, TicketModel, TicketStatus
+from slots.dispatcher import practice_capacity
+from slots.occupancy import occupancy_index
+
+
+logger = logging.getLogger("twilio-agent")
+
+
+class SlotUnavailableError(Exception):
+    """Slot hat keine freie Kapazität mehr (parallel vergeben)."""
+
+
+class InvalidCursorError(ValueError):
+    """Cursor einer Ticket-Liste ist nicht lesbar."""
+
+
+# Listener für frei gewordene Slots (Storno / Statuswechsel / Löschen),
+# z. B. die Warteliste. Aufruf nach dem Commit mit allen Slots der
+# Operation: listener(db, [(practice_id, start), ...]) – ein Bulk-
+# Statuswechsel ruft jeden Listener also nur einmal auf.
+ReleasedSlots = List[Tuple[str, datetime]]
+SlotReleasedListener = Callable[[Session, ReleasedSlots], None]
+_slot_released_listeners: List[SlotReleasedListener] = []
+
+
+def on_slot_released(listener: SlotReleasedListener) -> SlotReleasedListener:
+    _slot_released_listeners.append(listener)
+    return listener
+
+
+def _notify_slots_released(db: Session, slots: ReleasedSlots) -> None:
+    if not slots:
+        return
+    for listener in _slot_released_listeners:
+        try:
+            listener(db, slots)
+        except Exception as e:
+            logger.error(f"Slot-Freigabe-Listener fehlgeschlagen ({len(slots)} Slots): {e}")
+
+
+def _booked_slot_start(db_ticket: Ticket) -> Optional[datetime]:
+    """
+    Slot-Start eines gebuchten Tickets (Spalte slot_start, für noch nicht
+    nachgefüllte Zeilen aus dem JSON-Blob), sonst None.
+    """
+    if db_ticket.status != TicketStatus.BOOKED:
+        return None
+    if db_ticket.slot_start is not None:
+        return db_ticket.slot_start
+    slot = (db_ticket.data or {}).get("slot") or {}
+    start = slot.get("start_time")
+    return datetime.fromisoformat(start) if start else None
+
+
+# -------------------------------------------------
+# Lesepfad: DB → TicketModel / schlanke Zeilen
+# -------------------------------------------------
+# Listen laden nur die Spalten, die sie brauchen. Für vollständige
+# TicketModels kommt `data` als JSON-Text aus der DB und wird in einem
+# Schritt von pydantic-core geparst und validiert (model_validate_json) –
+# schneller als json.loads + model_validate und auch als model_construct.
+# Schlanke Listen (Inbox, Dashboard) nutzen TicketRow ganz ohne Pydantic.
+# Das Archiv (tickets_archive) wird nur mit include_archive=True gelesen.
+
+def _ticket_model_columns(model):
+    # Spalten für vollständige Tickets (ohne die übrigen ORM-Felder)
+    return (
+        model.id,
+        model.practice_id,
+        model.status,
+        model.created_at,
+        cast(model.data, Text).label("data_json"),
+    )
+
+
+TICKET_MODEL_COLUMNS = _ticket_model_columns(Ticket)
+ARCHIVE_MODEL_COLUMNS = _ticket_model_columns(TicketArchive)
+
 
-from database_models import Ticket
-from schemas import TicketModel, TicketStatus
+class TicketRow(NamedTuple):
+    """Projektion für Listen, die nur Kopfdaten brauchen (Inbox, Dashboard)."""
+    id: int
+    practice_id: str
+    status: str
+    created_at: datetime
+    patient_name: Optional[str]
+    patient_phone: Optional[str]
+    slot_start: Optional[datetime]
+    slot_end: Optional[datetime]
 
 
-def from_db_ticket_to_pydantic(db_ticket: Ticket) -> TicketModel:
-    data = db_ticket.data or {}
-    ticket = TicketModel.parse_obj(data)
+TICKET_ROW_COLUMNS = (
+    Ticket.id,
+    Ticket.practice_id,
+    Ticket.status,
+    Ticket.created_at,
+    Ticket.patient_name,
+    Ticket.patient_phone,
+    Ticket.slot_start,
+    Ticket.slot_end,
+)
+
+
+def from_db_ticket_to_pydantic(db_ticket) -> TicketModel:
+    """
+    Ticket (ORM-Objekt oder Zeile aus TICKET_MODEL_COLUMNS) → TicketModel.
+    """
+    data_json = getattr(db_ticket, "data_json", None)
+    if data_json is not None:
+        ticket = TicketModel.model_validate_json(data_json, context=STORED)
+    else:
+        ticket = TicketModel.model_validate(db_ticket.data or {}, context=STORED)
     ticket.ticket_id = str(db_ticket.id)
     ticket.practice_id = db_ticket.practice_id
-    ticket.status = db_ticket.status
+    ticket.status = TicketStatus(db_ticket.status)
     ticket.created_at = db_ticket.created_at
     return ticket
 
 
-def create_ticket(db: Session, ticket_model: TicketModel) -> Ticket:
+# Versuche bei Unique-Konflikten (paralleler Insert auf denselben Platz)
+RESERVATION_ATTEMPTS = 5
+
+
+def _new_db_ticket(ticket_model: TicketModel) -> Ticket:
     db_ticket = Ticket(
         practice_id=ticket_model.practice_id,
         status=ticket_model.status,
         created_at=datetime.utcnow()
     )
     db_ticket.set_data(ticket_model)
+    return db_ticket
 
-    db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+
+def _free_resource(db: Session, practice_id: str, start: datetime, capacity: int) -> Optional[int]:
+    taken = {
+        resource for (resource,) in
+        db.query(SlotReservation.resource)
+        .filter(SlotReservation.practice_id == practice_id, SlotReservation.slot_start == start)
+        .all()
+    }
+    return next((r for r in range(capacity) if r not in taken), None)
+
+
+def _reserve(db: Session, db_ticket: Ticket, start: datetime, capacity: int) -> None:
+    """
+    Fügt die Reservierung zum (geflushten) Ticket in die laufende
+    Transaktion ein. SlotUnavailableError, wenn alle Plätze belegt sind.
+    """
+    resource = _free_resource(db, db_ticket.practice_id, start, capacity)
+    if resource is None:
+        raise SlotUnavailableError(f"Slot {start.isoformat()} ist ausgebucht")
+
+    db.add(SlotReservation(
+        practice_id=db_ticket.practice_id,
+        slot_start=start,
+        resource=resource,
+        ticket_id=db_ticket.id,
+    ))
+
+
+def sync_day_occupancy(db: Session, practice_id: str, start: datetime) -> int:
+    """
+    Übernimmt die Belegung des ganzen Tages aus der DB in den lokalen Index
+    (nach einem Konflikt hat ein anderer Worker meist mehrere Slots vergeben).
+    Gibt die Anzahl der Reservierungen des Tages zurück.
+    """
+    day_start = datetime.combine(start.date(), datetime.min.time())
+    rows = (
+        db.query(SlotReservation.slot_start, func.count(SlotReservation.id))
+        .filter(
+            SlotReservation.practice_id == practice_id,
+            SlotReservation.slot_start >= day_start,
+            SlotReservation.slot_start < day_start + timedelta(days=1),
+        )
+        .group_by(SlotReservation.slot_start)
+        .all()
+    )
+    capacity = practice_capacity(practice_id)
+    for slot_start, count in rows:
+        occupancy_index.set_count(practice_id, slot_start, count, capacity)
+    return sum(count for _, count in rows)
+
+
+def create_ticket(db: Session, ticket_model: TicketModel, claimed: bool = False) -> Ticket:
+    """
+    Speichert das Ticket. Gebuchte Tickets reservieren ihren Platz im Slot
+    in derselben Transaktion; die Unique-Constraint auf
+    (practice_id, slot_start, resource) schließt Doppelbuchungen aus.
+    Der Kalender-Termin wird ebenfalls in dieser Transaktion in die
+    Outbox geschrieben (Zustellung durch den Outbox-Worker).
+    claimed=True: Der Platz ist bereits im Belegungs-Index belegt
+    (bestätigter Slot-Hold).
+    """
+    db_ticket = _new_db_ticket(ticket_model)
+    start = _booked_slot_start(db_ticket)
+
+    if not start:
+        db.add(db_ticket)
+        db.commit()
+        db.refresh(db_ticket)
+        return db_ticket
+
+    practice_id = db_ticket.practice_id
+    capacity = practice_capacity(practice_id)
+
+    # Schneller lokaler Vorab-Check, die DB entscheidet endgültig
+    if not claimed and not occupancy_index.try_book(practice_id, start, capacity):
+        raise SlotUnavailableError(f"Slot {start.isoformat()} ist ausgebucht")
+
+    try:
+        for _ in range(RESERVATION_ATTEMPTS):
+            try:
+                db.add(db_ticket)
+                db.flush()
+                _reserve(db, db_ticket, start, capacity)
+                enqueue_calendar_event(db, db_ticket, ticket_model)
+                db.commit()
+                break
+            except IntegrityError:
+                # Anderer Worker war schneller → neuer Versuch mit frischem Stand
+                db.rollback()
+                db_ticket = _new_db_ticket(ticket_model)
+        else:
+            raise SlotUnavailableError(f"Slot {start.isoformat()} ist ausgebucht")
+    except SlotUnavailableError:
+        db.rollback()
+        occupancy_index.release(practice_id, start)
+        sync_day_occupancy(db, practice_id, start)
+        raise
+    except SQLAlchemyError:
+        db.rollback()
+        occupancy_index.release(practice_id, start)
+        raise
+
+    # Kein refresh(): Die Buchungspfade lesen das Ticket nicht mehr; andere
+    # Aufrufer laden die abgelaufenen Attribute beim ersten Zugriff nach
     return db_ticket
 
 
-def get_ticket(db: Session, ticket_id: int, practice_id: str) -> Optional[TicketModel]:
+def create_tickets_bulk(
+    db: Session,
+    ticket_models: List[TicketModel],
+    stage: Optional[Callable[[Session], None]] = None,
+) -> List[Ticket]:
+    """
+    Speichert viele gebuchte Tickets in EINER Transaktion: ein Bulk-Insert
+    für die Tickets, je einer für Reservierungen und Outbox, ein Commit.
+    Die Slots müssen vom Aufrufer bereits im Belegungs-Index belegt sein.
+    Ist ein Slot inzwischen vergeben, wird nichts gespeichert (Rollback,
+    SlotUnavailableError) – der Aufrufer gibt seine Slots wieder frei und
+    gleicht die Tage per sync_day_occupancy ab.
+    stage(db): weitere Zeilen derselben Unit of Work (z. B. Wartelisten-
+    Einträge), wird direkt vor dem Commit aufgerufen.
+    """
+    db_tickets = [_new_db_ticket(ticket_model) for ticket_model in ticket_models]
+    starts = [_booked_slot_start(db_ticket) for db_ticket in db_tickets]
+
+    booked = [(t, s) for t, s in zip(db_tickets, starts) if s]
+    booked_models = [m for m, s in zip(ticket_models, starts) if s]
+    practice_ids = {t.practice_id for t, _ in booked}
+
+    # Belegte Plätze aller betroffenen Slots mit einer Abfrage
+    taken: Dict[Tuple[str, datetime], Set[int]] = {}
+    if booked:
+        rows = (
+            db.query(SlotReservation.practice_id, SlotReservation.slot_start, SlotReservation.resource)
+            .filter(
+                SlotReservation.practice_id.in_(practice_ids),
+                SlotReservation.slot_start.in_({s for _, s in booked}),
+            )
+            .all()
+        )
+        for practice_id, slot_start, resource in rows:
+            taken.setdefault((practice_id, slot_start), set()).add(resource)
+
+    try:
+        db.add_all(db_tickets)
+        db.flush()
+
+        reservations = []
+        for db_ticket, start in booked:
+            used = taken.setdefault((db_ticket.practice_id, start), set())
+            capacity = practice_capacity(db_ticket.practice_id)
+            resource = next((r for r in range(capacity) if r not in used), None)
+            if resource is None:
+                raise SlotUnavailableError(f"Slot {start.isoformat()} ist ausgebucht")
+            used.add(resource)
+            reservations.append(SlotReservation(
+                practice_id=db_ticket.practice_id,
+                slot_start=start,
+                resource=resource,
+                ticket_id=db_ticket.id,
+            ))
+
+        db.add_all(reservations)
+        for (db_ticket, _), ticket_model in zip(booked, booked_models):
+            enqueue_calendar_event(db, db_ticket, ticket_model)
+        if stage is not None:
+            stage(db)
+        db.commit()
+    except (SlotUnavailableError, IntegrityError) as e:
+        db.rollback()
+        if isinstance(e, SlotUnavailableError):
+            raise
+        raise SlotUnavailableError("Slot parallel vergeben") from e
+    except Exception:
+        db.rollback()
+        raise
+
+    return db_tickets
+
+
+def get_ticket(
+    db: Session,
+    ticket_id: int,
+    practice_id: str,
+    include_archive: bool = False,
+) -> Optional[TicketModel]:
     db_ticket = (
-        db.query(Ticket)
+        db.query(*TICKET_MODEL_COLUMNS)
         .filter(Ticket.id == ticket_id, Ticket.practice_id == practice_id)
         .first()
     )
+    if not db_ticket and include_archive:
+        db_ticket = (
+            db.query(*ARCHIVE_MODEL_COLUMNS)
+            .filter(TicketArchive.id == ticket_id, TicketArchive.practice_id == practice_id)
+            .first()
+        )
     if not db_ticket:
         return None
     return from_db_ticket_to_pydantic(db_ticket)
 
 
+def _filtered(
+    db: Session,
+    columns,
+    practice_id: str,
+    status: Optional[TicketStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    patient_phone: Optional[str] = None,
+    model=Ticket,
+):
+    query = db.query(*columns).filter(model.practice_id == practice_id)
+
+    if status:
+        query = query.filter(model.status == status)
+    if created_from is not None:
+        query = query.filter(model.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(model.created_at < created_to)
+    if patient_phone:
+        query = query.filter(model.patient_phone == patient_phone)
+    return query
+
+
 def list_tickets(
     db: Session,
     practice_id: str,
-    status: Optional[TicketStatus] = None
+    status: Optional[TicketStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
 ) -> List[TicketModel]:
+    """
+    Tickets einer Praxis, neueste zuerst. Filter und Sortierung laufen
+    über ix_tickets_practice_(status_)created – created_to ist exklusiv.
+    """
+    rows = (
+        _filtered(db, TICKET_MODEL_COLUMNS, practice_id, status, created_from, created_to)
+        .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        .all()
+    )
+    return [from_db_ticket_to_pydantic(t) for t in rows]
 
-    query = db.query(Ticket).filter(Ticket.practice_id == practice_id)
 
-    if status:
-        query = query.filter(Ticket.status == status)
+def list_ticket_rows(
+    db: Session,
+    practice_id: str,
+    status: Optional[TicketStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> List[TicketRow]:
+    """
+    Wie list_tickets, aber nur die Kopfspalten (ohne `data`, ohne Pydantic).
+    """
+    rows = (
+        _filtered(db, TICKET_ROW_COLUMNS, practice_id, status, created_from, created_to)
+        .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        .all()
+    )
+    return [TicketRow(*row) for row in rows]
+
+
+def count_tickets_by_status(db: Session, practice_id: str) -> Dict[str, int]:
+    return dict(
+        db.query(Ticket.status, func.count(Ticket.id))
+        .filter(Ticket.practice_id == practice_id)
+        .group_by(Ticket.status)
+        .all()
+    )
+
+
+# -------------------------------------------------
+# Keyset-Pagination (created_at, id) – neueste zuerst
+# -------------------------------------------------
+# Der Cursor ist die Position des letzten gelieferten Tickets. Die
+# Folgeseite beginnt per Index-Seek direkt dahinter (kein OFFSET) –
+# gleich schnell für jede Seitentiefe. Neue Tickets landen vor dem
+# Cursor und verschieben bereits gelieferte Seiten nicht.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Response-Header mit dem Cursor der nächsten Seite (fehlt auf der letzten)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, ticket_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{ticket_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, ticket_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Ungültiger Cursor: {cursor}") from e
 
-    tickets = query.all() or []
 
-    return [from_db_ticket_to_pydantic(t) for t in tickets]
+def _keyset_rows(query, model, limit: int, position: Optional[Tuple[datetime, int]]) -> list:
+    if position:
+        query = query.filter(tuple_(model.created_at, model.id) < position)
+    # Eine Zeile mehr laden: zeigt an, ob es eine Folgeseite gibt
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+
+def _keyset_page(
+    query,
+    limit: int,
+    cursor: Optional[str],
+    archive_query=None,
+) -> Tuple[list, Optional[str]]:
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    position = decode_cursor(cursor) if cursor else None
+
+    rows = _keyset_rows(query, Ticket, limit, position)
+    if archive_query is not None:
+        # Beide Tabellen per Index-Seek, dann zusammenführen (IDs sind eindeutig)
+        rows = sorted(
+            rows + _keyset_rows(archive_query, TicketArchive, limit, position),
+            key=lambda row: (row.created_at, row.id),
+            reverse=True,
+        )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def list_tickets_page(
+    db: Session,
+    practice_id: str,
+    status: Optional[TicketStatus] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    patient_phone: Optional[str] = None,
+    include_archive: bool = False,
+) -> Tuple[List[TicketModel], Optional[str]]:
+    """
+    Eine Seite Tickets plus Cursor der nächsten Seite (None = letzte Seite).
+    Mit patient_phone: nur Tickets dieser Nummer (ix_tickets_practice_phone_created).
+    include_archive: archivierte Tickets in derselben Reihenfolge mitliefern.
+    """
+    query = _filtered(db, TICKET_MODEL_COLUMNS, practice_id, status, patient_phone=patient_phone)
+    archive_query = None
+    if include_archive:
+        archive_query = _filtered(
+            db, ARCHIVE_MODEL_COLUMNS, practice_id, status,
+            patient_phone=patient_phone, model=TicketArchive,
+        )
+    rows, next_cursor = _keyset_page(query, limit, cursor, archive_query)
+    return [from_db_ticket_to_pydantic(t) for t in rows], next_cursor
+
+
+def list_ticket_rows_page(
+    db: Session,
+    practice_id: str,
+    status: Optional[TicketStatus] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[TicketRow], Optional[str]]:
+    """
+    Eine Seite Kopfzeilen (TicketRow), gleiche Cursor wie list_tickets_page.
+    """
+    query = _filtered(db, TICKET_ROW_COLUMNS, practice_id, status)
+    rows, next_cursor = _keyset_page(query, limit, cursor)
+    return [TicketRow(*row) for row in rows], next_cursor
+
+
+def list_bookings_in_window(
+    db: Session,
+    practice_id: str,
+    slot_from: datetime,
+    slot_to: datetime,
+    include_archive: bool = False,
+) -> List[TicketModel]:
+    """
+    Gebuchte Tickets mit Slot-Start in [slot_from, slot_to), nach
+    Slot-Start sortiert (ix_tickets_practice_slot_start).
+    include_archive: auch archivierte (vergangene) Termine.
+    """
+    def bookings(model, columns):
+        return (
+            db.query(*columns, model.slot_start)
+            .filter(
+                model.practice_id == practice_id,
+                model.slot_start >= slot_from,
+                model.slot_start < slot_to,
+                model.status == TicketStatus.BOOKED,
+            )
+            .order_by(model.slot_start, model.id)
+            .all()
+        )
+
+    rows = bookings(Ticket, TICKET_MODEL_COLUMNS)
+    if include_archive:
+        rows = sorted(
+            rows + bookings(TicketArchive, ARCHIVE_MODEL_COLUMNS),
+            key=lambda row: (row.slot_start, row.id),
+        )
+    return [from_db_ticket_to_pydantic(t) for t in rows]
+
+
+def _delete_reservations(db: Session, ticket_id: int) -> None:
+    db.query(SlotReservation).filter(SlotReservation.ticket_id == ticket_id).delete(
+        synchronize_session=False
+    )
 
 
 def update_ticket_status(
@@ -75,10 +571,49 @@ def update_ticket_status(
     if not db_ticket:
         return None
 
+    old_start = _booked_slot_start(db_ticket)
+
     db_ticket.status = new_status
-    db.commit()
+    new_start = _booked_slot_start(db_ticket)
+
+    if new_start and not old_start:
+        # Nur die Reservierung kann am Slot scheitern → SlotUnavailableError
+        try:
+            _reserve(db, db_ticket, new_start, practice_capacity(db_ticket.practice_id))
+        except (SlotUnavailableError, IntegrityError):
+            db.rollback()
+            raise SlotUnavailableError(f"Slot {new_start.isoformat()} ist ausgebucht")
+        # Erneute Buchung → neuer Kalender-Termin, gleiche Transaktion wie create_ticket
+        try:
+            enqueue_calendar_event(
+                db, db_ticket, from_db_ticket_to_pydantic(db_ticket), booking=uuid.uuid4().hex
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    else:
+        try:
+            if old_start and not new_start:
+                _delete_reservations(db, db_ticket.id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
     db.refresh(db_ticket)
-    return from_db_ticket_to_pydantic(db_ticket)
+
+    if old_start and not new_start:
+        occupancy_index.release(db_ticket.practice_id, old_start)
+    elif new_start and not old_start:
+        occupancy_index.book(
+            db_ticket.practice_id, new_start, practice_capacity(db_ticket.practice_id)
+        )
+
+    ticket = from_db_ticket_to_pydantic(db_ticket)
+    if old_start and not new_start:
+        _notify_slots_released(db, [(db_ticket.practice_id, old_start)])
+    return ticket
 
 
 def delete_ticket(db: Session, ticket_id: int, practice_id: str) -> bool:
@@ -90,6 +625,97 @@ def delete_ticket(db: Session, ticket_id: int, practice_id: str) -> bool:
     if not db_ticket:
         return False
 
-    db.delete(db_ticket)
-    db.commit()
+    start = _booked_slot_start(db_ticket)
+    practice_id = db_ticket.practice_id
+
+    try:
+        _delete_reservations(db, db_ticket.id)
+        db.delete(db_ticket)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if start:
+        occupancy_index.release(practice_id, start)
+        _notify_slots_released(db, [(practice_id, start)])
     return True
+
+
+# -------------------------------------------------
+# Bulk-Statuswechsel (z. B. Rückrufe zum Tagesende schließen)
+# -------------------------------------------------
+
+# Obergrenze für explizite ID-Listen (SQLite-Parameterlimit)
+MAX_BULK_TICKET_IDS = 10000
+
+
+class BulkStatusResult(NamedTuple):
+    updated: int
+    released_slots: int
+
+
+def bulk_update_ticket_status(
+    db: Session,
+    practice_id: str,
+    new_status: TicketStatus,
+    ticket_ids: Optional[List[int]] = None,
+    status: Optional[TicketStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> BulkStatusResult:
+    """
+    Setzt den Status aller passenden Tickets der Praxis mit EINEM UPDATE
+    (Auswahl per ticket_ids und/oder Filter wie list_tickets). Tickets,
+    die den Status schon haben, zählen nicht mit.
+    Verlassen gebuchte Tickets den Status BOOKED, werden ihre
+    Reservierungen in derselben Transaktion gelöscht (DELETE … RETURNING)
+    und die Plätze danach im Belegungs-Index und an die Slot-Listener
+    freigegeben. Ziel BOOKED braucht je Ticket eine Reservierung →
+    update_ticket_status.
+    """
+    if new_status == TicketStatus.BOOKED:
+        raise ValueError("Bulk-Statuswechsel nach 'booked' ist nicht möglich")
+
+    def selected(columns):
+        query = _filtered(db, columns, practice_id, status, created_from, created_to)
+        if ticket_ids is not None:
+            query = query.filter(Ticket.id.in_(ticket_ids))
+        return query.filter(Ticket.status != new_status)
+
+    released: List[Tuple[str, datetime]] = []
+    try:
+        if status in (None, TicketStatus.BOOKED):
+            booked_ids = selected((Ticket.id,)).filter(Ticket.status == TicketStatus.BOOKED)
+            released = db.execute(
+                delete(SlotReservation)
+                .where(SlotReservation.ticket_id.in_(booked_ids.scalar_subquery()))
+                .returning(SlotReservation.practice_id, SlotReservation.slot_start)
+            ).all()
+
+        updated = selected((Ticket,)).update(
+            {Ticket.status: new_status}, synchronize_session=False
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for slot_practice_id, start in released:
+        occupancy_index.release(slot_practice_id, start)
+    _notify_slots_released(db, [(slot_practice_id, start) for slot_practice_id, start in released])
+
+    return BulkStatusResult(updated=updated, released_slots=len(released))
+
+
+def rebuild_occupancy_index(db: Session) -> int:
+    """
+    Baut den Belegungs-Index aus allen gebuchten Tickets der DB neu auf
+    (nur die Spalten practice_id / slot_start – kein JSON, keine Entities).
+    """
+    rows = (
+        db.query(Ticket.practice_id, Ticket.slot_start)
+        .filter(Ticket.status == TicketStatus.BOOKED, Ticket.slot_start.is_not(None))
+        .yield_per(1000)
+    )
+    return occupancy_index.rebuild((practice_id, start) for practice_id, start in rows)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from datetime import date
+from datetime import date, datetime
 
 # Korrekte Imports aus schemas
 from schemas import VoicePayload, PracticeId, TicketModel
@@ -32,6 +32,7 @@ def voice_webhook(payload: VoicePayload):
             patient_name="Unbekannt (Voice)",
             patient_phone=payload.from_number,
             for_date=date.today(),
+            not_before=datetime.now(),
         )
 
         # Überprüfung, ob ein echtes Ticket (Buchung) oder ein Fallback (Callback) erstellt wurde
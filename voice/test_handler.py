@@ -4,7 +4,7 @@ Simuliert Twilio Webhooks OHNE echte Anrufe
 """
 from fastapi import Request
 from fastapi.responses import Response, JSONResponse
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
 from schemas import PracticeId, TicketModel
@@ -63,6 +63,7 @@ async def test_voice_webhook(
             patient_name="Test Patient",
             patient_phone=from_number,
             for_date=date.today(),
+            not_before=datetime.now(),
         )
         
         if isinstance(ticket, TicketModel) and ticket.slot:
@@ -7,16 +7,22 @@ from twilio.twiml.voice_response import VoiceResponse, Gather
 from twilio.request_validator import RequestValidator
 import os
 import logging
-from datetime import date
+from datetime import date, datetime, timedelta
+from typing import Optional
 
-from schemas import PracticeId, TicketModel
+from schemas import CallbackTicket, PracticeId, TicketModel
 from booking.booking_flow import auto_book_from_voice
-from intents.voice_intent import detect_intent, VoiceIntent
+from intents.voice_intent import detect_confirmation, detect_intent, VoiceIntent
 from tickets.tickets import create_callback_ticket
+from booking.reservation import book_with_retry_async, confirm_held_slot_async, offer_held_slot
+from slots.holds import slot_holds
+from idempotency.store import transient
 
 # Logger für Twilio-Agent
 logger = logging.getLogger("twilio-agent")
 
+CALL_ENDED_STATUSES = {"completed", "busy", "failed", "no-answer", "canceled"}
+
 
 async def handle_twilio_webhook(request: Request):
     """
@@ -36,6 +42,7 @@ async def handle_twilio_webhook(request: Request):
         from_number = form_data.get("From", "Unbekannt")
         call_sid = form_data.get("CallSid", "")
         call_status = form_data.get("CallStatus", "")
+        next_action = _next_action(request)
         
         print("\n" + "="*60)
         print("--- EINGEHENDER ANRUF ---")
@@ -64,12 +71,17 @@ async def handle_twilio_webhook(request: Request):
             # ============================================================
             # FENSTER 3: INTENT-ERKENNUNG
             # ============================================================
-            intent = detect_intent(speech_result)
+            # Offenes (auch abgelaufenes) Terminangebot → Antwort ist eine Bestätigung (ja / nein)
+            offered = call_sid and (slot_holds.get(call_sid) or slot_holds.lapsed(call_sid))
+            intent = VoiceIntent.BOOKING if offered else detect_intent(speech_result)
             print(f"Erkanntes Intent: {intent.value}")
             logger.info(f"Intent erkannt: {intent.value}")
             
             # Ticket erstellen basierend auf Intent
-            if intent == VoiceIntent.BOOKING:
+            if offered:
+                await _handle_confirmation(response, call_sid, from_number, speech_result, next_action)
+
+            elif intent == VoiceIntent.BOOKING:
                 # ============================================================
                 # FENSTER 4: TERMINBUCHUNG
                 # ============================================================
@@ -82,36 +94,12 @@ async def handle_twilio_webhook(request: Request):
                 print("-"*60)
                 logger.info(f"Starte Terminbuchung für {from_number}")
                 
-                ticket = auto_book_from_voice(
-                    practice_id=PracticeId.PHYSIO_DEFAULT_20,
-                    patient_name="Unbekannt (Voice)",
-                    patient_phone=from_number,
-                    for_date=date.today(),
-                )
-                
-                if isinstance(ticket, TicketModel) and ticket.slot:
-                    # Buchung erfolgreich
-                    slot_time = ticket.slot.start_time.strftime('%d.%m.%Y um %H:%M')
-                    response_text = f"Vielen Dank! Ihr Termin wurde für {slot_time} gebucht."
-                    
-                    print(f"\n[ERFOLG] Termin gebucht!")
-                    print(f"  - Ticket-ID: {ticket.ticket_id}")
-                    print(f"  - Slot-Zeit: {slot_time}")
-                    print(f"  - Status: {ticket.status.value}")
-                    print(f"\nAgent-Antwort: '{response_text}'")
-                    logger.info(f"Termin erfolgreich gebucht - Ticket-ID: {ticket.ticket_id}, Slot: {slot_time}")
-                    
-                    response.say(response_text, language="de-DE")
+                if call_sid:
+                    # Slot anbieten und halten, Buchung erst nach Bestätigung
+                    _offer_slot(response, call_sid, from_number, next_action)
                 else:
-                    # Kein Slot verfügbar → Callback
-                    response_text = "Leider sind aktuell keine Termine verfügbar. Wir rufen Sie gerne zurück."
-                    
-                    print(f"\n[KEIN SLOT] Fallback zu Callback")
-                    print(f"  - Ticket-ID: {ticket.ticket_id if hasattr(ticket, 'ticket_id') else 'N/A'}")
-                    print(f"\nAgent-Antwort: '{response_text}'")
-                    logger.warning(f"Kein Slot verfügbar - Callback erstellt für {from_number}")
-                    
-                    response.say(response_text, language="de-DE")
+                    ticket = await _book_now(from_number)
+                    _say_booking_result(response, ticket, from_number)
             
             elif intent == VoiceIntent.CALLBACK:
                 # ============================================================
@@ -156,6 +144,11 @@ async def handle_twilio_webhook(request: Request):
                 
                 response.say(response_text, language="de-DE")
         
+        elif call_sid and _repeat_offer(response, call_sid, next_action):
+            # Keine Antwort (Stille) auf ein offenes Terminangebot → erneut fragen, Hold verlängert
+            logger.info(f"Keine Antwort auf Terminangebot - frage erneut (CallSid: {call_sid})")
+
+        else:
             # ============================================================
             # FENSTER 6: ERSTE BEGRÜSSUNG (Kein SpeechResult)
             # ============================================================
@@ -174,7 +167,7 @@ async def handle_twilio_webhook(request: Request):
             gather = Gather(
                 input="speech",
                 language="de-DE",
-                action="/voice/twilio-webhook",
+                action=next_action,
                 method="POST",
                 speech_timeout="auto",
                 timeout=10
@@ -213,10 +206,164 @@ async def handle_twilio_webhook(request: Request):
         print("!"*60)
         logger.error(f"Fehler im Twilio-Webhook: {error_msg}", exc_info=True)
         
-        # Fehler-TwiML zurückgeben
+        # Fehler-TwiML zurückgeben – nicht speichern, ein Twilio-Retry verarbeitet neu
         error_response = VoiceResponse()
         error_response.say("Es ist ein Systemfehler aufgetreten. Bitte versuchen Sie es später erneut.", language="de-DE")
-        return Response(content=str(error_response), media_type="application/xml")
+        return transient(Response(content=str(error_response), media_type="application/xml"))
+
+
+# -------------------------------------------------
+# Terminbuchung (Angebot → Bestätigung)
+# -------------------------------------------------
+
+def _voice_callback(from_number: str) -> CallbackTicket:
+    return CallbackTicket(
+        practice_id=PracticeId.PHYSIO_DEFAULT_20,
+        patient_name="Unbekannt (Voice)",
+        patient_phone=from_number,
+        reason="Slots parallel vergeben – Rückruf notwendig",
+    )
+
+
+def _decide_voice_slot(from_number: str, not_before: Optional[datetime] = None):
+    return auto_book_from_voice(
+        practice_id=PracticeId.PHYSIO_DEFAULT_20,
+        patient_name="Unbekannt (Voice)",
+        patient_phone=from_number,
+        for_date=date.today(),
+        not_before=not_before or datetime.now(),
+    )
+
+
+async def _book_now(from_number: str):
+    """
+    Sofort buchen; bei parallel vergebenem Slot wird der nächste freie gewählt.
+    Die Event-Loop wartet dabei nicht auf die DB (database.run_in_session).
+    """
+    return await book_with_retry_async(
+        decide=lambda: _decide_voice_slot(from_number),
+        on_conflict=lambda: _voice_callback(from_number),
+    )
+
+
+def _next_action(request: Request) -> str:
+    """
+    Gather-Ziel mit Turn-Zähler: Der Turn ist Teil des Idempotenz-Schlüssels,
+    gleiche Antworten in verschiedenen Turns ("nein", "nein") sind so getrennt.
+    """
+    try:
+        turn = int(request.query_params.get("turn", "0"))
+    except ValueError:
+        turn = 0
+    return f"/voice/twilio-webhook?turn={turn + 1}"
+
+
+def _ask_confirmation(response: VoiceResponse, text: str, action: str) -> None:
+    gather = Gather(
+        input="speech",
+        language="de-DE",
+        action=action,
+        method="POST",
+        speech_timeout="auto",
+        timeout=10
+    )
+    gather.say(text, language="de-DE")
+    response.append(gather)
+
+
+def _repeat_offer(response: VoiceResponse, call_sid: str, action: str) -> bool:
+    """
+    Gehaltenen Slot erneut anbieten und den Hold verlängern.
+    False, wenn für den Anruf kein Slot (mehr) gehalten wird.
+    """
+    held = slot_holds.get(call_sid)
+    if held is None:
+        return False
+    slot_holds.hold(call_sid, held.practice_id, held.start_time)
+    slot_time = held.start_time.strftime('%d.%m.%Y um %H:%M')
+    _ask_confirmation(response, f"Entschuldigung. Passt Ihnen der Termin am {slot_time}? Bitte sagen Sie ja oder nein.", action)
+    return True
+
+
+def _offer_slot(
+    response: VoiceResponse,
+    call_sid: str,
+    from_number: str,
+    action: str,
+    not_before: Optional[datetime] = None,
+) -> None:
+    """
+    Nächsten freien Slot anbieten und für den Anruf halten.
+    """
+    ticket = offer_held_slot(
+        call_sid,
+        decide=lambda: _decide_voice_slot(from_number, not_before),
+        on_conflict=lambda: _voice_callback(from_number),
+    )
+
+    if isinstance(ticket, TicketModel) and ticket.slot:
+        slot_time = ticket.slot.start_time.strftime('%d.%m.%Y um %H:%M')
+        response_text = f"Ich kann Ihnen einen Termin am {slot_time} anbieten. Passt Ihnen das? Bitte sagen Sie ja oder nein."
+        logger.info(f"Slot angeboten und gehalten - CallSid: {call_sid}, Slot: {slot_time}")
+        _ask_confirmation(response, response_text, action)
+    else:
+        _say_booking_result(response, ticket, from_number)
+
+
+async def _handle_confirmation(
+    response: VoiceResponse,
+    call_sid: str,
+    from_number: str,
+    speech_result: str,
+    action: str,
+) -> None:
+    answer = detect_confirmation(speech_result)
+    logger.info(f"Antwort auf Terminangebot: {answer} (CallSid: {call_sid})")
+
+    if answer is None:
+        # Unklar → nachfragen, Hold verlängern
+        if _repeat_offer(response, call_sid, action):
+            return
+        # Hold abgelaufen → neu anbieten, nicht ungefragt buchen
+        logger.info(f"Hold abgelaufen, Antwort unklar - neues Angebot (CallSid: {call_sid})")
+        _offer_slot(response, call_sid, from_number, action)
+        return
+
+    if answer is False:
+        # Nächsten Slot nach dem abgelehnten anbieten
+        declined = slot_holds.get(call_sid) or slot_holds.lapsed(call_sid)
+        slot_holds.release(call_sid)
+        not_before = declined.start_time + timedelta(minutes=1) if declined else None
+        logger.info(f"Terminangebot abgelehnt - CallSid: {call_sid}")
+        _offer_slot(response, call_sid, from_number, action, not_before)
+        return
+
+    ticket = await confirm_held_slot_async(call_sid)
+
+    # Hold abgelaufen oder Slot inzwischen vergeben → neues Angebot, der
+    # Anrufer hat nur dem angebotenen Slot zugestimmt
+    if ticket is None:
+        logger.info(f"Hold nicht mehr gültig - neues Angebot für {from_number} (CallSid: {call_sid})")
+        _offer_slot(response, call_sid, from_number, action)
+        return
+
+    _say_booking_result(response, ticket, from_number)
+
+
+def _say_booking_result(response: VoiceResponse, ticket, from_number: str) -> None:
+    if isinstance(ticket, TicketModel) and ticket.slot:
+        # Buchung erfolgreich
+        slot_time = ticket.slot.start_time.strftime('%d.%m.%Y um %H:%M')
+        response_text = f"Vielen Dank! Ihr Termin wurde für {slot_time} gebucht."
+        logger.info(f"Termin erfolgreich gebucht - Ticket-ID: {ticket.ticket_id}, Slot: {slot_time}")
+        
+        response.say(response_text, language="de-DE")
+    else:
+        # Kein Slot verfügbar → Callback
+        response_text = "Leider sind aktuell keine Termine verfügbar. Wir rufen Sie gerne zurück."
+        logger.warning(f"Kein Slot verfügbar - Callback erstellt für {from_number}")
+        
+        response.say(response_text, language="de-DE")
 
 
 async def handle_twilio_status(request: Request):
@@ -239,5 +386,10 @@ async def handle_twilio_status(request: Request):
     # Hier könntest du Call-Status in DB speichern
     # z.B. für Dashboard Live-Anzeige
     
+    # Anruf beendet → nicht bestätigten Slot sofort wieder freigeben
+    if call_sid and call_status in CALL_ENDED_STATUSES:
+        if slot_holds.release(call_sid):
+            logger.info(f"Slot-Hold freigegeben (Anruf beendet) - CallSid: {call_sid}")
+    
     return {"status": "ok", "call_sid": call_sid, "call_status": call_status}
 
@@ -0,0 +1,44 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from database import get_db
+from schemas import WaitlistEntryModel, WaitlistRequest
+from waitlist.service import (
+    add_to_waitlist,
+    cancel_waitlist_entry,
+    list_waitlist,
+    to_model,
+)
+
+router = APIRouter(prefix="/api/practices", tags=["Waitlist"])
+
+
+@router.get("/{practice_id}/waitlist", response_model=List[WaitlistEntryModel])
+def api_list_waitlist(practice_id: str, db: Session = Depends(get_db)):
+    """Wartende Patienten in Reihenfolge der Anmeldung."""
+    return [to_model(row) for row in list_waitlist(db, practice_id)]
+
+
+@router.post("/{practice_id}/waitlist", response_model=WaitlistEntryModel)
+def api_add_to_waitlist(
+    practice_id: str,
+    request: WaitlistRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Patient vormerken; wird ein passender Slot frei, wird automatisch gebucht.
+    """
+    if request.practice_id != practice_id:
+        raise HTTPException(status_code=400, detail="practice_id passt nicht zur URL")
+    if request.latest_date and request.latest_date < request.earliest_date:
+        raise HTTPException(status_code=400, detail="'latest_date' liegt vor 'earliest_date'")
+    return to_model(add_to_waitlist(db, request))
+
+
+@router.delete("/{practice_id}/waitlist/{entry_id}")
+def api_cancel_waitlist_entry(practice_id: str, entry_id: int, db: Session = Depends(get_db)):
+    if not cancel_waitlist_entry(db, practice_id, entry_id):
+        raise HTTPException(status_code=404, detail="Kein wartender Eintrag")
+    return {"cancelled": True}
@@ -0,0 +1,421 @@
+import heapq
+import itertools
+import logging
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database_models import WaitlistEntry
+from schemas import (
+    STORED,
+    BookingRequest,
+    TicketModel,
+    TicketStatus,
+    WaitlistEntryModel,
+    WaitlistRequest,
+)
+from slots.dispatcher import get_day_slots
+from slots.search import parse_requested_time, tolerance_window
+from tickets.service import SlotUnavailableError, create_ticket, on_slot_released
+
+
+logger = logging.getLogger("twilio-agent")
+
+# Standard-Zeitraum ab Wunschtag und Obergrenze für eigene Zeiträume
+WAITLIST_DAYS = 7
+WAITLIST_MAX_DAYS = 30
+
+STATUS_WAITING = "waiting"
+STATUS_BOOKED = "booked"
+STATUS_CANCELLED = "cancelled"
+
+
+def _minute(value: Optional[time]) -> Optional[int]:
+    return value.hour * 60 + value.minute if value is not None else None
+
+
+def _time(minute: Optional[int]) -> Optional[time]:
+    return time(minute // 60, minute % 60) if minute is not None else None
+
+
+# -------------------------------------------------
+# Warteliste-Index (Prioritätswarteschlangen je Praxis, Tag & Stunde)
+# -------------------------------------------------
+# Pro (practice_id, date, Stunde) ein Min-Heap der Eintrags-IDs
+# (= Reihenfolge der Anmeldung). Ein Eintrag steht in den Heaps aller
+# Tage seines Zeitraums und aller Stunden seines Zeitfensters; erledigte
+# Einträge werden erst beim Pop entfernt. Ein frei gewordener Slot prüft
+# nur den Heap seiner Stunde – übersprungen werden höchstens Einträge,
+# deren Fenster innerhalb dieser Stunde beginnt oder endet.
+# Heap-Elemente sind (entry_id, generation): Wird ein Eintrag erneut
+# aufgenommen (z. B. nach gescheitertem Nachrücken), bekommt er eine neue
+# Generation; die alten Elemente gelten als erledigt und fallen beim Pop weg.
+
+class _IndexedEntry(NamedTuple):
+    entry_id: int
+    earliest_minute: Optional[int]
+    latest_minute: Optional[int]
+    generation: int
+
+    def accepts(self, minute: int) -> bool:
+        if self.earliest_minute is not None and minute < self.earliest_minute:
+            return False
+        if self.latest_minute is not None and minute > self.latest_minute:
+            return False
+        return True
+
+
+class WaitlistIndex:
+
+    def __init__(self):
+        self._heaps: Dict[Tuple[str, date, int], List[Tuple[int, int]]] = {}
+        self._entries: Dict[int, _IndexedEntry] = {}
+        self._generations = itertools.count()
+        self._last_id = 0
+        self._lock = Lock()
+
+    def add(self, row: WaitlistEntry) -> None:
+        with self._lock:
+            self._last_id = max(self._last_id, row.id)
+            if row.status != STATUS_WAITING or row.id in self._entries:
+                return
+            generation = next(self._generations)
+            self._entries[row.id] = _IndexedEntry(
+                row.id, row.earliest_minute, row.latest_minute, generation
+            )
+            first_hour = row.earliest_minute // 60 if row.earliest_minute is not None else 0
+            last_hour = row.latest_minute // 60 if row.latest_minute is not None else 23
+            day = max(row.earliest_date, date.today())
+            while day <= row.latest_date:
+                for hour in range(first_hour, min(last_hour, 23) + 1):
+                    heapq.heappush(
+                        self._heaps.setdefault((row.practice_id, day, hour), []),
+                        (row.id, generation),
+                    )
+                day += timedelta(days=1)
+
+    def remove(self, entry_id: int) -> None:
+        with self._lock:
+            self._entries.pop(entry_id, None)
+
+    def match(self, practice_id: str, day: date, minute: int) -> Optional[int]:
+        """
+        Ältester wartender Eintrag, dessen Zeitfenster die Startminute
+        enthält. Nicht passende Einträge davor werden kurz entnommen und
+        wieder eingefügt (O(k log n), k = übersprungene Einträge).
+        """
+        key = (practice_id, day, minute // 60)
+        with self._lock:
+            heap = self._heaps.get(key)
+            if not heap:
+                return None
+
+            skipped = []
+            found = None
+            while heap:
+                entry_id, generation = heap[0]
+                entry = self._entries.get(entry_id)
+                if entry is None or entry.generation != generation:
+                    heapq.heappop(heap)  # erledigt / storniert / neu aufgenommen
+                    continue
+                if entry.accepts(minute):
+                    found = entry.entry_id
+                    break
+                skipped.append(heapq.heappop(heap))
+
+            for item in skipped:
+                heapq.heappush(heap, item)
+            if not heap:
+                del self._heaps[key]
+            return found
+
+    def sync(self, db: Session) -> int:
+        """
+        Übernimmt neue Einträge anderer Worker (nur IDs > letzte bekannte)
+        und verwirft Heaps vergangener Tage.
+        """
+        rows = (
+            db.query(WaitlistEntry)
+            .filter(WaitlistEntry.id > self._last_id, WaitlistEntry.status == STATUS_WAITING)
+            .order_by(WaitlistEntry.id)
+            .all()
+        )
+        for row in rows:
+            self.add(row)
+
+        today = date.today()
+        with self._lock:
+            for key in [key for key in self._heaps if key[1] < today]:
+                del self._heaps[key]
+        return len(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heaps.clear()
+            self._entries.clear()
+            self._last_id = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "waiting": len(self._entries),
+                "queues": len(self._heaps),
+                "queued": sum(len(heap) for heap in self._heaps.values()),
+            }
+
+
+waitlist_index = WaitlistIndex()
+
+
+# -------------------------------------------------
+# Einträge
+# -------------------------------------------------
+
+def to_model(row: WaitlistEntry) -> WaitlistEntryModel:
+    # Gespeicherter Eintrag: Praxis nicht erneut gegen die Registry prüfen
+    return WaitlistEntryModel.model_validate({
+        "entry_id": row.id,
+        "practice_id": row.practice_id,
+        "patient_name": row.patient_name,
+        "patient_phone": row.patient_phone,
+        "patient_email": row.patient_email,
+        "earliest_date": row.earliest_date,
+        "latest_date": row.latest_date,
+        "earliest_time": _time(row.earliest_minute),
+        "latest_time": _time(row.latest_minute),
+        "status": row.status,
+        "ticket_id": str(row.ticket_id) if row.ticket_id else None,
+        "created_at": row.created_at,
+    }, context=STORED)
+
+
+def _new_entry(request: WaitlistRequest) -> WaitlistEntry:
+    latest_date = request.latest_date or request.earliest_date + timedelta(days=WAITLIST_DAYS - 1)
+    latest_date = min(latest_date, request.earliest_date + timedelta(days=WAITLIST_MAX_DAYS - 1))
+
+    return WaitlistEntry(
+        practice_id=request.practice_id,
+        patient_name=request.patient_name,
+        patient_phone=request.patient_phone,
+        patient_email=request.patient_email,
+        earliest_date=request.earliest_date,
+        latest_date=latest_date,
+        earliest_minute=_minute(request.earliest_time),
+        latest_minute=_minute(request.latest_time),
+        status=STATUS_WAITING,
+    )
+
+
+def add_to_waitlist(db: Session, request: WaitlistRequest) -> WaitlistEntry:
+    row = _new_entry(request)
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+
+    waitlist_index.add(row)
+    return row
+
+
+def _waitlist_request(booking_request: BookingRequest) -> WaitlistRequest:
+    """
+    Ab Wunschtag, mit Wunschzeit ± Toleranz als Zeitfenster (ohne
+    Wunschzeit ganzer Tag).
+    """
+    earliest_time = latest_time = None
+    requested = parse_requested_time(booking_request.requested_time)
+    if requested is not None:
+        earliest_time, latest_time = tolerance_window(requested)
+
+    return WaitlistRequest(
+        practice_id=booking_request.practice_id,
+        patient_name=booking_request.patient_name,
+        patient_phone=booking_request.patient_phone,
+        patient_email=booking_request.patient_email,
+        earliest_date=booking_request.requested_date,
+        earliest_time=earliest_time,
+        latest_time=latest_time,
+    )
+
+
+def add_booking_request_to_waitlist(db: Session, booking_request: BookingRequest) -> WaitlistEntry:
+    """Nicht buchbare Anfrage vormerken (eigener Commit)."""
+    return add_to_waitlist(db, _waitlist_request(booking_request))
+
+
+def stage_booking_requests(db: Session, booking_requests: List[BookingRequest]) -> List[WaitlistEntry]:
+    """
+    Wie add_booking_request_to_waitlist für viele Anfragen, aber in der
+    laufenden Transaktion des Aufrufers (nur flush, IDs sind danach
+    gesetzt). Nach dessen Commit index_entries() aufrufen.
+    """
+    rows = [_new_entry(_waitlist_request(r)) for r in booking_requests]
+    if rows:
+        db.add_all(rows)
+        db.flush()
+    return rows
+
+
+def index_entries(db: Session, entry_ids: List[int]) -> None:
+    """Committete Einträge mit einer Abfrage in den Warteliste-Index übernehmen."""
+    if not entry_ids:
+        return
+    for row in db.query(WaitlistEntry).filter(WaitlistEntry.id.in_(entry_ids)):
+        waitlist_index.add(row)
+
+
+def list_waitlist(db: Session, practice_id: str) -> List[WaitlistEntry]:
+    return (
+        db.query(WaitlistEntry)
+        .filter(WaitlistEntry.practice_id == practice_id, WaitlistEntry.status == STATUS_WAITING)
+        .order_by(WaitlistEntry.id)
+        .all()
+    )
+
+
+def cancel_waitlist_entry(db: Session, practice_id: str, entry_id: int) -> bool:
+    updated = (
+        db.query(WaitlistEntry)
+        .filter(
+            WaitlistEntry.id == entry_id,
+            WaitlistEntry.practice_id == practice_id,
+            WaitlistEntry.status == STATUS_WAITING,
+        )
+        .update({WaitlistEntry.status: STATUS_CANCELLED}, synchronize_session=False)
+    )
+    db.commit()
+    waitlist_index.remove(entry_id)
+    return bool(updated)
+
+
+def load_waitlist(db: Session) -> int:
+    waitlist_index.clear()
+    return waitlist_index.sync(db)
+
+
+# -------------------------------------------------
+# Nachrücken bei frei gewordenem Slot
+# -------------------------------------------------
+
+def _claim(db: Session, entry_id: int) -> bool:
+    """
+    Eintrag exklusiv übernehmen (auch gegenüber anderen Workern).
+    """
+    updated = (
+        db.query(WaitlistEntry)
+        .filter(WaitlistEntry.id == entry_id, WaitlistEntry.status == STATUS_WAITING)
+        .update({WaitlistEntry.status: STATUS_BOOKED}, synchronize_session=False)
+    )
+    db.commit()
+    return bool(updated)
+
+
+def _waitlist_ticket(row: WaitlistEntry, slot) -> TicketModel:
+    return TicketModel(
+        practice_id=row.practice_id,
+        booking_request=BookingRequest(
+            practice_id=row.practice_id,
+            patient_name=row.patient_name,
+            patient_phone=row.patient_phone,
+            patient_email=row.patient_email,
+            requested_date=slot.start_time.date(),
+        ),
+        slot=slot,
+        status=TicketStatus.BOOKED,
+        message="Termin gebucht (Warteliste)",
+        created_at=datetime.utcnow(),
+    )
+
+
+def _unclaim(db: Session, entry_id: int) -> None:
+    """
+    Übernahme zurücknehmen: Der Eintrag wartet weiter (Slot vergeben oder
+    Fehler beim Buchen) – niemand fällt still von der Warteliste.
+    """
+    db.rollback()
+    (
+        db.query(WaitlistEntry)
+        .filter(
+            WaitlistEntry.id == entry_id,
+            WaitlistEntry.status == STATUS_BOOKED,
+            WaitlistEntry.ticket_id.is_(None),
+        )
+        .update({WaitlistEntry.status: STATUS_WAITING}, synchronize_session=False)
+    )
+    db.commit()
+    row = db.get(WaitlistEntry, entry_id)
+    if row is not None:
+        db.refresh(row)
+        waitlist_index.add(row)
+
+
+def _backfill(db: Session, practice_id: str, start: datetime) -> Optional[TicketModel]:
+    day_slots = get_day_slots(practice_id, start.date())
+    minute = start.hour * 60 + start.minute
+    i = bisect_left(day_slots.offsets, minute)
+    if i == len(day_slots) or day_slots.offsets[i] != minute or not day_slots.is_bookable(i):
+        return None
+
+    while True:
+        entry_id = waitlist_index.match(practice_id, start.date(), minute)
+        if entry_id is None:
+            return None
+
+        waitlist_index.remove(entry_id)
+        if not _claim(db, entry_id):
+            continue  # von anderem Worker übernommen oder storniert
+
+        try:
+            row = db.get(WaitlistEntry, entry_id)
+            ticket = _waitlist_ticket(row, day_slots.to_model(i))
+            db_ticket = create_ticket(db=db, ticket_model=ticket)
+        except SlotUnavailableError:
+            # Slot inzwischen anderweitig vergeben → Eintrag wartet weiter
+            _unclaim(db, entry_id)
+            return None
+        except Exception:
+            _unclaim(db, entry_id)
+            raise
+
+        row.ticket_id = db_ticket.id
+        db.commit()
+        ticket.ticket_id = str(db_ticket.id)
+        logger.info(
+            f"Warteliste: Eintrag {entry_id} auf frei gewordenen Slot "
+            f"{start.isoformat()} gebucht (Ticket {db_ticket.id})"
+        )
+        return ticket
+
+
+@on_slot_released
+def backfill_released_slots(db: Session, slots: List[Tuple[str, datetime]]) -> List[TicketModel]:
+    """
+    Bucht frei gewordene Slots für die passenden Wartelisten-Einträge mit
+    der höchsten Priorität (früheste Anmeldung). Die Warteliste wird einmal
+    je Aufruf mit der DB abgeglichen, danach läuft alles im Speicher-Index.
+    """
+    now = datetime.now()
+    slots = [(practice_id, start) for practice_id, start in slots if start > now]
+    if not slots:
+        return []
+
+    waitlist_index.sync(db)
+
+    tickets = []
+    for practice_id, start in slots:
+        try:
+            ticket = _backfill(db, practice_id, start)
+        except Exception as e:
+            logger.error(f"Warteliste: Nachrücken für {practice_id} {start.isoformat()} fehlgeschlagen: {e}")
+            continue
+        if ticket is not None:
+            tickets.append(ticket)
+    return tickets
+
+
+def backfill_released_slot(db: Session, practice_id: str, start: datetime) -> Optional[TicketModel]:
+    """Nachrücken für einen einzelnen Slot (siehe backfill_released_slots)."""
+    tickets = backfill_released_slots(db, [(practice_id, start)])
+    return tickets[0] if tickets else None